@@ -25,7 +25,64 @@ Example:
 
 __version__ = "0.1.0"
 
-from .generator import PromptGenerator
-from .gitignore import GitignoreManager, GitignoreRule
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-__all__ = ["PromptGenerator", "GitignoreManager", "GitignoreRule"]
+if TYPE_CHECKING:  # pragma: no cover
+    from .generator import PromptGenerator
+    from .gitignore import GitignoreManager, GitignoreRule
+    from .limits import Limits
+    from .progress import ProgressEvent
+    from .stats import RunStats
+    from .toc import PromptReader, TableOfContents
+    from .tree import TreeOptions
+
+# 属性名と定義モジュールの対応（起動時間短縮のため遅延インポートする）
+_LAZY_ATTRIBUTES = {
+    "PromptGenerator": "generator",
+    "GitignoreManager": "gitignore",
+    "GitignoreRule": "gitignore",
+    "Limits": "limits",
+    "ProgressEvent": "progress",
+    "RunStats": "stats",
+    "PromptReader": "toc",
+    "TableOfContents": "toc",
+    "TreeOptions": "tree",
+}
+
+__all__ = [
+    "PromptGenerator",
+    "GitignoreManager",
+    "GitignoreRule",
+    "Limits",
+    "ProgressEvent",
+    "RunStats",
+    "PromptReader",
+    "TableOfContents",
+    "TreeOptions",
+]
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve public attributes on first access.
+
+    Args:
+        name: Attribute name
+
+    Returns:
+        Any: The requested attribute
+
+    Raises:
+        AttributeError: If the attribute does not exist
+    """
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    """Return the module attributes including lazily resolved ones."""
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,210 @@
+"""Batch generation of many prompts in one process.
+
+A batch configuration lists jobs, each with its own directory, patterns,
+excluded directories and output file::
+
+    workers = 8
+
+    [defaults]
+    patterns = [".py", ".md"]
+    exclude_dirs = ["node_modules"]
+
+    [[jobs]]
+    name = "service-a"
+    dir = "services/a"
+    output = "prompts/service-a.txt"
+
+Relative paths are resolved against the directory of the configuration file.
+Outputs ending in ``.gz``, ``.xz`` or ``.bz2`` are compressed while written.
+All jobs run on one shared thread pool, and jobs over the same directory share
+a single ``GitignoreManager``.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from promptgen.config import load_config, resolve_path
+from promptgen.exceptions import ConfigError
+from promptgen.generator import PromptGenerator
+from promptgen.gitignore import GitignoreManager
+from promptgen.output import open_output
+from promptgen.stats import RunStats
+
+
+@dataclass
+class BatchJob:
+    """A single prompt generation job.
+
+    Attributes:
+        name: Job name used in reports
+        base_dir: Base directory to search
+        file_patterns: File patterns to include
+        output: Output file path
+        exclude_dirs: Directories to exclude
+    """
+
+    name: str
+    base_dir: str
+    file_patterns: List[str]
+    output: str
+    exclude_dirs: List[str] = field(default_factory=list)
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a batch job.
+
+    Attributes:
+        job: The job that was run
+        files: Number of collected files
+        elapsed: Wall time of the job in seconds
+        stats: Run statistics of the job
+        error: Error message if the job failed
+    """
+
+    job: BatchJob
+    files: int = 0
+    elapsed: float = 0.0
+    stats: Optional[RunStats] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the result as a JSON serialisable dictionary.
+
+        Returns:
+            Dict[str, Any]: Result summary
+        """
+        return {
+            "name": self.job.name,
+            "dir": self.job.base_dir,
+            "output": self.job.output,
+            "files": self.files,
+            "elapsed": self.elapsed,
+            "error": self.error,
+            "stats": self.stats.to_dict() if self.stats else None,
+        }
+
+
+def load_batch_config(
+    path: str, default_patterns: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Load jobs and options from a batch configuration file.
+
+    Args:
+        path: Path to a TOML or JSON configuration
+        default_patterns: Patterns used when neither the job nor ``defaults``
+            specify any
+
+    Returns:
+        Dict[str, Any]: ``{"jobs": List[BatchJob], "workers": Optional[int]}``
+
+    Raises:
+        ConfigError: If the configuration is invalid
+    """
+    config = load_config(path)
+    defaults = config.get("defaults", {})
+    raw_jobs = config.get("jobs")
+    if not isinstance(raw_jobs, list) or not raw_jobs:
+        raise ConfigError(f"No jobs defined in {path}")
+
+    jobs = []
+    for index, raw in enumerate(raw_jobs):
+        if not isinstance(raw, dict):
+            raise ConfigError(f"Job #{index + 1} in {path} must be a table/object")
+        for key in ("dir", "output"):
+            if key not in raw:
+                raise ConfigError(f"Job #{index + 1} in {path} is missing '{key}'")
+        patterns = raw.get("patterns", defaults.get("patterns", default_patterns))
+        jobs.append(
+            BatchJob(
+                name=str(raw.get("name", raw["dir"])),
+                base_dir=resolve_path(raw["dir"], path),
+                file_patterns=list(patterns or []),
+                output=resolve_path(raw["output"], path),
+                exclude_dirs=list(
+                    raw.get("exclude_dirs", defaults.get("exclude_dirs", []))
+                ),
+            )
+        )
+    return {"jobs": jobs, "workers": config.get("workers")}
+
+
+class BatchRunner:
+    """Run batch jobs on a shared worker pool."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """Initialize the runner.
+
+        Args:
+            max_workers: Number of worker threads (default: executor default)
+        """
+        self.max_workers = max_workers
+        self._managers: Dict[str, GitignoreManager] = {}
+        self._dir_locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _gitignore_manager(self, base_dir: str) -> GitignoreManager:
+        """Return the shared .gitignore manager for a directory.
+
+        Args:
+            base_dir: Absolute base directory
+
+        Returns:
+            GitignoreManager: Manager shared by all jobs on this directory
+        """
+        # ディレクトリごとのロックで、別ディレクトリの読み込みは並行させる
+        with self._locks_lock:
+            lock = self._dir_locks.setdefault(base_dir, threading.Lock())
+        with lock:
+            manager = self._managers.get(base_dir)
+            if manager is None:
+                manager = self._managers[base_dir] = GitignoreManager(base_dir)
+            return manager
+
+    def run_job(self, job: BatchJob) -> BatchResult:
+        """Run a single job and write its output file.
+
+        Args:
+            job: Job to run
+
+        Returns:
+            BatchResult: Outcome of the job (errors are captured, not raised)
+        """
+        result = BatchResult(job=job)
+        start = time.perf_counter()
+        try:
+            base_dir = os.path.abspath(job.base_dir)
+            if not os.path.isdir(base_dir):
+                raise NotADirectoryError(f"Directory not found: {job.base_dir}")
+            generator = PromptGenerator(
+                base_dir=base_dir,
+                file_patterns=job.file_patterns,
+                exclude_dirs=job.exclude_dirs,
+                gitignore_manager=self._gitignore_manager(base_dir),
+            )
+            output_dir = os.path.dirname(job.output)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            with open_output(job.output) as f:
+                result.files = generator.write_prompt(f)
+            result.stats = generator.stats
+        except Exception as e:
+            result.error = str(e)
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def run(self, jobs: List[BatchJob]) -> List[BatchResult]:
+        """Run all jobs on the shared pool.
+
+        Args:
+            jobs: Jobs to run
+
+        Returns:
+            List[BatchResult]: Results in the order of ``jobs``
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self.run_job, jobs))
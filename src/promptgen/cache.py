@@ -0,0 +1,42 @@
+"""On-disk cache locations for the promptgen package."""
+
+import hashlib
+import os
+from typing import Optional
+
+# キャッシュディレクトリを上書きする環境変数
+CACHE_DIR_ENV = "PROMPTGEN_CACHE_DIR"
+
+
+def cache_root() -> str:
+    """Return the root directory of all promptgen caches.
+
+    Uses ``$PROMPTGEN_CACHE_DIR`` if set, otherwise ``$XDG_CACHE_HOME/promptgen``
+    or ``~/.cache/promptgen``.
+
+    Returns:
+        str: Cache root directory (not created)
+    """
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return os.path.abspath(os.path.expanduser(override))
+    xdg = os.environ.get("XDG_CACHE_HOME") or os.path.join("~", ".cache")
+    return os.path.join(os.path.abspath(os.path.expanduser(xdg)), "promptgen")
+
+
+def project_cache_dir(base_dir: str, root: Optional[str] = None) -> str:
+    """Return (and create) the cache directory of a project.
+
+    Args:
+        base_dir: Project base directory
+        root: Cache root (default: ``cache_root()``)
+
+    Returns:
+        str: Cache directory unique to the absolute base directory
+    """
+    base_dir = os.path.abspath(base_dir)
+    digest = hashlib.sha1(base_dir.encode("utf-8")).hexdigest()[:16]
+    name = f"{os.path.basename(base_dir) or 'root'}-{digest}"
+    path = os.path.join(root or cache_root(), name)
+    os.makedirs(path, exist_ok=True)
+    return path
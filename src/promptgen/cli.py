@@ -3,9 +3,35 @@
 import argparse
 import os
 import sys
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from promptgen.generator import PromptGenerator
+DEFAULT_PATTERNS = [
+    # 拡張子パターン
+    ".py",
+    ".js",
+    ".ts",
+    ".json",
+    ".yml",
+    ".yaml",
+    ".html",
+    ".conf",
+    ".toml",
+    ".md",
+    ".css",
+    ".scss",
+    ".sh",
+    # 完全なファイル名パターン
+    "Dockerfile",
+    "docker-compose.yml",
+    "docker-compose.yaml",
+    ".env",
+    ".gitignore",
+    "Makefile",
+    "requirements.txt",
+    "package.json",
+    "tsconfig.json",
+    ".dockerignore",
+]
 
 
 def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
@@ -17,6 +43,15 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
     Returns:
         Parsed command line arguments.
     """
+    return _build_parser().parse_args(args)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the parser of the main command.
+
+    Returns:
+        Parser of the command line options.
+    """
     parser = argparse.ArgumentParser(
         description="Generate AI prompts from project files"
     )
@@ -30,33 +65,7 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
         "--patterns",
         type=str,
         nargs="+",
-        default=[
-            # 拡張子パターン
-            ".py",
-            ".js",
-            ".ts",
-            ".json",
-            ".yml",
-            ".yaml",
-            ".html",
-            ".conf",
-            ".toml",
-            ".md",
-            ".css",
-            ".scss",
-            ".sh",
-            # 完全なファイル名パターン
-            "Dockerfile",
-            "docker-compose.yml",
-            "docker-compose.yaml",
-            ".env",
-            ".gitignore",
-            "Makefile",
-            "requirements.txt",
-            "package.json",
-            "tsconfig.json",
-            ".dockerignore",
-        ],
+        default=list(DEFAULT_PATTERNS),
         help="File patterns to include (extensions or complete filenames)",
     )
     parser.add_argument(
@@ -64,6 +73,47 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
         type=str,
         help="Output file path (if not specified, prints to stdout)",
     )
+    parser.add_argument(
+        "--format",
+        type=str,
+        choices=["text", "jsonl", "xml", "markdown"],
+        default="text",
+        help="Output format (default: text)",
+    )
+    parser.add_argument(
+        "--toc",
+        type=str,
+        metavar="PATH",
+        help="Write a table of contents with the byte offset, length and SHA-256 "
+        "of each file in --output (JSON if PATH ends in .json, binary otherwise)",
+    )
+    parser.add_argument(
+        "--tree",
+        action="store_true",
+        help="Start the prompt with a directory tree of the included files",
+    )
+    parser.add_argument(
+        "--tree-depth",
+        type=int,
+        metavar="N",
+        help="Maximum number of directory levels shown by --tree",
+    )
+    parser.add_argument(
+        "--tree-width",
+        type=int,
+        metavar="N",
+        help="Maximum number of entries per directory shown by --tree",
+    )
+    parser.add_argument(
+        "--tree-stats",
+        action="store_true",
+        help="Show per-directory file counts (and sizes when known) in --tree",
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        help="Compression level for .gz/.bz2 (1-9) and .xz (0-9) output files",
+    )
     parser.add_argument(
         "--exclude-dirs",
         type=str,
@@ -75,10 +125,624 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
         action="store_true",
         help="Enable verbose output",
     )
+    parser.add_argument(
+        "--follow-symlinks",
+        action="store_true",
+        help="Follow symlinked directories (each physical file is read once)",
+    )
+    parser.add_argument(
+        "--extract",
+        type=str,
+        nargs="+",
+        metavar="SPEC",
+        help="Read only a line window of matching files, "
+        "e.g. '*.log: head=200,tail=50'",
+    )
+    parser.add_argument(
+        "--redact",
+        action="store_true",
+        help="Replace secrets (keys, tokens, passwords) in file contents",
+    )
+    parser.add_argument(
+        "--redact-pattern",
+        type=str,
+        nargs="+",
+        metavar="REGEX",
+        help="Additional secret patterns to redact (implies --redact)",
+    )
+    parser.add_argument(
+        "--max-files",
+        type=int,
+        metavar="N",
+        help="Stop after selecting N files (the prompt notes the truncation)",
+    )
+    parser.add_argument(
+        "--max-total-bytes",
+        type=int,
+        metavar="N",
+        help="Stop reading before the total size of the files exceeds N bytes",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        metavar="N",
+        help="Walk at most N directory levels below --dir",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Stop traversal and reading after SECONDS and write a partial prompt",
+    )
+    parser.add_argument(
+        "--dry-run",
+        type=str,
+        nargs="?",
+        const="text",
+        choices=["text", "json"],
+        help="Only report file counts, sizes and estimated tokens without "
+        "reading any file (text or json, default: text)",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        type=str,
+        nargs="?",
+        const="text",
+        choices=["text", "json"],
+        help="Only print the Merkle tree hash of the selected files (text) or "
+        "all directory and file hashes (json); contents are hashed once and "
+        "cached by stat signature",
+    )
+    parser.add_argument(
+        "--entry",
+        type=str,
+        action="append",
+        metavar="PATH",
+        help="Only include this file (relative to --dir) and the local files it "
+        "imports, transitively (repeatable; other files are included as is)",
+    )
+    parser.add_argument(
+        "--files-from",
+        type=str,
+        metavar="FILE",
+        help="Read the files to include from FILE ('-' for stdin; one path per "
+        "line or NUL-delimited, relative to --dir) instead of walking --dir",
+    )
+    parser.add_argument(
+        "--no-filters",
+        action="store_true",
+        help="Take the --files-from list as is, without applying the patterns, "
+        "excluded directories and .gitignore rules",
+    )
+    parser.add_argument(
+        "--query",
+        type=str,
+        help="Only include the files most relevant to this query (BM25 ranking)",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=20,
+        help="Maximum number of files selected by --query (default: 20)",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        help="Maximum total size of the files selected by --query",
+    )
+    parser.add_argument(
+        "--index",
+        type=str,
+        metavar="PATH",
+        help="Search index database used by --query (default: cache directory)",
+    )
+    parser.add_argument(
+        "--no-progress",
+        action="store_true",
+        help="Disable the progress bar shown when stderr is a terminal",
+    )
+    parser.add_argument(
+        "--via-socket",
+        type=str,
+        metavar="PATH",
+        help="Request the prompt from a running 'promptgen serve' server",
+    )
+    parser.add_argument(
+        "--stats",
+        type=str,
+        choices=["json"],
+        help="Print per-phase run statistics to stderr in the given format",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="PATH",
+        help="Profile the run with cProfile and write pstats data to PATH",
+    )
+    return parser
+
+
+def parse_serve_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments of the serve subcommand.
+
+    Args:
+        args: List of command line arguments following ``serve``.
+
+    Returns:
+        Parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="promptgen serve",
+        description="Serve prompts from warm generators over a Unix socket",
+    )
+    parser.add_argument(
+        "--socket",
+        type=str,
+        required=True,
+        help="Path of the Unix domain socket to listen on",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of worker threads (default: 4)",
+    )
+    parser.add_argument(
+        "--check-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between filesystem change checks per root (default: 1.0)",
+    )
+    return parser.parse_args(args)
+
+
+def serve(args: Optional[List[str]] = None) -> int:
+    """Run the prompt server until interrupted.
+
+    Args:
+        args: Command line arguments following ``serve``.
+
+    Returns:
+        Exit code (0 for success, non-zero for error).
+    """
+    parsed_args = parse_serve_args(args)
+
+    from promptgen.server import PromptServer
+
+    server = PromptServer(
+        parsed_args.socket,
+        max_workers=parsed_args.workers,
+        check_interval=parsed_args.check_interval,
+        default_patterns=list(DEFAULT_PATTERNS),
+    )
+    print(f"Serving on {parsed_args.socket}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def parse_batch_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments of the batch subcommand.
+
+    Args:
+        args: List of command line arguments following ``batch``.
+
+    Returns:
+        Parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="promptgen batch",
+        description="Generate prompts for many jobs in one process",
+    )
+    parser.add_argument(
+        "config",
+        type=str,
+        help="Batch configuration file (.toml or .json)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker threads (overrides the configuration)",
+    )
+    return parser.parse_args(args)
 
+
+def batch(args: Optional[List[str]] = None) -> int:
+    """Run all jobs of a batch configuration.
+
+    One JSON line with the result and statistics of each job is printed to
+    stdout.
+
+    Args:
+        args: Command line arguments following ``batch``.
+
+    Returns:
+        Exit code (0 if all jobs succeeded, 1 otherwise).
+    """
+    parsed_args = parse_batch_args(args)
+
+    import json
+
+    from promptgen.batch import BatchRunner, load_batch_config
+
+    config = load_batch_config(parsed_args.config, list(DEFAULT_PATTERNS))
+    runner = BatchRunner(max_workers=parsed_args.workers or config["workers"])
+    results = runner.run(config["jobs"])
+
+    for result in results:
+        print(json.dumps(result.to_dict(), sort_keys=True))
+        if result.error:
+            print(f"Error in job {result.job.name}: {result.error}", file=sys.stderr)
+    return 1 if any(result.error for result in results) else 0
+
+
+def parse_fanout_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments of the fanout subcommand.
+
+    Args:
+        args: List of command line arguments following ``fanout``.
+
+    Returns:
+        Parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="promptgen fanout",
+        description="Write several prompts of one directory from a single walk",
+    )
+    parser.add_argument(
+        "config",
+        type=str,
+        help="Fan-out configuration file (.toml or .json)",
+    )
+    parser.add_argument(
+        "--dir",
+        type=str,
+        help="Base directory to search (overrides the configuration; "
+        "default: current directory)",
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        help="Compression level for .gz/.bz2 (1-9) and .xz (0-9) output files",
+    )
+    parser.add_argument(
+        "--stats",
+        type=str,
+        choices=["json"],
+        help="Print the run statistics of the shared walk to stderr",
+    )
     return parser.parse_args(args)
 
 
+def fanout(args: Optional[List[str]] = None) -> int:
+    """Write all outputs of a fan-out configuration.
+
+    One JSON line with the name, output file and file count of each output is
+    printed to stdout.
+
+    Args:
+        args: Command line arguments following ``fanout``.
+
+    Returns:
+        Exit code (0 for success, non-zero for error).
+    """
+    parsed_args = parse_fanout_args(args)
+
+    import json
+
+    from promptgen.fanout import FanOut, load_fanout_config
+
+    config = load_fanout_config(parsed_args.config, list(DEFAULT_PATTERNS))
+    base_dir = parsed_args.dir or config["dir"] or "."
+    if not os.path.isdir(base_dir):
+        print(f"Error: Directory not found: {base_dir}", file=sys.stderr)
+        return 1
+
+    fan_out = FanOut(base_dir, config["outputs"])
+    counts = fan_out.run(parsed_args.compress_level)
+    for output in fan_out.outputs:
+        print(
+            json.dumps(
+                {
+                    "name": output.name,
+                    "output": output.output,
+                    "files": counts[output.name],
+                },
+                sort_keys=True,
+            )
+        )
+    if parsed_args.stats == "json":
+        print(fan_out.stats.to_json(), file=sys.stderr)
+    return 0
+
+
+def _end_stdout(output_format: str) -> None:
+    """Terminate a prompt written to stdout with a newline.
+
+    Args:
+        output_format: Output format of the prompt.
+    """
+    # JSONLとXMLは改行で終わるので、空行を足さない
+    if output_format in ("text", "markdown"):
+        sys.stdout.write("\n")
+
+
+# サーバーはディレクトリ・パターン・除外・形式だけを受け取る
+_SOCKET_UNSUPPORTED = (
+    "toc",
+    "tree",
+    "tree_depth",
+    "tree_width",
+    "tree_stats",
+    "follow_symlinks",
+    "extract",
+    "redact",
+    "redact_pattern",
+    "max_files",
+    "max_total_bytes",
+    "max_depth",
+    "deadline",
+    "dry_run",
+    "fingerprint",
+    "entry",
+    "files_from",
+    "no_filters",
+    "query",
+    "top_k",
+    "max_bytes",
+    "index",
+    "stats",
+    "profile",
+)
+
+
+def _run_via_socket(parsed_args: argparse.Namespace) -> int:
+    """Stream the prompt from a running server to the output.
+
+    Args:
+        parsed_args: Parsed command line arguments.
+
+    Returns:
+        Exit code (0 for success, non-zero for error).
+    """
+    # サーバーに転送されないオプションを黙って無視しない
+    parser = _build_parser()
+    unsupported = [
+        "--" + dest.replace("_", "-")
+        for dest in _SOCKET_UNSUPPORTED
+        if getattr(parsed_args, dest) != parser.get_default(dest)
+    ]
+    if unsupported:
+        print(
+            f"Error: --via-socket cannot be combined with {', '.join(unsupported)}",
+            file=sys.stderr,
+        )
+        return 1
+
+    from promptgen.server import stream_prompt
+
+    chunks = stream_prompt(
+        parsed_args.via_socket,
+        parsed_args.dir,
+        file_patterns=parsed_args.patterns,
+        exclude_dirs=parsed_args.exclude_dirs,
+        output_format=parsed_args.format,
+    )
+    if parsed_args.output:
+        from promptgen.output import open_output
+
+        try:
+            with open_output(parsed_args.output, parsed_args.compress_level) as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        except IOError as e:
+            print(f"Error writing to output file: {str(e)}", file=sys.stderr)
+            return 1
+    else:
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+        _end_stdout(parsed_args.format)
+    return 0
+
+
+def _run(parsed_args: argparse.Namespace) -> int:
+    """Collect files, generate the prompt and write it out.
+
+    Args:
+        parsed_args: Parsed command line arguments.
+
+    Returns:
+        Exit code (0 for success, non-zero for error).
+    """
+    # 起動時間短縮のため、実際に処理するときだけ読み込む
+    from promptgen.generator import PromptGenerator
+
+    toc = None
+    if parsed_args.toc:
+        from promptgen.output import compression_for
+        from promptgen.toc import TableOfContents
+
+        # オフセットは非圧縮のファイル上でしか意味を持たない
+        if not parsed_args.output or compression_for(parsed_args.output):
+            print(
+                "Error: --toc requires an uncompressed --output file",
+                file=sys.stderr,
+            )
+            return 1
+        toc = TableOfContents()
+
+    progress = None
+    if not parsed_args.no_progress and sys.stderr.isatty():
+        from promptgen.progress import ProgressBar
+
+        progress = ProgressBar(sys.stderr)
+
+    redactor = None
+    if parsed_args.redact or parsed_args.redact_pattern:
+        from promptgen.redact import Redactor
+
+        redactor = Redactor(
+            [
+                (f"custom{number}", pattern)
+                for number, pattern in enumerate(parsed_args.redact_pattern or [], 1)
+            ]
+        )
+
+    limits = None
+    if any(
+        value is not None
+        for value in (
+            parsed_args.max_files,
+            parsed_args.max_total_bytes,
+            parsed_args.max_depth,
+            parsed_args.deadline,
+        )
+    ):
+        from promptgen.limits import Limits
+
+        limits = Limits(
+            max_files=parsed_args.max_files,
+            max_total_bytes=parsed_args.max_total_bytes,
+            max_depth=parsed_args.max_depth,
+            deadline=parsed_args.deadline,
+        )
+
+    generator = PromptGenerator(
+        base_dir=parsed_args.dir,
+        file_patterns=parsed_args.patterns,
+        exclude_dirs=parsed_args.exclude_dirs,
+        progress=progress,
+        follow_symlinks=parsed_args.follow_symlinks,
+        extract=parsed_args.extract,
+        redactor=redactor,
+        limits=limits,
+    )
+
+    if parsed_args.verbose:
+        print(f"Scanning directory: {parsed_args.dir}", file=sys.stderr)
+        print(f"File patterns: {parsed_args.patterns}", file=sys.stderr)
+        if parsed_args.exclude_dirs:
+            print(
+                f"Excluding directories: {parsed_args.exclude_dirs}",
+                file=sys.stderr,
+            )
+
+    paths = None
+    if parsed_args.files_from:
+        if parsed_args.entry or parsed_args.query:
+            print(
+                "Error: --files-from cannot be combined with --entry or --query",
+                file=sys.stderr,
+            )
+            return 1
+        from promptgen.pathlist import read_path_list
+
+        # 走査せず、与えられた一覧を書き込みながら1つずつ読み込む
+        paths = generator.files_from(
+            read_path_list(parsed_args.files_from),
+            filters=not parsed_args.no_filters,
+        )
+
+    if parsed_args.dry_run:
+        # ファイルを一切読まずにサイズだけを集計する
+        report = generator.dry_run(paths=paths)
+        print(report.to_json() if parsed_args.dry_run == "json" else report.format())
+        if parsed_args.stats == "json":
+            print(generator.stats.to_json(), file=sys.stderr)
+        return 0
+
+    if parsed_args.fingerprint:
+        fingerprint = generator.fingerprint(paths)
+        print(
+            fingerprint.to_json()
+            if parsed_args.fingerprint == "json"
+            else fingerprint.root
+        )
+        if parsed_args.stats == "json":
+            print(generator.stats.to_json(), file=sys.stderr)
+        return 0
+
+    if paths is not None:
+        files_content: Optional[Dict[str, str]] = None
+    elif parsed_args.entry:
+        if parsed_args.query:
+            print("Error: --entry cannot be combined with --query", file=sys.stderr)
+            return 1
+        files_content = generator.read_files(
+            generator.dependency_closure(parsed_args.entry)
+        )
+    elif parsed_args.query:
+        files_content = generator.read_files(
+            generator.search_files(
+                parsed_args.query,
+                top_k=parsed_args.top_k,
+                max_bytes=parsed_args.max_bytes,
+                index_path=parsed_args.index,
+            )
+        )
+    else:
+        # ファイルは書き込みながら1つずつ読み込む
+        files_content = None
+
+    tree = None
+    if parsed_args.tree:
+        from promptgen.tree import TreeOptions
+
+        tree = TreeOptions(
+            max_depth=parsed_args.tree_depth,
+            max_width=parsed_args.tree_width,
+            stats=parsed_args.tree_stats,
+        )
+
+    if parsed_args.output:
+        from promptgen.output import open_output
+
+        try:
+            with open_output(parsed_args.output, parsed_args.compress_level) as f:
+                count = generator.write_prompt(
+                    f, files_content, parsed_args.format, tree, toc, paths
+                )
+            if toc is not None:
+                toc.save(parsed_args.toc)
+        except IOError as e:
+            print(f"Error writing to output file: {str(e)}", file=sys.stderr)
+            return 1
+    else:
+        count = generator.write_prompt(
+            sys.stdout, files_content, parsed_args.format, tree, paths=paths
+        )
+        _end_stdout(parsed_args.format)
+
+    if generator.stats.truncated:
+        print(
+            f"Warning: output truncated ({generator.stats.truncated} reached)",
+            file=sys.stderr,
+        )
+
+    if parsed_args.verbose:
+        print(f"Found {count} files to process", file=sys.stderr)
+        for canonical, aliases in sorted(generator.aliases.items()):
+            print(
+                f"Read {canonical} once for aliases: {', '.join(aliases)}",
+                file=sys.stderr,
+            )
+        for name, redacted in sorted(generator.stats.redactions.items()):
+            print(f"Redacted {redacted} secrets ({name})", file=sys.stderr)
+        if parsed_args.output:
+            print(f"Output written to: {parsed_args.output}", file=sys.stderr)
+        if toc is not None:
+            print(f"Table of contents written to: {parsed_args.toc}", file=sys.stderr)
+
+    if parsed_args.stats == "json":
+        print(generator.stats.to_json(), file=sys.stderr)
+
+    return 0
+
+
 def main(args: Optional[List[str]] = None) -> int:
     """Execute the main CLI function.
 
@@ -89,6 +753,14 @@ def main(args: Optional[List[str]] = None) -> int:
         Exit code (0 for success, non-zero for error).
     """
     try:
+        argv = sys.argv[1:] if args is None else args
+        if argv and argv[0] == "serve":
+            return serve(argv[1:])
+        if argv and argv[0] == "batch":
+            return batch(argv[1:])
+        if argv and argv[0] == "fanout":
+            return fanout(argv[1:])
+
         parsed_args = parse_args(args)
 
         # ディレクトリの存在チェックを追加
@@ -96,41 +768,19 @@ def main(args: Optional[List[str]] = None) -> int:
             print(f"Error: Directory not found: {parsed_args.dir}", file=sys.stderr)
             return 1
 
-        generator = PromptGenerator(
-            base_dir=parsed_args.dir,
-            file_patterns=parsed_args.patterns,
-            exclude_dirs=parsed_args.exclude_dirs,
-        )
-
-        if parsed_args.verbose:
-            print(f"Scanning directory: {parsed_args.dir}", file=sys.stderr)
-            print(f"File patterns: {parsed_args.patterns}", file=sys.stderr)
-            if parsed_args.exclude_dirs:
-                print(
-                    f"Excluding directories: {parsed_args.exclude_dirs}",
-                    file=sys.stderr,
-                )
-
-        files_content = generator.collect_files()
-
-        if parsed_args.verbose:
-            print(f"Found {len(files_content)} files to process", file=sys.stderr)
+        if parsed_args.via_socket:
+            return _run_via_socket(parsed_args)
 
-        prompt = generator.generate_prompt(files_content)
+        if parsed_args.profile:
+            import cProfile
 
-        if parsed_args.output:
+            profiler = cProfile.Profile()
             try:
-                with open(parsed_args.output, "w", encoding="utf-8") as f:
-                    f.write(prompt)
-                if parsed_args.verbose:
-                    print(f"Output written to: {parsed_args.output}", file=sys.stderr)
-            except IOError as e:
-                print(f"Error writing to output file: {str(e)}", file=sys.stderr)
-                return 1
-        else:
-            print(prompt)
+                return profiler.runcall(_run, parsed_args)
+            finally:
+                profiler.dump_stats(parsed_args.profile)
 
-        return 0
+        return _run(parsed_args)
 
     except Exception as e:
         print(f"Error: {str(e)}", file=sys.stderr)
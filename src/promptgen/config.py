@@ -0,0 +1,83 @@
+"""Configuration file loading for the promptgen package."""
+
+import json
+import os
+import sys
+from typing import Any, Dict
+
+from promptgen.exceptions import ConfigError
+
+
+def _load_toml(path: str) -> Dict[str, Any]:
+    """Load a TOML file.
+
+    Uses ``tomllib`` on Python 3.11+ and falls back to the ``tomli`` package.
+
+    Args:
+        path: Path to the TOML file
+
+    Returns:
+        Dict[str, Any]: Parsed document
+
+    Raises:
+        ConfigError: If no TOML parser is available or the file is invalid
+    """
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:  # pragma: no cover
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise ConfigError(
+                "Reading TOML configuration requires Python 3.11+ or the "
+                "'tomli' package; use a JSON configuration instead"
+            )
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except tomllib.TOMLDecodeError as e:
+        raise ConfigError(f"Invalid TOML in {path}: {e}")
+
+
+def load_config(path: str) -> Dict[str, Any]:
+    """Load a TOML or JSON configuration file.
+
+    Args:
+        path: Path to a ``.toml`` or ``.json`` file
+
+    Returns:
+        Dict[str, Any]: Parsed configuration
+
+    Raises:
+        ConfigError: If the file cannot be read or parsed
+    """
+    try:
+        if path.endswith(".toml"):
+            data = _load_toml(path)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+    except OSError as e:
+        raise ConfigError(f"Error reading {path}: {e}")
+    except ValueError as e:
+        raise ConfigError(f"Invalid JSON in {path}: {e}")
+
+    if not isinstance(data, dict):
+        raise ConfigError(f"Configuration in {path} must be a table/object")
+    return data
+
+
+def resolve_path(path: str, config_path: str) -> str:
+    """Resolve a path relative to the directory of a configuration file.
+
+    Args:
+        path: Path from the configuration (absolute or relative)
+        config_path: Path of the configuration file
+
+    Returns:
+        str: Absolute path
+    """
+    path = os.path.expanduser(path)
+    if os.path.isabs(path):
+        return path
+    return os.path.abspath(os.path.join(os.path.dirname(config_path), path))
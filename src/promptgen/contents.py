@@ -0,0 +1,498 @@
+"""Memory-bounded mappings of file paths to contents.
+
+``collect_files`` returns one of these mappings of absolute paths to contents:
+
+- ``CompactContents`` (the default) holds every file body in slotted
+  ``FileRecord`` objects sorted once by relative path; each record stores the
+  interned file name and the id of its directory, whose relative path is kept
+  once, so no absolute path string is stored per file. It is a mutable
+  mapping like the ``dict`` returned before, but not a ``dict`` subclass;
+  ``dict(files)`` makes a copy for APIs such as ``json.dumps``.
+- ``LazyContents`` keeps only the paths and their stat metadata and reads a
+  file each time its content is accessed.
+- ``SpilledContents`` keeps contents in memory up to a byte budget and writes
+  the rest to an anonymous temporary file, which is memory-mapped so contents
+  can be exposed as zero-copy ``memoryview`` slices.
+
+``CompactContents`` iterates in path order, the others in collection order.
+Files that cannot be read when accessed are skipped by ``items()`` and
+``values()`` and raise ``KeyError`` on direct access.
+"""
+
+import mmap
+import os
+import sys
+import tempfile
+from typing import (
+    Callable,
+    Dict,
+    ItemsView,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    ValuesView,
+)
+
+ContentReader = Callable[[str], Optional[str]]
+
+
+class FileStat(NamedTuple):
+    """Stat metadata recorded for a collected file.
+
+    Attributes:
+        size: File size in bytes
+        mtime_ns: Modification time in nanoseconds
+    """
+
+    size: int
+    mtime_ns: int
+
+
+class _ReadableItems(ItemsView):
+    """Items view skipping entries whose content cannot be read."""
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        mapping = self._mapping
+        for key in mapping:
+            content = mapping.get(key)
+            if content is not None:
+                yield key, content
+
+
+class _ReadableValues(ValuesView):
+    """Values view skipping entries whose content cannot be read."""
+
+    def __iter__(self) -> Iterator[str]:
+        for _key, content in _ReadableItems(self._mapping):
+            yield content
+
+
+class FileRecord:
+    """Content and metadata of one collected file.
+
+    Attributes:
+        name: Interned file name
+        dir_id: Index of the file's directory in ``CompactContents.directories``
+        size: Number of bytes read from disk
+        content: Decoded file content
+    """
+
+    __slots__ = ("name", "dir_id", "size", "content")
+
+    def __init__(self, name: str, dir_id: int, size: int, content: str):
+        """Initialize a record.
+
+        Args:
+            name: Interned file name
+            dir_id: Directory index
+            size: Number of bytes read from disk
+            content: Decoded file content
+        """
+        self.name = name
+        self.dir_id = dir_id
+        self.size = size
+        self.content = content
+
+
+class _RecordItems(ItemsView):
+    """Items view reading the records directly in path order."""
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        mapping = self._mapping
+        for record in mapping.records:
+            yield mapping.path_of(record), record.content
+
+
+class _RecordValues(ValuesView):
+    """Values view reading the records directly in path order."""
+
+    def __iter__(self) -> Iterator[str]:
+        for record in self._mapping.records:
+            yield record.content
+
+
+class CompactContents(MutableMapping[str, str]):
+    """Mapping of absolute paths to contents over compact file records.
+
+    Call ``finish()`` after the last ``add()`` to sort the records; lookups
+    use a binary search over them, and absolute paths are only built when
+    keys are iterated. Files set or deleted afterwards keep the records
+    sorted.
+    """
+
+    def __init__(self, base_dir: str):
+        """Initialize an empty mapping.
+
+        Args:
+            base_dir: Absolute base directory of the collected files
+        """
+        self.base_dir = base_dir
+        self._prefix = os.path.join(base_dir, "")
+        # 相対ディレクトリパス（``/``区切り、ベース直下は空文字列）を1度だけ保持する
+        self.directories: List[str] = []
+        self._dir_ids: Dict[str, int] = {}
+        self.records: List[FileRecord] = []
+
+    def add(self, path: str, content: str, size: int) -> None:
+        """Store a file.
+
+        Args:
+            path: Absolute file path below the base directory
+            content: File content
+            size: Number of bytes read from disk
+
+        Raises:
+            ValueError: If the path is not below the base directory
+        """
+        if not path.startswith(self._prefix):
+            raise ValueError(f"{path} is not below {self.base_dir}")
+        self.records.append(self._new_record(path, content, size))
+
+    def _new_record(self, path: str, content: str, size: int) -> FileRecord:
+        """Create the record of a path below the base directory.
+
+        Args:
+            path: Absolute file path below the base directory
+            content: File content
+            size: Number of bytes read from disk
+
+        Returns:
+            FileRecord: New record, with its directory registered
+        """
+        directory, _, name = path[len(self._prefix) :].rpartition(os.sep)
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = self._dir_ids[directory] = len(self.directories)
+            self.directories.append(directory.replace(os.sep, "/"))
+        return FileRecord(sys.intern(name), dir_id, size, content)
+
+    def finish(self) -> None:
+        """Sort the records by relative path; use item assignment afterwards."""
+        self.records.sort(key=self.rel_path)
+
+    def rel_path(self, record: FileRecord) -> str:
+        """Return the relative path of a record.
+
+        Args:
+            record: File record
+
+        Returns:
+            str: Path relative to the base directory, ``/`` separated
+        """
+        directory = self.directories[record.dir_id]
+        return f"{directory}/{record.name}" if directory else record.name
+
+    def path_of(self, record: FileRecord) -> str:
+        """Return the absolute path of a record.
+
+        Args:
+            record: File record
+
+        Returns:
+            str: Absolute file path
+        """
+        return self._prefix + self.rel_path(record).replace("/", os.sep)
+
+    def sections(self) -> Iterator[Tuple[str, str]]:
+        """Yield relative paths (``os.sep`` separated) and contents in order.
+
+        Yields:
+            Tuple[str, str]: Relative path and content of each file
+        """
+        rel_path = self.rel_path
+        for record in self.records:
+            yield rel_path(record).replace("/", os.sep), record.content
+
+    def _position(self, path: str) -> Tuple[int, bool]:
+        """Locate an absolute path below the base directory in the records.
+
+        Args:
+            path: Absolute file path below the base directory
+
+        Returns:
+            Tuple[int, bool]: Index of the record or of its sorted insertion
+                point, and whether the record exists
+        """
+        target = path[len(self._prefix) :].replace(os.sep, "/")
+        records = self.records
+        rel_path = self.rel_path
+        low, high = 0, len(records)
+        while low < high:
+            middle = (low + high) // 2
+            if rel_path(records[middle]) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low, low < len(records) and rel_path(records[low]) == target
+
+    def _find(self, path: object) -> Optional[FileRecord]:
+        """Find the record of an absolute path.
+
+        Args:
+            path: Absolute file path
+
+        Returns:
+            Optional[FileRecord]: Record, or None if the file was not collected
+        """
+        if not isinstance(path, str) or not path.startswith(self._prefix):
+            return None
+        index, found = self._position(path)
+        return self.records[index] if found else None
+
+    def record(self, path: str) -> FileRecord:
+        """Return the record of a file.
+
+        Args:
+            path: Absolute file path
+
+        Returns:
+            FileRecord: Record of the file
+
+        Raises:
+            KeyError: If the file was not collected
+        """
+        record = self._find(path)
+        if record is None:
+            raise KeyError(path)
+        return record
+
+    def __getitem__(self, path: str) -> str:
+        """Return the content of a file."""
+        return self.record(path).content
+
+    def __setitem__(self, path: str, content: str) -> None:
+        """Set the content of a file, inserting it in path order if new.
+
+        Raises:
+            ValueError: If the path is not below the base directory
+        """
+        if not path.startswith(self._prefix):
+            raise ValueError(f"{path} is not below {self.base_dir}")
+        size = len(content.encode("utf-8"))
+        index, found = self._position(path)
+        if found:
+            record = self.records[index]
+            record.content = content
+            record.size = size
+        else:
+            self.records.insert(index, self._new_record(path, content, size))
+
+    def __delitem__(self, path: str) -> None:
+        """Remove a file.
+
+        Raises:
+            KeyError: If the file was not collected
+        """
+        if not isinstance(path, str) or not path.startswith(self._prefix):
+            raise KeyError(path)
+        index, found = self._position(path)
+        if not found:
+            raise KeyError(path)
+        del self.records[index]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the absolute file paths in path order."""
+        path_of = self.path_of
+        for record in self.records:
+            yield path_of(record)
+
+    def __len__(self) -> int:
+        """Return the number of files."""
+        return len(self.records)
+
+    def __contains__(self, path: object) -> bool:
+        """Return True if a file was collected."""
+        return self._find(path) is not None
+
+    def items(self) -> ItemsView[str, str]:
+        """Return a view of the (path, content) pairs in path order."""
+        return _RecordItems(self)
+
+    def values(self) -> ValuesView[str]:
+        """Return a view of the contents in path order."""
+        return _RecordValues(self)
+
+
+class LazyContents(Mapping[str, str]):
+    """Mapping that reads file contents on access."""
+
+    def __init__(self, read: ContentReader):
+        """Initialize an empty mapping.
+
+        Args:
+            read: Function returning a file's content, or None if unreadable
+        """
+        self._read = read
+        self._stats: Dict[str, FileStat] = {}
+
+    def add(self, path: str, stat: FileStat) -> None:
+        """Register a file.
+
+        Args:
+            path: Absolute file path
+            stat: Stat metadata of the file
+        """
+        self._stats[path] = stat
+
+    def stat(self, path: str) -> FileStat:
+        """Return the stat metadata recorded for a file.
+
+        Args:
+            path: Absolute file path
+
+        Returns:
+            FileStat: Size and mtime at collection time
+        """
+        return self._stats[path]
+
+    def __getitem__(self, path: str) -> str:
+        """Return the content of a file."""
+        if path not in self._stats:
+            raise KeyError(path)
+        content = self._read(path)
+        if content is None:
+            raise KeyError(path)
+        return content
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the file paths in collection order."""
+        return iter(self._stats)
+
+    def __len__(self) -> int:
+        """Return the number of files."""
+        return len(self._stats)
+
+    def __contains__(self, path: object) -> bool:
+        """Return True if a file was collected."""
+        return path in self._stats
+
+    def items(self) -> ItemsView[str, str]:
+        """Return a view of the readable (path, content) pairs."""
+        return _ReadableItems(self)
+
+    def values(self) -> ValuesView[str]:
+        """Return a view of the readable contents."""
+        return _ReadableValues(self)
+
+
+class SpilledContents(Mapping[str, str]):
+    """Mapping holding contents in memory up to a budget and on disk beyond it.
+
+    Call ``finish()`` after the last ``add()`` and ``close()`` (or use the
+    mapping as a context manager) to release the temporary file.
+    """
+
+    def __init__(self, memory_budget: int):
+        """Initialize an empty mapping.
+
+        Args:
+            memory_budget: Maximum number of UTF-8 content bytes kept in memory
+
+        Raises:
+            ValueError: If the budget is negative
+        """
+        if memory_budget < 0:
+            raise ValueError(f"memory_budget must be >= 0, got {memory_budget}")
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        self.spilled_bytes = 0
+        # 文字列はメモリ上、(offset, length)は一時ファイル上の内容
+        self._entries: Dict[str, Union[str, Tuple[int, int]]] = {}
+        self._file = tempfile.TemporaryFile(prefix="promptgen-")
+        self._mmap: Optional[mmap.mmap] = None
+
+    def add(self, path: str, content: str) -> None:
+        """Store the content of a file.
+
+        Args:
+            path: Absolute file path
+            content: File content
+        """
+        data = content.encode("utf-8")
+        if self.memory_used + len(data) <= self.memory_budget:
+            self._entries[path] = content
+            self.memory_used += len(data)
+            return
+        self._file.write(data)
+        self._entries[path] = (self.spilled_bytes, len(data))
+        self.spilled_bytes += len(data)
+
+    def finish(self) -> None:
+        """Map the spill file into memory; no more files can be added."""
+        self._file.flush()
+        if self.spilled_bytes and self._mmap is None:
+            self._mmap = mmap.mmap(
+                self._file.fileno(), self.spilled_bytes, access=mmap.ACCESS_READ
+            )
+
+    def view(self, path: str) -> memoryview:
+        """Return the UTF-8 encoded content of a file without copying spilled data.
+
+        Args:
+            path: Absolute file path
+
+        Returns:
+            memoryview: Encoded content (a slice of the mapped spill file for
+                spilled files)
+        """
+        entry = self._entries[path]
+        if isinstance(entry, str):
+            return memoryview(entry.encode("utf-8"))
+        if self._mmap is None:
+            self.finish()
+        offset, length = entry
+        return memoryview(self._mmap)[offset : offset + length]
+
+    def is_spilled(self, path: str) -> bool:
+        """Return True if a file's content is stored on disk.
+
+        Args:
+            path: Absolute file path
+
+        Returns:
+            bool: Whether the content was spilled
+        """
+        return not isinstance(self._entries[path], str)
+
+    def __getitem__(self, path: str) -> str:
+        """Return the content of a file."""
+        entry = self._entries[path]
+        if isinstance(entry, str):
+            return entry
+        with self.view(path) as data:
+            return str(data, "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the file paths in collection order."""
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        """Return the number of files."""
+        return len(self._entries)
+
+    def __contains__(self, path: object) -> bool:
+        """Return True if a file was collected."""
+        return path in self._entries
+
+    def close(self) -> None:
+        """Release the memory map and delete the spill file.
+
+        Views returned by ``view()`` must be released first.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> "SpilledContents":
+        """Return the mapping for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Release the spill file."""
+        self.close()
@@ -0,0 +1,168 @@
+"""Stat-only size report of a prompt that has not been generated yet.
+
+The report is built from the filtered walk and ``st_size`` only; no file is
+opened. Token counts are estimated from byte sizes.
+"""
+
+import json
+import math
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from promptgen.tree import format_size
+
+# 英語・コードでの平均的な1トークンあたりのバイト数
+BYTES_PER_TOKEN = 4
+
+
+def estimate_tokens(size: int) -> int:
+    """Estimate the number of tokens of a text from its size.
+
+    Args:
+        size: Size in bytes
+
+    Returns:
+        int: Estimated token count
+    """
+    return math.ceil(size / BYTES_PER_TOKEN)
+
+
+@dataclass
+class SizeEntry:
+    """Size totals of a directory, file or pattern.
+
+    Attributes:
+        name: Relative path (``/`` separated) or pattern
+        files: Number of files
+        bytes: Total size in bytes
+        tokens: Estimated tokens
+    """
+
+    name: str
+    files: int = 0
+    bytes: int = 0
+    tokens: int = 0
+
+    def add(self, size: int) -> None:
+        """Add a file.
+
+        Args:
+            size: File size in bytes
+        """
+        self.files += 1
+        self.bytes += size
+        self.tokens = estimate_tokens(self.bytes)
+
+
+def _by_size(entry: SizeEntry) -> Tuple[int, str]:
+    """Sort key putting the largest entries first.
+
+    Args:
+        entry: Size entry
+
+    Returns:
+        Tuple[int, str]: Negated size and name
+    """
+    return -entry.bytes, entry.name
+
+
+@dataclass
+class DryRunReport:
+    """Totals and heaviest entries of the files a prompt would include.
+
+    Attributes:
+        files: Number of files
+        bytes: Total size in bytes
+        tokens: Estimated tokens
+        directories: Heaviest directories (subtree totals), largest first
+        largest_files: Largest files, largest first
+        patterns: Totals per file pattern (each file counts for the first
+            pattern it matches), largest first
+    """
+
+    files: int = 0
+    bytes: int = 0
+    tokens: int = 0
+    directories: List[SizeEntry] = field(default_factory=list)
+    largest_files: List[SizeEntry] = field(default_factory=list)
+    patterns: List[SizeEntry] = field(default_factory=list)
+
+    @classmethod
+    def from_sizes(
+        cls, entries: Iterable[Tuple[str, int, Optional[str]]], top: int = 10
+    ) -> "DryRunReport":
+        """Build a report from file sizes.
+
+        Args:
+            entries: Relative path (``/`` separated), size and matching pattern
+                of each file
+            top: Number of directories and files listed
+
+        Returns:
+            DryRunReport: Aggregated report
+        """
+        report = cls()
+        directories: Dict[str, SizeEntry] = {}
+        patterns: Dict[str, SizeEntry] = {}
+        files = []
+        for rel_path, size, pattern in entries:
+            report.files += 1
+            report.bytes += size
+            files.append(SizeEntry(rel_path, 1, size, estimate_tokens(size)))
+            parts = rel_path.split("/")[:-1]
+            for depth in range(1, len(parts) + 1):
+                directory = "/".join(parts[:depth]) + "/"
+                directories.setdefault(directory, SizeEntry(directory)).add(size)
+            if pattern is not None:
+                patterns.setdefault(pattern, SizeEntry(pattern)).add(size)
+
+        report.tokens = estimate_tokens(report.bytes)
+        report.directories = sorted(directories.values(), key=_by_size)[:top]
+        report.largest_files = sorted(files, key=_by_size)[:top]
+        report.patterns = sorted(patterns.values(), key=_by_size)
+        return report
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the report as a plain dictionary.
+
+        Returns:
+            Dict[str, Any]: JSON serialisable report
+        """
+        return asdict(self)
+
+    def to_json(self) -> str:
+        """Return the report as a JSON string.
+
+        Returns:
+            str: JSON encoded report
+        """
+        return json.dumps(self.to_dict(), indent=2)
+
+    def format(self) -> str:
+        """Return the report as human readable text.
+
+        Returns:
+            str: Report text
+        """
+        lines = [
+            f"Files: {self.files:,}",
+            f"Size: {format_size(self.bytes)} ({self.bytes:,} bytes)",
+            f"Estimated tokens: ~{self.tokens:,}",
+        ]
+        for title, entries in (
+            ("Heaviest directories", self.directories),
+            ("Largest files", self.largest_files),
+            ("Patterns", self.patterns),
+        ):
+            if not entries:
+                continue
+            lines.append("")
+            lines.append(f"{title}:")
+            width = max(len(entry.name) for entry in entries)
+            for entry in entries:
+                unit = "file" if entry.files == 1 else "files"
+                lines.append(
+                    f"  {entry.name:<{width}}  {entry.files:>7,} {unit:<5}  "
+                    f"{format_size(entry.bytes):>10}  ~{entry.tokens:,} tokens"
+                )
+        return "\n".join(lines)
@@ -15,3 +15,11 @@ class GitignoreError(PromptgenError):
 
 class PatternError(PromptgenError):
     """Raised when there is an error with file patterns."""
+
+
+class ServerError(PromptgenError):
+    """Raised when the prompt server reports an error."""
+
+
+class ConfigError(PromptgenError):
+    """Raised when a configuration file is missing or invalid."""
@@ -0,0 +1,230 @@
+"""Windowed extraction of the first and last lines of large files.
+
+Extraction policies select files with the same pattern syntax as the file
+patterns and keep only a window of their lines::
+
+    *.log: head=200,tail=50
+    fixtures/**/*.json: head=100
+
+The head is read forward and the tail is found by scanning backwards from the
+end of the file in blocks, so the amount of I/O depends on the window and not
+on the file size. The omitted middle is replaced by an elision marker with the
+number of omitted bytes and an estimate of the omitted lines (counting them
+exactly would require reading the middle).
+"""
+
+import os
+from dataclasses import dataclass
+from typing import BinaryIO, List, Optional, Tuple
+
+from promptgen.exceptions import PatternError
+from promptgen.patterns import FileMatcher
+
+# 読み込みブロックは最初は小さく、行が見つからなければ上限まで倍増させる
+INITIAL_BLOCK_SIZE = 4 * 1024
+BLOCK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class ExtractPolicy:
+    """Line window kept for matching files.
+
+    Attributes:
+        head: Number of leading lines to keep
+        tail: Number of trailing lines to keep
+    """
+
+    head: int = 0
+    tail: int = 0
+
+    def __post_init__(self) -> None:
+        """Validate the window."""
+        if self.head < 0 or self.tail < 0:
+            raise ValueError(f"Line counts must be >= 0: {self}")
+        if not (self.head or self.tail):
+            raise ValueError("An extraction policy needs head or tail lines")
+
+
+def parse_extract_spec(spec: str) -> Tuple[str, ExtractPolicy]:
+    """Parse a ``PATTERN: head=N,tail=M`` extraction policy.
+
+    Args:
+        spec: Policy specification
+
+    Returns:
+        Tuple[str, ExtractPolicy]: File pattern and its policy
+
+    Raises:
+        PatternError: If the specification is malformed
+    """
+    pattern, separator, options = spec.rpartition(":")
+    pattern = pattern.strip()
+    if not separator or not pattern:
+        raise PatternError(f"Invalid extraction policy (expected PATTERN: ...): {spec}")
+    values = {}
+    for option in options.split(","):
+        key, _, value = option.strip().partition("=")
+        if key not in ("head", "tail") or not value.strip().isdigit():
+            raise PatternError(
+                f"Invalid extraction option {option.strip()!r} in {spec}"
+            )
+        values[key] = int(value)
+    try:
+        return pattern, ExtractPolicy(**values)
+    except ValueError as e:
+        raise PatternError(f"Invalid extraction policy {spec}: {e}")
+
+
+class ExtractionRules:
+    """Ordered extraction policies; the first matching pattern wins."""
+
+    def __init__(self, policies: List[Tuple[str, ExtractPolicy]]):
+        """Compile the policy patterns.
+
+        Args:
+            policies: File patterns and their policies
+
+        Raises:
+            PatternError: If a pattern cannot be compiled
+        """
+        self.policies = [
+            (FileMatcher([pattern]), policy) for pattern, policy in policies
+        ]
+
+    def policy_for(self, rel_path: str) -> Optional[ExtractPolicy]:
+        """Return the policy of a file.
+
+        Args:
+            rel_path: Path relative to the base directory, ``/`` separated
+
+        Returns:
+            Optional[ExtractPolicy]: Policy of the first matching pattern, or
+                None if the whole file should be read
+        """
+        filename = rel_path.rsplit("/", 1)[-1]
+        for matcher, policy in self.policies:
+            if matcher.matches(rel_path, filename):
+                return policy
+        return None
+
+
+def _read_head(f: BinaryIO, lines: int, block_size: int) -> bytes:
+    """Read the first lines of a file.
+
+    Args:
+        f: File opened in binary mode, positioned at the start
+        lines: Number of lines to read
+        block_size: Maximum read size
+
+    Returns:
+        bytes: The lines including their terminators
+    """
+    chunks = []
+    count = 0
+    size = min(INITIAL_BLOCK_SIZE, block_size)
+    while count < lines:
+        block = f.read(size)
+        size = min(size * 2, block_size)
+        if not block:
+            break
+        start = 0
+        while count < lines:
+            index = block.find(b"\n", start)
+            if index == -1:
+                break
+            count += 1
+            start = index + 1
+        if count == lines:
+            chunks.append(block[:start])
+        else:
+            chunks.append(block)
+    return b"".join(chunks)
+
+
+def _read_tail(
+    f: BinaryIO, lines: int, size: int, floor: int, block_size: int
+) -> Tuple[bytes, int]:
+    """Read the last lines of a file by scanning backwards from its end.
+
+    Args:
+        f: File opened in binary mode
+        lines: Number of lines to read
+        size: File size in bytes
+        floor: Offset the scan must not go below
+        block_size: Maximum read size
+
+    Returns:
+        Tuple[bytes, int]: The lines (everything from ``floor`` if the file has
+            fewer) and the number of bytes read
+    """
+    chunks = []
+    count = 0
+    position = size
+    read_size = min(INITIAL_BLOCK_SIZE, block_size)
+    while position > floor:
+        start = max(floor, position - read_size)
+        read_size = min(read_size * 2, block_size)
+        f.seek(start)
+        block = f.read(position - start)
+        end = len(block)
+        # ファイル末尾の改行は最後の行の終端なので数えない
+        if position == size and block.endswith(b"\n"):
+            end -= 1
+        while True:
+            index = block.rfind(b"\n", 0, end)
+            if index == -1:
+                break
+            count += 1
+            if count == lines:
+                chunks.append(block[index + 1 :])
+                return b"".join(reversed(chunks)), size - start
+            end = index
+        chunks.append(block)
+        position = start
+    return b"".join(reversed(chunks)), size - position
+
+
+def elision_marker(omitted_bytes: int, omitted_lines: int) -> str:
+    """Return the marker replacing the omitted middle of a file.
+
+    Args:
+        omitted_bytes: Number of omitted bytes
+        omitted_lines: Estimated number of omitted lines
+
+    Returns:
+        str: Marker line
+    """
+    return f"[... 約{omitted_lines:,}行（{omitted_bytes:,}バイト）省略 ...]\n"
+
+
+def read_window(
+    f: BinaryIO, policy: ExtractPolicy, block_size: int = BLOCK_SIZE
+) -> Tuple[bytes, int]:
+    """Read the head and tail window of a file.
+
+    Args:
+        f: File opened in binary mode, positioned at the start
+        policy: Lines to keep
+        block_size: Maximum read size
+
+    Returns:
+        Tuple[bytes, int]: Window content (with an elision marker if lines
+            were omitted) and the number of bytes read from the file
+    """
+    size = os.fstat(f.fileno()).st_size
+    head = _read_head(f, policy.head, block_size) if policy.head else b""
+    bytes_read = f.tell()
+    floor = len(head)
+    tail = b""
+    if policy.tail:
+        tail, tail_read = _read_tail(f, policy.tail, size, floor, block_size)
+        bytes_read += tail_read
+    omitted = size - len(head) - len(tail)
+    if omitted <= 0:
+        return head + tail, bytes_read
+
+    # 省略部分の行数は読み込んだ範囲の平均行長から推定する
+    window_lines = head.count(b"\n") + tail.count(b"\n") or 1
+    estimate = max(1, round(omitted * window_lines / max(1, len(head) + len(tail))))
+    marker = elision_marker(omitted, estimate).encode("utf-8")
+    return head + marker + tail, bytes_read
@@ -0,0 +1,320 @@
+"""Several prompts of one directory from a single traversal.
+
+A fan-out configuration names outputs, each with its own patterns, excluded
+directories, format and output file::
+
+    dir = "."
+
+    [defaults]
+    exclude_dirs = ["node_modules"]
+
+    [[outputs]]
+    name = "backend"
+    patterns = [".py"]
+    output = "prompts/backend.txt"
+
+    [[outputs]]
+    name = "frontend"
+    patterns = [".ts", ".tsx", ".css"]
+    output = "prompts/frontend.jsonl"
+    format = "jsonl"
+
+Relative paths are resolved against the directory of the configuration file.
+The directory is walked once with the union of all patterns (only directories
+excluded by every output are pruned), the .gitignore rules are loaded once,
+and each selected file is read once; its content is routed to every output
+that selects it. The outputs are written side by side, so memory holds at most
+one file per output.
+"""
+
+import os
+from collections import deque
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    TextIO,
+    Tuple,
+)
+
+from promptgen.config import load_config, resolve_path
+from promptgen.exceptions import ConfigError
+from promptgen.formats import Section, get_formatter
+from promptgen.generator import PromptGenerator
+from promptgen.gitignore import GitignoreManager
+from promptgen.limits import Limits
+from promptgen.output import open_output
+from promptgen.progress import ProgressCallback
+from promptgen.stats import RunStats
+
+if TYPE_CHECKING:
+    from promptgen.redact import Redactor
+
+
+@dataclass
+class FanOutput:
+    """A named output of a fan-out run.
+
+    Attributes:
+        name: Output name used in reports
+        file_patterns: File patterns to include
+        output: Output file path
+        exclude_dirs: Directories to exclude
+        output_format: Output format (``text``, ``jsonl``, ``xml`` or
+            ``markdown``)
+    """
+
+    name: str
+    file_patterns: List[str]
+    output: str
+    exclude_dirs: List[str] = field(default_factory=list)
+    output_format: str = "text"
+
+
+def load_fanout_config(
+    path: str, default_patterns: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Load the directory and outputs of a fan-out configuration file.
+
+    Args:
+        path: Path to a TOML or JSON configuration
+        default_patterns: Patterns used when neither the output nor
+            ``defaults`` specify any
+
+    Returns:
+        Dict[str, Any]: ``{"dir": Optional[str], "outputs": List[FanOutput]}``
+
+    Raises:
+        ConfigError: If the configuration is invalid
+    """
+    config = load_config(path)
+    defaults = config.get("defaults", {})
+    raw_outputs = config.get("outputs")
+    if not isinstance(raw_outputs, list) or not raw_outputs:
+        raise ConfigError(f"No outputs defined in {path}")
+
+    outputs = []
+    for index, raw in enumerate(raw_outputs):
+        if not isinstance(raw, dict):
+            raise ConfigError(f"Output #{index + 1} in {path} must be a table/object")
+        if "output" not in raw:
+            raise ConfigError(f"Output #{index + 1} in {path} is missing 'output'")
+        patterns = raw.get("patterns", defaults.get("patterns", default_patterns))
+        outputs.append(
+            FanOutput(
+                name=str(raw.get("name", raw["output"])),
+                file_patterns=list(patterns or []),
+                output=resolve_path(raw["output"], path),
+                exclude_dirs=list(
+                    raw.get("exclude_dirs", defaults.get("exclude_dirs", []))
+                ),
+                output_format=str(raw.get("format", defaults.get("format", "text"))),
+            )
+        )
+    base_dir = config.get("dir")
+    return {
+        "dir": resolve_path(base_dir, path) if base_dir is not None else None,
+        "outputs": outputs,
+    }
+
+
+class _Feed:
+    """Section iterator of one output, filled by the fan-out loop."""
+
+    def __init__(self) -> None:
+        self.pending: Deque[Section] = deque()
+        self.closed = False
+
+    def __iter__(self) -> "_Feed":
+        return self
+
+    def __next__(self) -> Section:
+        if self.pending:
+            return self.pending.popleft()
+        if self.closed:
+            raise StopIteration
+        raise RuntimeError("Formatter requested a section before it was routed")
+
+
+class FanOut:
+    """Write several prompts of one directory from a single walk and read."""
+
+    def __init__(
+        self,
+        base_dir: str,
+        outputs: List[FanOutput],
+        progress: Optional[ProgressCallback] = None,
+        gitignore_manager: Optional[GitignoreManager] = None,
+        follow_symlinks: bool = False,
+        extract: Optional[List[str]] = None,
+        redactor: Optional["Redactor"] = None,
+        limits: Optional[Limits] = None,
+    ):
+        """Prepare the shared walk and the selection of every output.
+
+        Args:
+            base_dir: Base directory to search
+            outputs: Outputs to write
+            progress: Callback receiving throttled progress events of the walk
+            gitignore_manager: Existing manager for the same base directory
+            follow_symlinks: Descend into symlinked directories
+            extract: Extraction policies applied to every output
+            redactor: Redactor applied to every output
+            limits: Limits of the shared run; a truncated run ends every
+                output with a notice
+
+        Raises:
+            NotADirectoryError: If base_dir does not exist
+            ValueError: If there are no outputs, an output has no patterns,
+                names are repeated or a format is unknown
+        """
+        if not outputs:
+            raise ValueError("At least one output must be specified")
+        names = [output.name for output in outputs]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Output names must be unique: {', '.join(names)}")
+        for output in outputs:
+            if not output.file_patterns:
+                raise ValueError(f"Output {output.name} has no file patterns")
+            get_formatter(output.output_format)
+        self.outputs = list(outputs)
+
+        # 全出力のパターンの和で一度だけ走査し、全出力が除外するものだけを刈り込む
+        patterns = list(
+            dict.fromkeys(p for output in outputs for p in output.file_patterns)
+        )
+        common_excludes = [
+            excluded
+            for excluded in outputs[0].exclude_dirs
+            if all(excluded in output.exclude_dirs for output in outputs[1:])
+        ]
+        self.generator = PromptGenerator(
+            base_dir,
+            patterns,
+            common_excludes,
+            progress=progress,
+            gitignore_manager=gitignore_manager,
+            follow_symlinks=follow_symlinks,
+            extract=extract,
+            redactor=redactor,
+            limits=limits,
+        )
+        # 各出力の選択条件（.gitignoreルールは共有の走査で適用済み）
+        self._selectors = [
+            self.generator.with_options(output.file_patterns, output.exclude_dirs)
+            for output in outputs
+        ]
+
+    @property
+    def stats(self) -> RunStats:
+        """Statistics of the last run in the current thread."""
+        return self.generator.stats
+
+    def route(self) -> Dict[str, List[str]]:
+        """List the files of every output without reading them.
+
+        Returns:
+            Dict[str, List[str]]: Sorted absolute paths per output name
+        """
+        routed: Dict[str, List[str]] = {output.name: [] for output in self.outputs}
+        for file_path, _rel_path, targets in self._routes():
+            for index in targets:
+                routed[self.outputs[index].name].append(file_path)
+        return routed
+
+    def _routes(self) -> List[Tuple[str, str, List[int]]]:
+        """Walk once and find the outputs selecting each file.
+
+        Returns:
+            List[Tuple[str, str, List[int]]]: Absolute path, relative path and
+                output indexes of each file selected by at least one output
+        """
+        base_dir = self.generator.base_dir
+        routes = []
+        for file_path in self.generator.list_files():
+            rel_path = os.path.relpath(file_path, base_dir).replace(os.sep, "/")
+            targets = [
+                index
+                for index, selector in enumerate(self._selectors)
+                if selector.selects(rel_path)
+            ]
+            if targets:
+                routes.append((file_path, rel_path, targets))
+        return routes
+
+    def write(self, streams: Mapping[str, TextIO]) -> Dict[str, int]:
+        """Write every output to its stream.
+
+        Args:
+            streams: Writable text stream per output name
+
+        Returns:
+            Dict[str, int]: Number of files written per output name
+
+        Raises:
+            KeyError: If a stream is missing for an output
+        """
+        outputs = self.outputs
+        targets = [streams[output.name] for output in outputs]
+        routes = self._routes()
+        stats = self.generator.stats
+
+        def truncated() -> Optional[str]:
+            return stats.truncated
+
+        feeds = [_Feed() for _ in outputs]
+        pieces: List[Iterator[str]] = [
+            get_formatter(output.output_format)(feed, truncated=truncated)
+            for output, feed in zip(outputs, feeds)
+        ]
+        counts = [0] * len(outputs)
+
+        def pump(index: int) -> None:
+            # 渡したファイルを形式が受け取るまで書き出す（末尾の断片は次回に回る）
+            feed = feeds[index]
+            stream = targets[index]
+            while feed.pending:
+                stream.write(next(pieces[index]))
+
+        route_of = {file_path: (rel, indexes) for file_path, rel, indexes in routes}
+        for file_path, content in self.generator.iter_files(route_of):
+            rel_path, indexes = route_of[file_path]
+            for index in indexes:
+                feeds[index].pending.append((rel_path, content))
+                counts[index] += 1
+                pump(index)
+        for feed, stream, piece_iter in zip(feeds, targets, pieces):
+            feed.closed = True
+            for piece in piece_iter:
+                stream.write(piece)
+        return {output.name: count for output, count in zip(outputs, counts)}
+
+    def run(self, compress_level: Optional[int] = None) -> Dict[str, int]:
+        """Write every output to its file.
+
+        Missing parent directories are created; outputs ending in ``.gz``,
+        ``.xz`` or ``.bz2`` are compressed while written.
+
+        Args:
+            compress_level: Compression level of compressed outputs
+
+        Returns:
+            Dict[str, int]: Number of files written per output name
+        """
+        with ExitStack() as stack:
+            streams = {}
+            for output in self.outputs:
+                output_dir = os.path.dirname(output.output)
+                if output_dir:
+                    os.makedirs(output_dir, exist_ok=True)
+                streams[output.name] = stack.enter_context(
+                    open_output(output.output, compress_level)
+                )
+            return self.write(streams)
@@ -0,0 +1,286 @@
+"""Merkle tree fingerprint of a selected file set.
+
+The fingerprint identifies the files a prompt is built from, independent of
+the machine and checkout location: leaves are the SHA-256 of each file's
+content, and every directory hashes the sorted entries below it like a git
+tree object::
+
+    <mode> <name> NUL <32-byte digest>   (mode 100644, 100755 or 40000)
+
+so the root hash changes if and only if a selected path, its executable bit
+or its content changes, and comparing subtree hashes top-down pinpoints what
+changed. Directories without selected files do not appear.
+
+Content hashes are cached in an SQLite database keyed by path and stat
+signature (size and mtime), so fingerprinting an unchanged tree only stats
+the files. The fingerprint covers the file set only; options such as the
+output format must be part of a cache key separately.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import stat
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from promptgen.cache import project_cache_dir
+
+_SCHEMA_VERSION = "1"
+_FILE_MODE = "100644"
+_EXECUTABLE_MODE = "100755"
+_DIRECTORY_MODE = "40000"
+# 一度に読み込むバイト数
+_CHUNK_SIZE = 1024 * 1024
+
+
+class HashCache:
+    """SQLite cache of file content hashes keyed by stat signature."""
+
+    def __init__(self, path: str):
+        """Open or create a cache.
+
+        All entries are loaded at once; new and changed entries are written
+        back when the cache is closed.
+
+        Args:
+            path: Path of the SQLite database file (``:memory:`` for a
+                temporary cache)
+        """
+        self.path = path
+        self.hashed = 0
+        self._conn = sqlite3.connect(path)
+        self._create_schema()
+        self._entries: Dict[str, Tuple[int, int, str]] = {
+            row[0]: (row[1], row[2], row[3])
+            for row in self._conn.execute(
+                "SELECT path, size, mtime_ns, sha256 FROM files"
+            )
+        }
+        self._dirty: Dict[str, Tuple[int, int, str]] = {}
+
+    @classmethod
+    def for_project(cls, base_dir: str) -> "HashCache":
+        """Open the cache stored in a project's cache directory.
+
+        Args:
+            base_dir: Project base directory
+
+        Returns:
+            HashCache: Opened cache
+        """
+        return cls(os.path.join(project_cache_dir(base_dir), "hashes.sqlite3"))
+
+    def _create_schema(self) -> None:
+        """Create the table, discarding a cache with another schema."""
+        conn = self._conn
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is not None and row[0] != _SCHEMA_VERSION:
+            conn.execute("DROP TABLE IF EXISTS files")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+            (_SCHEMA_VERSION,),
+        )
+        conn.commit()
+
+    def sha256(self, file_path: str, st: os.stat_result) -> str:
+        """Return the content hash of a file, reading it only on a cache miss.
+
+        Args:
+            file_path: Absolute path of the file
+            st: Current stat result of the file
+
+        Returns:
+            str: Hex SHA-256 of the content
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+        entry = self._entries.get(file_path)
+        if entry is not None and entry[:2] == (st.st_size, st.st_mtime_ns):
+            return entry[2]
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        self.hashed += 1
+        entry = (st.st_size, st.st_mtime_ns, digest.hexdigest())
+        self._entries[file_path] = self._dirty[file_path] = entry
+        return entry[2]
+
+    def close(self) -> None:
+        """Write new entries and close the database connection."""
+        if self._dirty:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256) "
+                "VALUES (?, ?, ?, ?)",
+                [(path, *entry) for path, entry in self._dirty.items()],
+            )
+            self._dirty = {}
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self) -> "HashCache":
+        """Return the cache for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the cache."""
+        self.close()
+
+
+@dataclass
+class Fingerprint:
+    """Merkle tree hashes of a file set.
+
+    Attributes:
+        root: Hex hash of the whole file set
+        directories: Hex hash of each directory containing selected files,
+            keyed by relative path (``""`` for the base directory)
+        files: Hex content SHA-256 of each file, keyed by relative path
+        modes: Git-style mode (``100644`` or ``100755``) of each file
+    """
+
+    root: str
+    directories: Dict[str, str] = field(default_factory=dict)
+    files: Dict[str, str] = field(default_factory=dict)
+    modes: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_files(cls, files: Iterable[Tuple[str, str, str]]) -> "Fingerprint":
+        """Build the tree hashes from file hashes.
+
+        Args:
+            files: Relative path (``/`` separated), mode and hex content hash
+                of each file
+
+        Returns:
+            Fingerprint: Hashes of the file set
+        """
+        fingerprint = cls("")
+        children: Dict[str, List[Tuple[str, str, str]]] = {"": []}
+        for rel_path, mode, sha256 in files:
+            fingerprint.files[rel_path] = sha256
+            fingerprint.modes[rel_path] = mode
+            parent, _, name = rel_path.rpartition("/")
+            children.setdefault(parent, []).append((name, mode, sha256))
+            # 親ディレクトリを根まで登録する
+            while parent and parent not in fingerprint.directories:
+                fingerprint.directories[parent] = ""
+                grandparent, _, dir_name = parent.rpartition("/")
+                children.setdefault(grandparent, []).append(
+                    (dir_name, _DIRECTORY_MODE, parent)
+                )
+                parent = grandparent
+
+        def tree_hash(directory: str) -> str:
+            digest = hashlib.sha256()
+            for name, mode, value in sorted(children.get(directory, [])):
+                if mode == _DIRECTORY_MODE:
+                    value = tree_hash(value)
+                digest.update(f"{mode} {name}".encode("utf-8") + b"\0")
+                digest.update(bytes.fromhex(value))
+            fingerprint.directories[directory] = digest.hexdigest()
+            return fingerprint.directories[directory]
+
+        fingerprint.root = tree_hash("")
+        return fingerprint
+
+    def subtree(self, rel_path: str) -> Optional[str]:
+        """Return the hash of a directory or file.
+
+        Args:
+            rel_path: Relative path, ``/`` separated (``""`` for the root)
+
+        Returns:
+            Optional[str]: Hex hash, or None if the path is not in the set
+        """
+        rel_path = rel_path.strip("/")
+        return self.directories.get(rel_path) or self.files.get(rel_path)
+
+    def diff(self, other: "Fingerprint") -> List[str]:
+        """List the paths that differ from another fingerprint.
+
+        Only directories whose hashes differ are descended into.
+
+        Args:
+            other: Fingerprint to compare with
+
+        Returns:
+            List[str]: Sorted relative paths of files added, removed or
+                changed (content or mode)
+        """
+        if self.root == other.root:
+            return []
+        mine, theirs = self._children(), other._children()
+        changed = []
+        pending = [""]
+        while pending:
+            directory = pending.pop()
+            for path in set(mine.get(directory, ())) | set(theirs.get(directory, ())):
+                if path in self.directories or path in other.directories:
+                    if self.directories.get(path) != other.directories.get(path):
+                        pending.append(path)
+                    # ファイルとディレクトリが入れ替わった場合
+                    if path in self.files or path in other.files:
+                        changed.append(path)
+                elif (self.files.get(path), self.modes.get(path)) != (
+                    other.files.get(path),
+                    other.modes.get(path),
+                ):
+                    changed.append(path)
+        return sorted(changed)
+
+    def _children(self) -> Dict[str, List[str]]:
+        """Index the files and subdirectories by parent directory.
+
+        Returns:
+            Dict[str, List[str]]: Relative paths of the direct entries of each
+                directory
+        """
+        children: Dict[str, List[str]] = {}
+        for paths in (self.files, self.directories):
+            for path in paths:
+                if path:
+                    children.setdefault(path.rpartition("/")[0], []).append(path)
+        return children
+
+    def to_dict(self) -> Dict[str, object]:
+        """Return the fingerprint as a plain dictionary.
+
+        Returns:
+            Dict[str, object]: JSON serialisable fingerprint
+        """
+        return asdict(self)
+
+    def to_json(self) -> str:
+        """Return the fingerprint as a JSON string.
+
+        Returns:
+            str: JSON encoded fingerprint
+        """
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+
+def file_mode(st: os.stat_result) -> str:
+    """Return the git-style mode of a regular file.
+
+    Args:
+        st: Stat result of the file
+
+    Returns:
+        str: ``100755`` if the owner may execute the file, ``100644`` otherwise
+    """
+    return _EXECUTABLE_MODE if st.st_mode & stat.S_IXUSR else _FILE_MODE
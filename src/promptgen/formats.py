@@ -0,0 +1,269 @@
+"""Prompt output formats.
+
+Each format is a generator function turning ``(relative_path, content)`` pairs
+and an optional directory tree overview into consecutive pieces of output
+text, so prompts can be written without buffering:
+
+- ``text``: the original ``=== path ===`` sections
+- ``jsonl``: one JSON record per file with path, size, SHA-256 and content
+- ``xml``: ``<file>`` elements with escaped content inside a ``<files>`` root;
+  content with characters XML 1.0 cannot represent (C0 controls other than
+  tab, newline and carriage return) is base64 encoded and marked with
+  ``encoding="base64"``
+- ``markdown``: ``##`` headings with fences longer than any backtick run in
+  the content
+
+Formatters accept an optional ``mark`` callback, called with the relative path
+and content of each file right before the piece holding its encoded content is
+yielded; the table of contents uses it to record byte offsets. The optional
+``truncated`` callback is called after the last file and returns the name of
+the limit that cut the run short, if any; the prompt then ends with a notice.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+Section = Tuple[str, str]
+# 各ファイルの内容を出力する直前に (相対パス, 内容) で呼ばれる
+ContentMark = Callable[[str, str], None]
+# 最後のファイルの後に呼ばれ、打ち切りの理由（上限の名前）を返す
+TruncationCheck = Callable[[], Optional[str]]
+Formatter = Callable[..., Iterator[str]]
+
+PROMPT_HEADER = "以下のプロジェクトファイルを確認してください：\n\n"
+EMPTY_MESSAGE = "対象となるファイルが見つかりませんでした。"
+TREE_TITLE = "ディレクトリ構成"
+TRUNCATION_NOTICE = "[出力は上限（{reason}）に達したため途中で打ち切られています]"
+
+# 既定の設定ではCエンコーダが使われる
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+_XML_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}
+# XML 1.0では文字参照でも表せない文字
+_XML_INVALID = "\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff"
+_XML_SPECIAL = re.compile(f'[&<>"{_XML_INVALID}]')
+_XML_INVALID_CHAR = re.compile(f"[{_XML_INVALID}]")
+_BACKTICK_RUN = re.compile(r"`{3,}")
+
+
+def _xml_escape(text: str) -> str:
+    """Escape XML special characters in a single pass.
+
+    Characters XML 1.0 cannot represent are replaced by U+FFFD.
+
+    Args:
+        text: Text to escape
+
+    Returns:
+        str: Escaped text
+    """
+    return _XML_SPECIAL.sub(lambda m: _XML_ESCAPES.get(m.group(), "\ufffd"), text)
+
+
+def _fence_for(content: str) -> str:
+    """Return a backtick fence longer than any backtick run in the content.
+
+    Args:
+        content: Fenced content
+
+    Returns:
+        str: Fence of at least three backticks
+    """
+    longest = max((len(run) for run in _BACKTICK_RUN.findall(content)), default=2)
+    return "`" * (longest + 1)
+
+
+def _digest(content: str) -> Tuple[int, str]:
+    """Return the UTF-8 size and SHA-256 of a file's content.
+
+    Args:
+        content: File content
+
+    Returns:
+        Tuple[int, str]: Size in bytes and hex digest
+    """
+    data = content.encode("utf-8")
+    return len(data), hashlib.sha256(data).hexdigest()
+
+
+def format_text(
+    sections: Iterable[Section],
+    tree: Optional[str] = None,
+    mark: Optional[ContentMark] = None,
+    truncated: Optional[TruncationCheck] = None,
+) -> Iterator[str]:
+    """Render sections in the plain text format.
+
+    Args:
+        sections: Relative paths and contents in output order
+        tree: Directory tree overview placed before the files
+        mark: Callback announcing the piece holding each file's content
+        truncated: Callback returning the limit that truncated the run
+
+    Yields:
+        str: Pieces of the prompt
+    """
+    empty = True
+    for relative_path, content in sections:
+        if empty:
+            yield PROMPT_HEADER
+            if tree:
+                yield f"=== {TREE_TITLE} ===\n{tree}\n"
+            empty = False
+        yield f"=== {relative_path} ===\n"
+        if mark is not None:
+            mark(relative_path, content)
+        yield content
+        yield "\n\n"
+    if empty:
+        yield EMPTY_MESSAGE
+    reason = truncated() if truncated is not None else None
+    if reason:
+        yield ("\n" if empty else "") + TRUNCATION_NOTICE.format(reason=reason) + "\n"
+
+
+def format_jsonl(
+    sections: Iterable[Section],
+    tree: Optional[str] = None,
+    mark: Optional[ContentMark] = None,
+    truncated: Optional[TruncationCheck] = None,
+) -> Iterator[str]:
+    """Render sections as JSON lines.
+
+    Args:
+        sections: Relative paths and contents in output order
+        tree: Directory tree overview placed before the files
+        mark: Callback announcing the piece holding each file's content
+        truncated: Callback returning the limit that truncated the run
+
+    Yields:
+        str: One JSON record per file, newline terminated
+    """
+    encode = _JSON_ENCODER.encode
+    if tree:
+        yield encode({"tree": tree})
+        yield "\n"
+    for relative_path, content in sections:
+        size, sha256 = _digest(content)
+        # 内容の文字列リテラルを独立した断片として出力する
+        head = encode({"path": relative_path, "size": size, "sha256": sha256})
+        yield head[:-1] + ',"content":'
+        if mark is not None:
+            mark(relative_path, content)
+        yield encode(content)
+        yield "}\n"
+    reason = truncated() if truncated is not None else None
+    if reason:
+        yield encode({"truncated": reason})
+        yield "\n"
+
+
+def format_xml(
+    sections: Iterable[Section],
+    tree: Optional[str] = None,
+    mark: Optional[ContentMark] = None,
+    truncated: Optional[TruncationCheck] = None,
+) -> Iterator[str]:
+    """Render sections as XML.
+
+    Args:
+        sections: Relative paths and contents in output order
+        tree: Directory tree overview placed before the files
+        mark: Callback announcing the piece holding each file's content
+        truncated: Callback returning the limit that truncated the run
+
+    Yields:
+        str: Pieces of the XML document
+    """
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<files>\n'
+    if tree:
+        yield f"<tree>{_xml_escape(tree)}</tree>\n"
+    for relative_path, content in sections:
+        size, sha256 = _digest(content)
+        # 制御文字を含む内容は失わないようにbase64で埋め込む
+        encoded = _XML_INVALID_CHAR.search(content) is not None
+        yield (
+            f'<file path="{_xml_escape(relative_path)}" size="{size}" '
+            f'sha256="{sha256}"' + (' encoding="base64">' if encoded else ">")
+        )
+        if mark is not None:
+            mark(relative_path, content)
+        if encoded:
+            yield base64.b64encode(content.encode("utf-8")).decode("ascii")
+        else:
+            yield _xml_escape(content)
+        yield "</file>\n"
+    reason = truncated() if truncated is not None else None
+    if reason:
+        yield f'<truncated reason="{_xml_escape(reason)}"/>\n'
+    yield "</files>\n"
+
+
+def format_markdown(
+    sections: Iterable[Section],
+    tree: Optional[str] = None,
+    mark: Optional[ContentMark] = None,
+    truncated: Optional[TruncationCheck] = None,
+) -> Iterator[str]:
+    """Render sections as Markdown with fenced code blocks.
+
+    Args:
+        sections: Relative paths and contents in output order
+        tree: Directory tree overview placed before the files
+        mark: Callback announcing the piece holding each file's content
+        truncated: Callback returning the limit that truncated the run
+
+    Yields:
+        str: Pieces of the Markdown document
+    """
+    empty = True
+    for relative_path, content in sections:
+        if empty:
+            yield PROMPT_HEADER
+            if tree:
+                tree_fence = _fence_for(tree)
+                yield f"## {TREE_TITLE}\n\n{tree_fence}\n{tree}{tree_fence}\n\n"
+            empty = False
+        fence = _fence_for(content)
+        language = os.path.splitext(relative_path)[1].lstrip(".")
+        yield f"## {relative_path}\n\n{fence}{language}\n"
+        if mark is not None:
+            mark(relative_path, content)
+        yield content
+        yield f"\n{fence}\n\n" if not content.endswith("\n") else f"{fence}\n\n"
+    if empty:
+        yield EMPTY_MESSAGE
+    reason = truncated() if truncated is not None else None
+    if reason:
+        yield ("\n" if empty else "") + TRUNCATION_NOTICE.format(reason=reason) + "\n"
+
+
+FORMATS: Dict[str, Formatter] = {
+    "text": format_text,
+    "jsonl": format_jsonl,
+    "xml": format_xml,
+    "markdown": format_markdown,
+}
+
+
+def get_formatter(name: str) -> Formatter:
+    """Return the formatter of an output format.
+
+    Args:
+        name: Format name (see ``FORMATS``)
+
+    Returns:
+        Formatter: Formatter function
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    try:
+        return FORMATS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown output format: {name} (choose from {', '.join(FORMATS)})"
+        )
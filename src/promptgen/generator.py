@@ -1,30 +1,91 @@
 """File collection and prompt generation module."""
 
 import os
-from typing import Dict, List, Optional
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    TextIO,
+    Tuple,
+)
 
-from promptgen.gitignore import GitignoreManager
+from promptgen.extract import (
+    ExtractionRules,
+    ExtractPolicy,
+    parse_extract_spec,
+    read_window,
+)
+from promptgen.formats import ContentMark, Formatter, get_formatter
+from promptgen.gitignore import GitignoreManager, unvisited_dirs
+from promptgen.limits import Limits, LimitTracker
+from promptgen.logging import LOGGER
+from promptgen.patterns import FileMatcher, compile_globs, is_glob
+from promptgen.progress import ProgressCallback, ProgressReporter
+from promptgen.stats import RunStats
+
+if TYPE_CHECKING:
+    from promptgen.contents import CompactContents, LazyContents, SpilledContents
+    from promptgen.dryrun import DryRunReport
+    from promptgen.fingerprint import Fingerprint
+    from promptgen.redact import Redactor
+    from promptgen.toc import TableOfContents
+    from promptgen.tree import TreeOptions
 
 
 class PromptGenerator:
-    """Generator for creating AI prompts from project files."""
+    """Generator for creating AI prompts from project files.
+
+    A generator can be shared by threads: the loaded .gitignore rules are kept
+    in the ``GitignoreManager``, and the statistics and aliases of a run are
+    kept per thread. Call ``refresh`` to pick up .gitignore changes and
+    ``with_options`` for other patterns or excludes over the same rules.
+    """
 
     def __init__(
         self,
         base_dir: str,
         file_patterns: List[str],
         exclude_dirs: Optional[List[str]] = None,
+        progress: Optional[ProgressCallback] = None,
+        gitignore_manager: Optional[GitignoreManager] = None,
+        follow_symlinks: bool = False,
+        extract: Optional[List[str]] = None,
+        redactor: Optional["Redactor"] = None,
+        limits: Optional[Limits] = None,
     ):
         """Initialize the prompt generator.
 
         Args:
             base_dir: Base directory to search.
-            file_patterns: List of file patterns to include.
-            exclude_dirs: List of directories to exclude.
+            file_patterns: List of file patterns to include (names, suffixes
+                or gitwildmatch-style globs such as ``src/**/*.py``).
+            exclude_dirs: List of directories to exclude (paths or globs).
+            progress: Callback receiving throttled progress events.
+            gitignore_manager: Existing manager for the same base directory to
+                share loaded .gitignore rules with other generators.
+            follow_symlinks: Descend into symlinked directories. Each physical
+                directory is walked and each physical file is read once; other
+                paths to the same directory or file are recorded in
+                ``self.aliases`` under the path that was used.
+            extract: Extraction policies such as ``*.log: head=200,tail=50``;
+                files matching a policy pattern are read only within their
+                head/tail line window (the first matching policy wins).
+            redactor: Redactor replacing secrets in every file as it is read.
+            limits: File count, byte, depth and time limits of each run; a run
+                reaching one stops early, records the reason in
+                ``stats.truncated`` and ends the prompt with a notice.
 
         Raises:
             NotADirectoryError: If base_dir does not exist or is not a directory.
-            ValueError: If file_patterns is empty.
+            ValueError: If file_patterns is empty or gitignore_manager belongs
+                to another base directory.
+            PatternError: If a glob pattern or extraction policy is invalid.
         """
         if not os.path.isdir(base_dir):
             raise NotADirectoryError(f"Directory not found: {base_dir}")
@@ -34,30 +95,198 @@ class PromptGenerator:
         self.base_dir = os.path.abspath(base_dir)
         self.file_patterns = file_patterns
         self.exclude_dirs = exclude_dirs or []
-        self.gitignore_manager = GitignoreManager(self.base_dir)
+        self.matcher = FileMatcher(file_patterns)
+        self._excluded_paths = [
+            excluded.replace("\\", "/").rstrip("/") for excluded in self.exclude_dirs
+        ]
+        self._exclude_globs = compile_globs(
+            [excluded for excluded in self.exclude_dirs if is_glob(excluded)],
+            subtree=True,
+        )
+        self.progress = progress
+        self.follow_symlinks = follow_symlinks
+        self.redactor = redactor
+        self.limits = limits
+        self.extract_rules: Optional[ExtractionRules] = None
+        if extract:
+            self.extract_rules = ExtractionRules(
+                [parse_extract_spec(spec) for spec in extract]
+            )
+        # 実行ごとの統計・エイリアスはスレッドごとに保持する
+        self._local = threading.local()
+        if gitignore_manager is None:
+            gitignore_manager = GitignoreManager(self.base_dir, follow_symlinks)
+        elif gitignore_manager.base_dir != self.base_dir:
+            raise ValueError(
+                f"GitignoreManager base directory {gitignore_manager.base_dir} "
+                f"does not match {self.base_dir}"
+            )
+        self.gitignore_manager = gitignore_manager
+        self._extract = extract
 
-    def should_skip_path(self, path: str) -> bool:
-        """Determine if a path should be skipped.
+    @property
+    def stats(self) -> RunStats:
+        """Statistics of the last run on the calling thread."""
+        stats = getattr(self._local, "stats", None)
+        if stats is None:
+            stats = self._local.stats = RunStats()
+        return stats
+
+    @stats.setter
+    def stats(self, stats: RunStats) -> None:
+        self._local.stats = stats
+
+    @property
+    def aliases(self) -> Dict[str, List[str]]:
+        """Aliases found by the last walk on the calling thread."""
+        aliases = getattr(self._local, "aliases", None)
+        if aliases is None:
+            aliases = self._local.aliases = {}
+        return aliases
+
+    @aliases.setter
+    def aliases(self, aliases: Dict[str, List[str]]) -> None:
+        self._local.aliases = aliases
+
+    @property
+    def _tracker(self) -> LimitTracker:
+        """Limit tracker of the current run on the calling thread."""
+        tracker = getattr(self._local, "tracker", None)
+        if tracker is None or tracker.stats is not self.stats:
+            tracker = self._local.tracker = LimitTracker(self.limits, self.stats)
+        return tracker
+
+    @property
+    def _reporter(self) -> Optional[ProgressReporter]:
+        """Progress reporter of the current run on the calling thread."""
+        if self.progress is None:
+            return None
+        reporter = getattr(self._local, "reporter", None)
+        if reporter is None or reporter.stats is not self.stats:
+            reporter = self._local.reporter = ProgressReporter(
+                self.progress, self.stats
+            )
+        return reporter
+
+    def _start_run(self) -> None:
+        """Reset the statistics and start the limits of a new run."""
+        self.stats = RunStats()
+        self._local.tracker = LimitTracker(self.limits, self.stats)
+        self._local.reporter = None
+
+    def _finish_progress(self) -> None:
+        """Emit the final progress event of the current run."""
+        reporter = self._reporter
+        if reporter is not None:
+            reporter.finish()
+
+    def refresh(self, paths: Optional[Iterable[str]] = None) -> List[str]:
+        """Pick up .gitignore changes without walking the whole tree again.
+
+        Args:
+            paths: .gitignore files or directories (absolute or relative to
+                the base directory) to reload. If omitted, changed .gitignore
+                files and directories are detected with ``stat`` calls only.
+
+        Returns:
+            Sorted directories whose .gitignore rules changed.
+        """
+        return self.gitignore_manager.refresh(paths)
+
+    def with_options(
+        self,
+        file_patterns: Optional[List[str]] = None,
+        exclude_dirs: Optional[List[str]] = None,
+    ) -> "PromptGenerator":
+        """Return a generator with other options sharing the loaded rules.
+
+        Args:
+            file_patterns: File patterns (defaults to this generator's).
+            exclude_dirs: Excluded directories (defaults to this generator's).
+
+        Returns:
+            A new generator over the same ``GitignoreManager``.
+
+        Raises:
+            ValueError: If file_patterns is empty.
+            PatternError: If a glob pattern is invalid.
+        """
+        return PromptGenerator(
+            self.base_dir,
+            self.file_patterns if file_patterns is None else file_patterns,
+            self.exclude_dirs if exclude_dirs is None else exclude_dirs,
+            progress=self.progress,
+            gitignore_manager=self.gitignore_manager,
+            follow_symlinks=self.follow_symlinks,
+            extract=self._extract,
+            redactor=self.redactor,
+            limits=self.limits,
+        )
+
+    def _skip_reason(self, path: str) -> Optional[str]:
+        """Return the reason a path should be skipped.
 
         Args:
             path: Path to check.
 
         Returns:
-            True if the path should be skipped.
+            ``"ignored"`` or ``"excluded"``, or None if the path is kept.
         """
         # .gitignoreルールのチェック
         if self.gitignore_manager.is_ignored(path):
-            return True
+            return "ignored"
 
         # 除外ディレクトリのチェック
-        rel_path = os.path.relpath(path, self.base_dir)
-        return any(
-            rel_path == excluded
-            or rel_path.startswith(f"{excluded}/")
-            or rel_path.startswith(f"{excluded}\\")
-            for excluded in self.exclude_dirs
+        rel_path = os.path.relpath(path, self.base_dir).replace(os.sep, "/")
+        if self._is_excluded(rel_path):
+            return "excluded"
+        return None
+
+    def _is_excluded(self, rel_path: str) -> bool:
+        """Determine if a path is inside an excluded directory.
+
+        Args:
+            rel_path: Path relative to the base directory, ``/`` separated.
+
+        Returns:
+            True if the path matches an excluded path or glob.
+        """
+        if any(
+            rel_path == excluded or rel_path.startswith(f"{excluded}/")
+            for excluded in self._excluded_paths
+        ):
+            return True
+        return self._exclude_globs is not None and bool(
+            self._exclude_globs.fullmatch(rel_path)
         )
 
+    def selects(self, rel_path: str) -> bool:
+        """Check a file against the file patterns and excluded directories.
+
+        .gitignore rules are not consulted.
+
+        Args:
+            rel_path: Path relative to the base directory, ``/`` separated.
+
+        Returns:
+            True if the file matches a pattern and is not excluded.
+        """
+        filename = rel_path.rsplit("/", 1)[-1]
+        return self.matcher.matches(rel_path, filename) and not self._is_excluded(
+            rel_path
+        )
+
+    def should_skip_path(self, path: str) -> bool:
+        """Determine if a path should be skipped.
+
+        Args:
+            path: Path to check.
+
+        Returns:
+            True if the path should be skipped.
+        """
+        return self._skip_reason(path) is not None
+
     def should_include_file(self, filename: str) -> bool:
         """Determine if a file should be included.
 
@@ -67,66 +296,901 @@ class PromptGenerator:
         Returns:
             True if the file should be included.
         """
-        # 完全なファイル名のマッチング
-        if filename in self.file_patterns:
-            return True
+        # 完全なファイル名・拡張子・globのマッチング
+        return self.matcher.matches(filename)
 
-        # 拡張子のマッチング
-        return any(filename.endswith(pattern) for pattern in self.file_patterns)
+    def _filter_names(
+        self, dir_rel: str, names: List[str], directories: bool = False
+    ) -> List[str]:
+        """Drop the ignored and excluded entries of a directory listing.
 
-    def collect_files(self) -> Dict[str, str]:
-        """Collect files matching the specified patterns.
+        Args:
+            dir_rel: Directory relative to the base directory, ``/`` separated.
+            names: Entry names in the directory.
+            directories: The names are subdirectories; skipped directories are
+                counted as pruned by the caller instead of as skipped files.
 
         Returns:
-            Dictionary mapping file paths to their contents.
+            The kept names, in their original order.
         """
-        collected_files = {}
-
-        for root, dirs, files in os.walk(self.base_dir):
-            # 除外すべきディレクトリを削除
-            dirs[:] = [
-                d for d in dirs if not self.should_skip_path(os.path.join(root, d))
+        if not names:
+            return names
+        stats = self.stats
+        start = time.perf_counter()
+        # .gitignoreルールは一覧ごとに一括で照合する
+        kept = self.gitignore_manager.filter(dir_rel, names, directories)
+        ignored = len(names) - len(kept)
+        excluded = 0
+        if self.exclude_dirs:
+            prefix = f"{dir_rel}/" if dir_rel else ""
+            not_excluded = [
+                name for name in kept if not self._is_excluded(prefix + name)
             ]
+            excluded = len(kept) - len(not_excluded)
+            kept = not_excluded
+        stats.ignore_checks += len(names)
+        stats.add_time("ignore", time.perf_counter() - start)
+        if not directories:
+            if ignored:
+                stats.skip("ignored", ignored)
+            if excluded:
+                stats.skip("excluded", excluded)
+        return kept
+
+    def _extract_policy(self, file_path: str) -> Optional[ExtractPolicy]:
+        """Return the extraction policy of a file.
+
+        Args:
+            file_path: Absolute path of the file.
+
+        Returns:
+            The policy of the first matching pattern, or None to read the
+            whole file.
+        """
+        rel_path = os.path.relpath(file_path, self.base_dir).replace(os.sep, "/")
+        return self.extract_rules.policy_for(rel_path)
+
+    def _read_file(self, file_path: str) -> Optional[str]:
+        """Read and decode a single file, recording read statistics.
+
+        Args:
+            file_path: Path of the file to read.
+
+        Returns:
+            The decoded file content, or None if the file could not be read.
+        """
+        stats = self.stats
+        policy = self._extract_policy(file_path) if self.extract_rules else None
+        start = time.perf_counter()
+        try:
+            with open(file_path, "rb") as f:
+                if policy is None:
+                    data = f.read()
+                    size = len(data)
+                else:
+                    data, size = read_window(f, policy)
+        except Exception as e:
+            stats.add_time("read", time.perf_counter() - start)
+            stats.skip("read_error")
+            LOGGER.warning("Error reading file %s: %s", file_path, e)
+            return None
+        decode_start = time.perf_counter()
+        stats.add_time("read", decode_start - start)
+        stats.bytes_read += size
+
+        try:
+            content = data.decode("utf-8")
+        except UnicodeDecodeError as e:
+            stats.add_time("decode", time.perf_counter() - decode_start)
+            stats.skip("decode_error")
+            LOGGER.warning("Error reading file %s: %s", file_path, e)
+            return None
+        # テキストモードと同じく改行コードを統一する
+        if "\r" in content:
+            content = content.replace("\r\n", "\n").replace("\r", "\n")
+        redact_start = time.perf_counter()
+        stats.add_time("decode", redact_start - decode_start)
+        if self.redactor is not None:
+            content, counts = self.redactor.redact(content, file_path)
+            if counts:
+                stats.redacted(counts)
+            stats.add_time("redact", time.perf_counter() - redact_start)
+        stats.files_read += 1
+        reporter = self._reporter
+        if reporter is not None:
+            reporter.update()
+        return content
+
+    def _walk(self) -> Iterator[str]:
+        """Walk the base directory and yield the paths of selected files.
+
+        Directories are pruned by .gitignore rules, excluded directories and
+        glob prefixes; files are filtered by the file patterns. Counters are
+        recorded in ``self.stats``; no file is read. When following symlinks,
+        aliases of already visited directories and files are collected in
+        ``self.aliases``.
+
+        Yields:
+            Absolute paths of files matching the patterns.
+        """
+        stats = self.stats
+        matcher = self.matcher
+        reporter = self._reporter
+        follow = self.follow_symlinks
+        visited_dirs: Dict[Tuple[int, int], str] = {}
+        seen_files: Dict[Tuple[int, int], str] = {}
+        self.aliases = {}
+
+        tracker = self._tracker
+        for root, dirs, files in os.walk(self.base_dir, followlinks=follow):
+            if tracker.expired():
+                return
+            stats.entries_visited += len(dirs) + len(files)
+            rel_root = os.path.relpath(root, self.base_dir).replace(os.sep, "/")
+            prefix = "" if rel_root == "." else rel_root + "/"
+            dir_rel = prefix[:-1]
+
+            # 除外すべきディレクトリ・パターンに一致し得ないディレクトリを削除
+            kept_dirs = self._filter_names(
+                dir_rel,
+                [d for d in dirs if matcher.could_match_below(prefix + d)],
+                directories=True,
+            )
+            if kept_dirs and tracker.too_deep(prefix.count("/")):
+                tracker.stop("max_depth")
+                kept_dirs = []
+            if follow:
+                # 同じ物理ディレクトリ（循環リンクを含む）は一度だけ走査する
+                kept_dirs = unvisited_dirs(root, kept_dirs, visited_dirs, self.aliases)
+                files = sorted(files)
+            stats.dirs_pruned += len(dirs) - len(kept_dirs)
+            dirs[:] = kept_dirs
+            if reporter is not None:
+                reporter.dir_entered(len(kept_dirs))
 
+            # ファイル名・拡張子・globのチェック（安価なので先に行う）
+            matched = []
             for file in files:
+                rel_path = prefix + file if matcher.needs_path else file
+                if matcher.matches(rel_path, file):
+                    matched.append(file)
+                else:
+                    stats.skip("pattern")
+
+            # 残ったファイルを.gitignore・除外ディレクトリで一括して絞り込む
+            for file in self._filter_names(dir_rel, matched):
                 file_path = os.path.join(root, file)
+                if follow:
+                    # 同じ物理ファイルは最初のパスでだけ読み込む
+                    try:
+                        st = os.stat(file_path)
+                    except OSError:
+                        pass
+                    else:
+                        key = (st.st_dev, st.st_ino)
+                        canonical = seen_files.setdefault(key, file_path)
+                        if canonical != file_path:
+                            self.aliases.setdefault(canonical, []).append(file_path)
+                            stats.skip("alias")
+                            continue
+
+                # 上限に達したら走査を打ち切る
+                if tracker.files_full() or tracker.expired():
+                    return
+                stats.files_matched += 1
+                yield file_path
+
+    def _finish_walk_timing(self, start: float) -> None:
+        """Record the walk time as the elapsed time minus the other phases.
+
+        Args:
+            start: ``time.perf_counter()`` value at the start of the run.
+        """
+        timings = self.stats.timings
+        elapsed = time.perf_counter() - start
+        self.stats.add_time(
+            "walk",
+            elapsed
+            - timings["ignore"]
+            - timings["read"]
+            - timings["decode"]
+            - timings["redact"],
+        )
+
+    def collect_files(
+        self, lazy: bool = False, memory_budget: Optional[int] = None
+    ) -> Mapping[str, str]:
+        """Collect files matching the specified patterns.
+
+        Statistics for the run are available afterwards in ``self.stats``.
+
+        Args:
+            lazy: Return a ``LazyContents`` mapping that records only paths and
+                stat metadata and reads a file whenever its content is accessed.
+            memory_budget: Keep at most this many bytes of content in memory and
+                spill the rest to a temporary file; returns a
+                ``SpilledContents`` mapping that should be closed after use.
+
+        Returns:
+            Mapping of file paths to their contents; by default a mutable
+            ``CompactContents`` mapping over file records sorted by path (not
+            a ``dict``; ``dict(files)`` makes a copy).
+
+        Raises:
+            ValueError: If both ``lazy`` and ``memory_budget`` are given.
+        """
+        if lazy and memory_budget is not None:
+            raise ValueError("lazy and memory_budget cannot be combined")
+        self._start_run()
+        start = time.perf_counter()
+
+        if lazy:
+            collected: Mapping[str, str] = self._collect_lazy()
+        elif memory_budget is not None:
+            collected = self._collect_spilled(memory_budget)
+        else:
+            collected = self._collect_compact()
+
+        # walkの時間は他のフェーズを除いた純粋な走査時間
+        self._finish_walk_timing(start)
+        self._finish_progress()
+        return collected
+
+    def _collect_compact(self) -> "CompactContents":
+        """Read the selected files into compact records sorted by path.
+
+        Returns:
+            Mapping of absolute paths to contents over the records.
+        """
+        from promptgen.contents import CompactContents
+
+        contents = CompactContents(self.base_dir)
+        stats = self.stats
+        bytes_before = stats.bytes_read
+        for file_path, content in self._iter_read(self._walk()):
+            contents.add(file_path, content, stats.bytes_read - bytes_before)
+            bytes_before = stats.bytes_read
+        contents.finish()
+        return contents
+
+    def _collect_lazy(self) -> "LazyContents":
+        """Record the selected files and their stat metadata without reading them.
+
+        Returns:
+            Mapping that reads file contents on access.
+        """
+        from promptgen.contents import FileStat, LazyContents
+
+        contents = LazyContents(self._read_file)
+        tracker = self._tracker
+        total = 0
+        for file_path in self._walk():
+            try:
+                st = os.stat(file_path)
+            except OSError as e:
+                self.stats.skip("read_error")
+                LOGGER.warning("Error reading file %s: %s", file_path, e)
+                continue
+            # 内容は読まないので、サイズの合計で上限を判定する
+            total += st.st_size
+            if tracker.over_bytes(total):
+                self.stats.skip("max_total_bytes")
+                break
+            contents.add(file_path, FileStat(st.st_size, st.st_mtime_ns))
+        return contents
+
+    def _collect_spilled(self, memory_budget: int) -> "SpilledContents":
+        """Read the selected files, spilling contents beyond a memory budget.
+
+        Args:
+            memory_budget: Maximum number of content bytes kept in memory.
+
+        Returns:
+            Mapping backed by memory and a memory-mapped spill file.
+        """
+        from promptgen.contents import SpilledContents
+
+        contents = SpilledContents(memory_budget)
+        try:
+            for file_path, content in self._iter_read(self._walk()):
+                contents.add(file_path, content)
+            contents.finish()
+        except BaseException:
+            contents.close()
+            raise
+        return contents
+
+    def list_files(self) -> List[str]:
+        """List the files that ``collect_files`` would read, without reading them.
+
+        The run continues when the listed files are read (``iter_files``,
+        ``write_prompt``), which delivers the final progress event.
+
+        Returns:
+            Sorted absolute paths of the selected files.
+        """
+        self._start_run()
+        start = time.perf_counter()
+        paths = sorted(self._walk())
+        self._finish_walk_timing(start)
+        return paths
+
+    def files_from(self, paths: Iterable[str], filters: bool = True) -> List[str]:
+        """Select files from a precomputed path list instead of walking.
+
+        Listings such as ``git ls-files`` or a build graph replace the
+        traversal; no directory is listed. The file count and time limits
+        apply, the depth limit does not.
+
+        Args:
+            paths: File paths, absolute or relative to the base directory.
+                Duplicates and paths outside the base directory are dropped.
+            filters: Apply the file patterns, excluded directories and
+                .gitignore rules; if False, every path is taken as is.
+
+        Returns:
+            Sorted absolute paths of the selected files, ready for
+            ``read_files`` or the ``paths`` argument of ``write_prompt``.
+        """
+        self._start_run()
+        start = time.perf_counter()
+        selected = sorted(self._iter_listed(paths, filters))
+        self._finish_walk_timing(start)
+        return selected
 
-                # パスをスキップすべきかチェック
-                if self.should_skip_path(file_path):
+    def _iter_listed(self, paths: Iterable[str], filters: bool) -> Iterator[str]:
+        """Yield the selected files of a path list (see ``files_from``).
+
+        Args:
+            paths: File paths, absolute or relative to the base directory.
+            filters: Apply the file patterns, excludes and .gitignore rules.
+
+        Yields:
+            Absolute paths of the selected files.
+        """
+        stats = self.stats
+        matcher = self.matcher
+        tracker = self._tracker
+        base_dir = self.base_dir
+        prefix = os.path.join(base_dir, "")
+        seen = set()
+        # ディレクトリごとにまとめて.gitignore・除外ディレクトリで絞り込む
+        by_dir: Dict[str, List[str]] = {}
+        for path in paths:
+            if not path:
+                continue
+            file_path = os.path.normpath(os.path.join(base_dir, path))
+            if file_path in seen:
+                continue
+            seen.add(file_path)
+            stats.entries_visited += 1
+            if not file_path.startswith(prefix):
+                stats.skip("outside")
+                continue
+            rel_path = file_path[len(prefix) :].replace(os.sep, "/")
+            dir_rel, _, filename = rel_path.rpartition("/")
+            if filters and not matcher.matches(rel_path, filename):
+                stats.skip("pattern")
+                continue
+            by_dir.setdefault(dir_rel, []).append(filename)
+
+        for dir_rel, names in by_dir.items():
+            if tracker.expired():
+                return
+            if filters:
+                names = self._filter_names(dir_rel, names)
+            directory = os.path.join(base_dir, *dir_rel.split("/"))
+            for filename in names:
+                # 上限に達したら選択を打ち切る
+                if tracker.files_full():
+                    return
+                stats.files_matched += 1
+                yield os.path.join(directory, filename)
+
+    def dry_run(
+        self, top: int = 10, paths: Optional[Iterable[str]] = None
+    ) -> "DryRunReport":
+        """Report what ``collect_files`` would include without reading any file.
+
+        Only the filtered walk and one ``stat`` per selected file are
+        performed.
+
+        Args:
+            top: Number of heaviest directories and files to report.
+            paths: Absolute paths to report instead of walking the base
+                directory (e.g. the result of ``files_from``).
+
+        Returns:
+            Report of file counts, sizes and estimated tokens.
+        """
+        from promptgen.dryrun import DryRunReport
+
+        if paths is None:
+            self._start_run()
+        start = time.perf_counter()
+        base_dir = self.base_dir
+        matchers = [(pattern, FileMatcher([pattern])) for pattern in self.file_patterns]
+        entries = []
+        for file_path in self._walk() if paths is None else paths:
+            try:
+                size = os.stat(file_path).st_size
+            except OSError:
+                self.stats.skip("read_error")
+                continue
+            rel_path = os.path.relpath(file_path, base_dir).replace(os.sep, "/")
+            filename = os.path.basename(file_path)
+            # 最初に一致したパターンに計上する
+            pattern = next(
+                (p for p, matcher in matchers if matcher.matches(rel_path, filename)),
+                None,
+            )
+            entries.append((rel_path, size, pattern))
+        if paths is None:
+            self._finish_walk_timing(start)
+        self._finish_progress()
+        return DryRunReport.from_sizes(entries, top)
+
+    def read_files(self, paths: List[str]) -> Dict[str, str]:
+        """Read a given list of files.
+
+        The file, byte and time limits of the current run apply.
+
+        Args:
+            paths: Absolute paths of the files to read.
+
+        Returns:
+            Dictionary mapping file paths to their contents.
+        """
+        return dict(self._iter_read(paths))
+
+    def search_files(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        index_path: Optional[str] = None,
+    ) -> List[str]:
+        """Select the files most relevant to a query.
+
+        The selected files are ranked with BM25 against a persistent inverted
+        index in the project cache directory. The index is updated first, which
+        only re-reads files whose size or mtime changed.
+
+        Args:
+            query: Free text query (identifiers are split on case and ``_``).
+            top_k: Maximum number of files to return.
+            max_bytes: Maximum total size of the returned files.
+            index_path: Index database path (default: project cache directory).
+
+        Returns:
+            Absolute paths of the selected files, most relevant first.
+        """
+        from promptgen.index import SearchIndex, select_within_budget
+
+        paths = self.list_files()
+        index = (
+            SearchIndex(index_path)
+            if index_path
+            else SearchIndex.for_project(self.base_dir)
+        )
+        with index:
+            index.update(self.base_dir, paths, self._read_file)
+            results = select_within_budget(index.search(query), top_k, max_bytes)
+        return [
+            os.path.join(self.base_dir, *result.path.split("/")) for result in results
+        ]
+
+    def dependency_closure(
+        self, entries: List[str], cache_path: Optional[str] = None
+    ) -> List[str]:
+        """Select the files reachable from entry points through local imports.
+
+        Python imports are parsed with ``ast`` and JavaScript/TypeScript
+        imports with a lightweight scanner; imports are resolved against the
+        project tree, and ignored or excluded files are not followed. Import
+        lists are cached by content hash in the project cache directory.
+        Entries that are not source files (such as configuration files) are
+        included as they are.
+
+        Args:
+            entries: Entry files, absolute or relative to the base directory.
+            cache_path: Import cache database path (default: project cache
+                directory).
+
+        Returns:
+            Sorted absolute paths of the entries and their transitive imports.
+
+        Raises:
+            FileNotFoundError: If an entry file does not exist.
+        """
+        from promptgen.deps import ImportCache, dependency_closure
+
+        entry_paths = []
+        for entry in entries:
+            entry_path = os.path.abspath(os.path.join(self.base_dir, entry))
+            if not os.path.isfile(entry_path):
+                raise FileNotFoundError(f"Entry point not found: {entry}")
+            entry_paths.append(entry_path)
+
+        cache = (
+            ImportCache(cache_path)
+            if cache_path
+            else ImportCache.for_project(self.base_dir)
+        )
+        with cache:
+            return dependency_closure(
+                entry_paths, self.base_dir, cache, skip=self.should_skip_path
+            )
+
+    def fingerprint(
+        self,
+        paths: Optional[Iterable[str]] = None,
+        cache_path: Optional[str] = None,
+    ) -> "Fingerprint":
+        """Compute a Merkle tree fingerprint of the selected files.
+
+        Directories hash their sorted entries (relative names, modes and
+        content hashes), so equal root hashes on two machines mean the same
+        file set with the same contents. Content hashes are cached by stat
+        signature in the project cache directory, so an unchanged tree is
+        only stat-ed.
+
+        Args:
+            paths: Absolute paths to fingerprint instead of walking the base
+                directory (e.g. the result of ``files_from``).
+            cache_path: Hash cache database path (default: project cache
+                directory).
+
+        Returns:
+            Root, directory and file hashes of the selection.
+        """
+        from promptgen.fingerprint import Fingerprint, HashCache, file_mode
+
+        selected = self.list_files() if paths is None else sorted(paths)
+        stats = self.stats
+        base_dir = self.base_dir
+        cache = HashCache(cache_path) if cache_path else HashCache.for_project(base_dir)
+        files = []
+        with cache:
+            start = time.perf_counter()
+            for file_path in selected:
+                try:
+                    st = os.stat(file_path)
+                    sha256 = cache.sha256(file_path, st)
+                except OSError as e:
+                    stats.skip("read_error")
+                    LOGGER.warning("Error reading file %s: %s", file_path, e)
                     continue
+                rel_path = os.path.relpath(file_path, base_dir).replace(os.sep, "/")
+                files.append((rel_path, file_mode(st), sha256))
+            stats.add_time("read", time.perf_counter() - start)
+        self._finish_progress()
+        return Fingerprint.from_files(files)
 
-                # ファイル名または拡張子チェック
-                if self.should_include_file(file):
-                    try:
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            content = f.read()
-                            collected_files[file_path] = content
-                    except Exception as e:
-                        print(f"Error reading file {file_path}: {str(e)}")
+    def iter_files(self, paths: Iterable[str]) -> Iterator[Tuple[str, str]]:
+        """Read files one at a time, as the streaming writer does.
 
-        return collected_files
+        The file, byte and time limits of the current run apply.
 
-    def generate_prompt(self, files_content: Dict[str, str]) -> str:
-        """Generate an AI prompt from the collected files.
+        Args:
+            paths: Absolute paths of the files to read.
+
+        Returns:
+            Iterator over file paths and contents; unreadable files are
+            skipped.
+        """
+        return self._iter_read(paths)
+
+    def _iter_read(self, paths: Iterable[str]) -> Iterator[Tuple[str, str]]:
+        """Read files one at a time within the file, byte and time limits.
+
+        Only the bytes read here count toward the byte limit, so reads done
+        earlier in the run (such as updating the search index) do not use it
+        up. The file limit also applies to paths that were not selected by
+        the walk, such as dependency closures and search results.
 
         Args:
-            files_content: Dictionary mapping file paths to their contents.
+            paths: Absolute paths of the files to read.
+
+        Yields:
+            Tuples of file path and content; unreadable files are skipped.
+        """
+        stats = self.stats
+        tracker = self._tracker
+        bytes_before = stats.bytes_read
+        count = 0
+        try:
+            for file_path in paths:
+                if tracker.expired() or tracker.files_full(count):
+                    break
+                content = self._read_file(file_path)
+                if content is None:
+                    continue
+                if tracker.over_bytes(stats.bytes_read - bytes_before):
+                    # 上限を超えたファイルは含めずに読み込みを打ち切る
+                    stats.files_read -= 1
+                    stats.skip("max_total_bytes")
+                    break
+                count += 1
+                yield file_path, content
+        finally:
+            # 読み込みが実行の最後の段階なので、最終イベントはここで送る
+            self._finish_progress()
+
+    @staticmethod
+    def _iter_mapping(
+        files_content: Mapping[str, str], paths: List[str]
+    ) -> Iterator[Tuple[str, str]]:
+        """Yield (path, content) pairs of a mapping in the given order.
+
+        Contents are fetched one at a time, so lazy and spilled mappings never
+        load more than one file at once.
+
+        Args:
+            files_content: Mapping of file paths to their contents.
+            paths: Keys of the mapping in output order.
+
+        Yields:
+            Tuples of file path and content; unreadable files are skipped.
+        """
+        for file_path in paths:
+            content = files_content.get(file_path)
+            if content is not None:
+                yield file_path, content
+
+    def _relative(self, items: Iterator[Tuple[str, str]]) -> Iterator[Tuple[str, str]]:
+        """Convert (absolute path, content) pairs to relative paths.
+
+        Args:
+            items: File paths and contents in output order.
+
+        Yields:
+            Tuples of path relative to the base directory and content.
+        """
+        base_dir = self.base_dir
+        for file_path, content in items:
+            yield os.path.relpath(file_path, base_dir), content
+
+    def _render(
+        self,
+        sections: Iterator[Tuple[str, str]],
+        formatter: Formatter,
+        tree: Optional[str] = None,
+        mark: Optional[ContentMark] = None,
+    ) -> Iterator[str]:
+        """Render sorted (relative path, content) pairs into prompt pieces.
+
+        Args:
+            sections: Relative file paths and contents in output order.
+            formatter: Output format function.
+            tree: Directory tree overview placed before the files.
+            mark: Callback announcing the piece holding each file's content.
 
         Returns:
-            Generated prompt text.
+            Iterator over consecutive pieces of the prompt text.
         """
+        stats = self.stats
+        return formatter(sections, tree, mark=mark, truncated=lambda: stats.truncated)
+
+    def _render_tree(
+        self,
+        paths: List[str],
+        files_content: Optional[Mapping[str, str]],
+        options: "TreeOptions",
+    ) -> Optional[str]:
+        """Render the directory tree overview of the selected files.
+
+        Only the already known paths are used. Sizes are shown when the
+        contents are in memory or their stat metadata was recorded; in
+        streaming mode files have not been read yet, so only counts are shown.
+
+        Args:
+            paths: Sorted absolute paths of the selected files.
+            files_content: Mapping of file paths to their contents, if known.
+            options: Tree options.
+
+        Returns:
+            Tree text, or None if there are no files.
+        """
+        from promptgen.contents import LazyContents
+        from promptgen.tree import render_tree
+
+        if not paths:
+            return None
+        base_dir = self.base_dir
+        rel_paths = [
+            os.path.relpath(path, base_dir).replace(os.sep, "/") for path in paths
+        ]
+        sizes = None
+        if options.stats and files_content is not None:
+            if isinstance(files_content, LazyContents):
+                sizes = {
+                    rel: files_content.stat(path).size
+                    for rel, path in zip(rel_paths, paths)
+                }
+            else:
+                sizes = {
+                    rel: len(files_content.get(path, "").encode("utf-8"))
+                    for rel, path in zip(rel_paths, paths)
+                }
+        return render_tree(rel_paths, sizes, options)
+
+    @staticmethod
+    def _render_compact_tree(
+        files_content: "CompactContents", options: "TreeOptions"
+    ) -> Optional[str]:
+        """Render the directory tree overview of collected file records.
+
+        Sizes are the numbers of bytes read from disk.
+
+        Args:
+            files_content: Collected file records.
+            options: Tree options.
+
+        Returns:
+            Tree text, or None if there are no files.
+        """
+        from promptgen.tree import render_tree
+
         if not files_content:
-            return "対象となるファイルが見つかりませんでした。"
+            return None
+        rel_path = files_content.rel_path
+        rel_paths = [rel_path(record) for record in files_content.records]
+        sizes = None
+        if options.stats:
+            sizes = {
+                path: record.size
+                for path, record in zip(rel_paths, files_content.records)
+            }
+        return render_tree(rel_paths, sizes, options)
 
-        prompt = "以下のプロジェクトファイルを確認してください：\n\n"
+    def iter_prompt(
+        self,
+        files_content: Optional[Mapping[str, str]] = None,
+        output_format: str = "text",
+        tree: Optional["TreeOptions"] = None,
+        paths: Optional[Iterable[str]] = None,
+    ) -> Iterator[str]:
+        """Yield the prompt text piece by piece.
 
-        # ファイルパスでソート
-        sorted_files = sorted(files_content.items(), key=lambda x: x[0])
+        Args:
+            files_content: Mapping of file paths to their contents. If
+                omitted, the selected files are listed and then read one at a
+                time, so at most one file is held in memory.
+            output_format: Output format (``text``, ``jsonl``, ``xml`` or
+                ``markdown``).
+            tree: Options of a directory tree overview rendered before the
+                files (no overview if omitted).
+            paths: Absolute paths read one at a time instead of walking the
+                base directory (e.g. the result of ``files_from``); ignored if
+                ``files_content`` is given.
 
-        for file_path, content in sorted_files:
-            relative_path = os.path.relpath(file_path, self.base_dir)
-            prompt += f"=== {relative_path} ===\n"
-            prompt += content
-            prompt += "\n\n"
+        Returns:
+            Iterator over consecutive pieces of the prompt text.
 
-        return prompt
+        Raises:
+            ValueError: If the output format is unknown.
+        """
+        return self._prompt_pieces(files_content, output_format, tree, paths=paths)
+
+    def _prompt_pieces(
+        self,
+        files_content: Optional[Mapping[str, str]],
+        output_format: str,
+        tree: Optional["TreeOptions"],
+        mark: Optional[ContentMark] = None,
+        paths: Optional[Iterable[str]] = None,
+    ) -> Iterator[str]:
+        """Yield the prompt text piece by piece (see ``iter_prompt``).
+
+        Args:
+            files_content: Mapping of file paths to their contents, or None to
+                read the selected files while rendering.
+            output_format: Output format.
+            tree: Options of a directory tree overview.
+            mark: Callback announcing the piece holding each file's content.
+            paths: Files to read instead of walking the base directory.
+
+        Returns:
+            Iterator over consecutive pieces of the prompt text.
+
+        Raises:
+            ValueError: If the output format is unknown.
+        """
+        from promptgen.contents import CompactContents
+
+        # 走査を始める前に形式名を検証する
+        formatter = get_formatter(output_format)
+        tree_text = None
+        if isinstance(files_content, CompactContents):
+            # 収集時にソート済みで、相対パスもレコードから得られる
+            if tree is not None:
+                tree_text = self._render_compact_tree(files_content, tree)
+            return self._render(files_content.sections(), formatter, tree_text, mark)
+        if files_content is None:
+            selected = self.list_files() if paths is None else sorted(paths)
+            items: Iterator[Tuple[str, str]] = self._iter_read(selected)
+        else:
+            # ファイルパスでソート
+            selected = sorted(files_content)
+            items = self._iter_mapping(files_content, selected)
+        if tree is not None:
+            tree_text = self._render_tree(selected, files_content, tree)
+        return self._render(self._relative(items), formatter, tree_text, mark)
+
+    def write_prompt(
+        self,
+        stream: TextIO,
+        files_content: Optional[Mapping[str, str]] = None,
+        output_format: str = "text",
+        tree: Optional["TreeOptions"] = None,
+        toc: Optional["TableOfContents"] = None,
+        paths: Optional[Iterable[str]] = None,
+    ) -> int:
+        """Write the prompt to a text stream section by section.
+
+        Args:
+            stream: Writable text stream.
+            files_content: Mapping of file paths to their contents. If
+                omitted, files are read while the prompt is written.
+            output_format: Output format (``text``, ``jsonl``, ``xml`` or
+                ``markdown``).
+            tree: Options of a directory tree overview rendered before the
+                files (no overview if omitted).
+            toc: Table of contents to fill with the byte offset, length and
+                SHA-256 of each file's content, counted from the start of the
+                prompt (its output format is set to ``output_format``).
+            paths: Absolute paths read while the prompt is written instead of
+                walking the base directory (e.g. the result of
+                ``files_from``); ignored if ``files_content`` is given.
+
+        Returns:
+            Number of files written.
+
+        Raises:
+            ValueError: If the output format is unknown.
+        """
+        mark = None
+        if toc is not None:
+            toc.output_format = output_format
+            mark = toc.mark
+        pieces = self._prompt_pieces(files_content, output_format, tree, mark, paths)
+        stats = self.stats
+        timings = stats.timings
+        io_before = timings["read"] + timings["decode"] + timings["redact"]
+        start = time.perf_counter()
+        if toc is None:
+            for piece in pieces:
+                stream.write(piece)
+        else:
+            for piece in pieces:
+                stream.write(piece)
+                toc.advance(piece)
+        # 読み込み時間を除いた整形・書き込み時間
+        io_time = timings["read"] + timings["decode"] + timings["redact"] - io_before
+        stats.add_time("render", time.perf_counter() - start - io_time)
+        return stats.files_read if files_content is None else len(files_content)
+
+    def generate_prompt(
+        self,
+        files_content: Mapping[str, str],
+        output_format: str = "text",
+        tree: Optional["TreeOptions"] = None,
+    ) -> str:
+        """Generate an AI prompt from the collected files.
+
+        Args:
+            files_content: Mapping of file paths to their contents.
+            output_format: Output format (``text``, ``jsonl``, ``xml`` or
+                ``markdown``).
+            tree: Options of a directory tree overview rendered before the
+                files (no overview if omitted).
+
+        Returns:
+            Generated prompt text.
+
+        Raises:
+            ValueError: If the output format is unknown.
+        """
+        with self.stats.phase("render"):
+            return "".join(self.iter_prompt(files_content, output_format, tree))
@@ -1,14 +1,17 @@
 """Gitignore handling module."""
 
 import os
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict
-
-import pathspec
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
 from promptgen.exceptions import GitignoreError
 from promptgen.logging import LOGGER
 
+if TYPE_CHECKING:  # pragma: no cover
+    import pathspec
+
 
 @dataclass
 class GitignoreRule:
@@ -19,7 +22,7 @@ class GitignoreRule:
         base_dir: Base directory for this rule set
     """
 
-    patterns: pathspec.PathSpec
+    patterns: "pathspec.PathSpec"
     base_dir: str
 
     def is_ignored(self, path: str) -> bool:
@@ -45,14 +48,154 @@ class GitignoreRule:
             raise GitignoreError(f"Error processing path {path}: {e}")
 
 
+SpecKey = Tuple[str, int, int, int, int]
+
+
+def unvisited_dirs(
+    root: str,
+    dirs: List[str],
+    visited: Dict[Tuple[int, int], str],
+    aliases: Optional[Dict[str, List[str]]] = None,
+) -> List[str]:
+    """Filter subdirectories down to physical directories not seen before.
+
+    Used with ``os.walk(followlinks=True)``: directories are identified by
+    ``(st_dev, st_ino)``, so a symlink back to an ancestor (a cycle) or a second
+    link to the same directory is not descended into again.
+
+    Args:
+        root: Directory currently being walked
+        dirs: Names of its subdirectories
+        visited: Identities of the visited directories mapped to the first
+            path they were seen at (updated)
+        aliases: If given, skipped paths are appended under that first path
+
+    Returns:
+        List[str]: Sorted names of the subdirectories to descend into
+    """
+    if not visited:
+        st = os.stat(root)
+        visited[(st.st_dev, st.st_ino)] = root
+    kept = []
+    for name in sorted(dirs):
+        path = os.path.join(root, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            # リンク切れのシンボリックリンク
+            continue
+        canonical = visited.setdefault((st.st_dev, st.st_ino), path)
+        if canonical == path:
+            kept.append(name)
+        elif aliases is not None:
+            aliases.setdefault(canonical, []).append(path)
+    return kept
+
+
+class GitignoreSpecCache:
+    """Thread-safe LRU cache of compiled .gitignore specs.
+
+    Entries are keyed by the absolute file path and its stat signature
+    (mtime, ctime, size and inode), so an edited file is recompiled while an
+    unchanged one is compiled only once per process.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of compiled specs kept
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[SpecKey, pathspec.PathSpec]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(path: str) -> SpecKey:
+        """Build the cache key of a file.
+
+        Args:
+            path: Path to the .gitignore file
+
+        Returns:
+            SpecKey: Absolute path and stat signature
+
+        Raises:
+            OSError: If the file cannot be stat'ed
+        """
+        st = os.stat(path)
+        return (
+            os.path.abspath(path),
+            st.st_mtime_ns,
+            st.st_ctime_ns,
+            st.st_size,
+            st.st_ino,
+        )
+
+    def get(self, key: SpecKey) -> "Optional[pathspec.PathSpec]":
+        """Return a cached spec and mark it as recently used.
+
+        Args:
+            key: Cache key from ``key_for``
+
+        Returns:
+            Optional[PathSpec]: The cached spec, or None on a miss
+        """
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return spec
+
+    def put(self, key: SpecKey, spec: "pathspec.PathSpec") -> None:
+        """Store a compiled spec, evicting the least recently used entries.
+
+        Args:
+            key: Cache key from ``key_for``
+            spec: Compiled spec
+        """
+        with self._lock:
+            self._entries[key] = spec
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached specs."""
+        return len(self._entries)
+
+
+# プロセス全体で共有するキャッシュ
+SPEC_CACHE = GitignoreSpecCache()
+
+
 class GitignoreManager:
-    """Manager for handling multiple .gitignore rules."""
+    """Manager for handling multiple .gitignore rules.
 
-    def __init__(self, base_dir: str):
+    The manager can be shared by threads. Lookups read the current rule table
+    without locking; ``refresh`` builds an updated table and swaps it in, so
+    readers see either the old or the new rules, never a partial update.
+    """
+
+    def __init__(self, base_dir: str, follow_symlinks: bool = False):
         """Initialize GitignoreManager.
 
         Args:
             base_dir: Base directory to start searching for .gitignore files
+            follow_symlinks: Descend into symlinked directories (each physical
+                directory is visited once, so link cycles are broken)
 
         Raises:
             GitignoreError: If the base directory does not exist
@@ -61,12 +204,20 @@ class GitignoreManager:
             raise GitignoreError(f"Base directory not found: {base_dir}")
 
         self.base_dir = base_dir
+        self.follow_symlinks = follow_symlinks
         self.rules_cache: Dict[str, GitignoreRule] = {}
+        # 再読み込みの判定に使う.gitignoreとディレクトリのstat
+        self._signatures: Dict[str, Optional[SpecKey]] = {}
+        self._dir_mtimes: Dict[str, int] = {}
+        self._refresh_lock = threading.Lock()
         self._load_all_gitignores()
 
-    def _parse_gitignore(self, gitignore_path: str) -> pathspec.PathSpec:
+    def _parse_gitignore(self, gitignore_path: str) -> "pathspec.PathSpec":
         """Parse a .gitignore file.
 
+        Compiled specs are shared through ``SPEC_CACHE`` as long as the file's
+        stat signature does not change.
+
         Args:
             gitignore_path: Path to .gitignore file
 
@@ -76,6 +227,15 @@ class GitignoreManager:
         Raises:
             GitignoreError: If there is an error reading the .gitignore file
         """
+        try:
+            key: Optional[SpecKey] = SPEC_CACHE.key_for(gitignore_path)
+        except OSError:
+            key = None
+        if key is not None:
+            spec = SPEC_CACHE.get(key)
+            if spec is not None:
+                return spec
+
         patterns = []
         try:
             with open(gitignore_path, "r", encoding="utf-8") as f:
@@ -87,18 +247,235 @@ class GitignoreManager:
             LOGGER.warning("Error reading %s: %s", gitignore_path, e)
             raise GitignoreError(f"Error reading {gitignore_path}: {e}")
 
-        return pathspec.PathSpec.from_lines("gitwildmatch", patterns)
+        # .gitignoreが見つかったときだけpathspecを読み込む
+        import pathspec
+
+        spec = pathspec.PathSpec.from_lines("gitwildmatch", patterns)
+        if key is not None:
+            SPEC_CACHE.put(key, spec)
+        return spec
 
     def _load_all_gitignores(self) -> None:
         """Load all .gitignore files from base directory and subdirectories."""
-        for root, dirs, files in os.walk(self.base_dir):
+        self._scan(self.base_dir, self.rules_cache, self._signatures, self._dir_mtimes)
+
+    def _scan(
+        self,
+        top: str,
+        rules: Dict[str, GitignoreRule],
+        signatures: Dict[str, Optional[SpecKey]],
+        dir_mtimes: Dict[str, int],
+    ) -> None:
+        """Load the .gitignore files of a subtree.
+
+        Args:
+            top: Directory to walk
+            rules: Rule table to add the loaded rules to (updated)
+            signatures: Stat signatures of the .gitignore files (updated)
+            dir_mtimes: Modification times of the walked directories (updated)
+        """
+        visited: Dict[Tuple[int, int], str] = {}
+        for root, dirs, files in os.walk(top, followlinks=self.follow_symlinks):
+            if self.follow_symlinks:
+                dirs[:] = unvisited_dirs(root, dirs, visited)
+            try:
+                dir_mtimes[root] = os.stat(root).st_mtime_ns
+            except OSError:
+                continue
             if ".gitignore" in files:
-                gitignore_path = os.path.join(root, ".gitignore")
-                try:
-                    patterns = self._parse_gitignore(gitignore_path)
-                    self.rules_cache[root] = GitignoreRule(patterns, root)
-                except GitignoreError as e:
-                    LOGGER.warning(str(e))
+                self._load_rule(root, rules, signatures)
+
+    def _load_rule(
+        self,
+        directory: str,
+        rules: Dict[str, GitignoreRule],
+        signatures: Dict[str, Optional[SpecKey]],
+    ) -> None:
+        """Load the .gitignore file of one directory.
+
+        Args:
+            directory: Directory containing the .gitignore file
+            rules: Rule table to update
+            signatures: Stat signatures of the .gitignore files (updated)
+        """
+        gitignore_path = os.path.join(directory, ".gitignore")
+        try:
+            signatures[gitignore_path] = SPEC_CACHE.key_for(gitignore_path)
+        except OSError:
+            signatures[gitignore_path] = None
+        try:
+            patterns = self._parse_gitignore(gitignore_path)
+            rules[directory] = GitignoreRule(patterns, directory)
+        except GitignoreError as e:
+            rules.pop(directory, None)
+            LOGGER.warning(str(e))
+
+    def _in_subtree(self, path: str, top: str) -> bool:
+        """Return True if a path is a directory or below it.
+
+        Args:
+            path: Path to check
+            top: Directory
+
+        Returns:
+            bool: Whether ``path`` is ``top`` or inside it
+        """
+        return path == top or path.startswith(top.rstrip(os.sep) + os.sep)
+
+    def _absolute(self, path: str) -> str:
+        """Return a path in the form used by the walk.
+
+        Args:
+            path: Absolute path or path relative to the base directory
+
+        Returns:
+            str: Path joined to the base directory, without trailing separator
+        """
+        if path in ("", "."):
+            return self.base_dir
+        return os.path.join(self.base_dir, path).rstrip(os.sep) or os.sep
+
+    def refresh(self, paths: Optional[Iterable[str]] = None) -> List[str]:
+        """Bring the loaded rules up to date without walking the whole tree.
+
+        Without ``paths`` only ``stat`` calls are made for an unchanged tree:
+        every known .gitignore file is re-stat'ed and reparsed if its
+        signature changed, and every known directory is re-stat'ed; only
+        directories whose mtime changed (entries added, removed or renamed)
+        are listed again, and new subdirectories are walked. With ``paths``,
+        only the given .gitignore files and directory subtrees are reloaded.
+
+        Args:
+            paths: .gitignore files or directories (absolute or relative to
+                the base directory) to reload; all changes are detected if
+                omitted
+
+        Returns:
+            List[str]: Sorted directories whose rules were added, changed or
+                removed
+        """
+        with self._refresh_lock:
+            rules = dict(self.rules_cache)
+            signatures = dict(self._signatures)
+            dir_mtimes = dict(self._dir_mtimes)
+            if paths is None:
+                self._refresh_changed(rules, signatures, dir_mtimes)
+            else:
+                for path in paths:
+                    self._refresh_path(
+                        self._absolute(path), rules, signatures, dir_mtimes
+                    )
+
+            old_rules = self.rules_cache
+            changed = [
+                directory
+                for directory in set(old_rules) | set(rules)
+                if old_rules.get(directory) != rules.get(directory)
+            ]
+            # 辞書ごと差し替えるので、読み取り側はロックを必要としない
+            self._signatures = signatures
+            self._dir_mtimes = dir_mtimes
+            self.rules_cache = rules
+        return sorted(changed)
+
+    def _drop_subtree(
+        self,
+        top: str,
+        rules: Dict[str, GitignoreRule],
+        signatures: Dict[str, Optional[SpecKey]],
+        dir_mtimes: Dict[str, int],
+    ) -> None:
+        """Forget everything loaded for a subtree.
+
+        Args:
+            top: Directory
+            rules: Rule table to update
+            signatures: Stat signatures of the .gitignore files to update
+            dir_mtimes: Modification times of the directories to update
+        """
+        for table in (rules, dir_mtimes):
+            for directory in [d for d in table if self._in_subtree(d, top)]:
+                del table[directory]
+        for path in [
+            p for p in signatures if self._in_subtree(os.path.dirname(p), top)
+        ]:
+            del signatures[path]
+
+    def _refresh_path(
+        self,
+        path: str,
+        rules: Dict[str, GitignoreRule],
+        signatures: Dict[str, Optional[SpecKey]],
+        dir_mtimes: Dict[str, int],
+    ) -> None:
+        """Reload one .gitignore file or directory subtree.
+
+        Args:
+            path: Absolute .gitignore file or directory path
+            rules: Rule table to update
+            signatures: Stat signatures of the .gitignore files to update
+            dir_mtimes: Modification times of the directories to update
+        """
+        if os.path.basename(path) == ".gitignore":
+            directory = os.path.dirname(path)
+            if os.path.isfile(path):
+                self._load_rule(directory, rules, signatures)
+            else:
+                rules.pop(directory, None)
+                signatures.pop(path, None)
+            return
+        self._drop_subtree(path, rules, signatures, dir_mtimes)
+        if os.path.isdir(path):
+            self._scan(path, rules, signatures, dir_mtimes)
+
+    def _refresh_changed(
+        self,
+        rules: Dict[str, GitignoreRule],
+        signatures: Dict[str, Optional[SpecKey]],
+        dir_mtimes: Dict[str, int],
+    ) -> None:
+        """Detect and reload changes by re-stat'ing the known files and directories.
+
+        Args:
+            rules: Rule table to update
+            signatures: Stat signatures of the .gitignore files to update
+            dir_mtimes: Modification times of the directories to update
+        """
+        # 内容が編集された.gitignoreはディレクトリのmtimeを変えない
+        for gitignore_path, key in list(signatures.items()):
+            try:
+                current: Optional[SpecKey] = SPEC_CACHE.key_for(gitignore_path)
+            except OSError:
+                current = None
+            if current != key:
+                self._refresh_path(gitignore_path, rules, signatures, dir_mtimes)
+
+        for directory, mtime in sorted(dir_mtimes.items()):
+            if directory not in dir_mtimes:
+                # 親ディレクトリの再走査で削除済み
+                continue
+            try:
+                st = os.stat(directory)
+            except OSError:
+                self._drop_subtree(directory, rules, signatures, dir_mtimes)
+                continue
+            if st.st_mtime_ns == mtime:
+                continue
+            dir_mtimes[directory] = st.st_mtime_ns
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            names = {entry.name for entry in entries}
+            gitignore_path = os.path.join(directory, ".gitignore")
+            if (".gitignore" in names) != (directory in rules):
+                self._refresh_path(gitignore_path, rules, signatures, dir_mtimes)
+            for entry in entries:
+                if entry.path not in dir_mtimes and entry.is_dir(
+                    follow_symlinks=self.follow_symlinks
+                ):
+                    # 新しいサブディレクトリだけを走査する
+                    self._scan(entry.path, rules, signatures, dir_mtimes)
 
     def is_ignored(self, path: str) -> bool:
         """Check if a path should be ignored by any .gitignore rule.
@@ -109,10 +486,80 @@ class GitignoreManager:
         Returns:
             bool: True if the path should be ignored
         """
+        rules = self.rules_cache
         current_dir = os.path.dirname(path)
         while current_dir >= self.base_dir:
-            if current_dir in self.rules_cache:
-                if self.rules_cache[current_dir].is_ignored(path):
-                    return True
+            rule = rules.get(current_dir)
+            if rule is not None and rule.is_ignored(path):
+                return True
             current_dir = os.path.dirname(current_dir)
         return False
+
+    def _rules_for(self, dir_rel: str) -> List[Tuple[str, GitignoreRule]]:
+        """Return the rules in effect for the entries of a directory.
+
+        Args:
+            dir_rel: Directory relative to the base directory, ``/`` separated
+                (``""`` or ``"."`` for the base directory itself)
+
+        Returns:
+            List[Tuple[str, GitignoreRule]]: Rules of the directory and its
+                ancestors, each with the prefix that makes an entry name
+                relative to the rule's directory
+        """
+        parts = [part for part in dir_rel.split("/") if part and part != "."]
+        rules_cache = self.rules_cache
+        rules = []
+        for depth in range(len(parts) + 1):
+            rule_dir = os.path.join(self.base_dir, *parts[:depth])
+            rule = rules_cache.get(rule_dir)
+            if rule is not None:
+                prefix = "".join(part + "/" for part in parts[depth:])
+                rules.append((prefix, rule))
+        return rules
+
+    def filter(
+        self, dir_rel: str, names: Iterable[str], directories: bool = False
+    ) -> List[str]:
+        """Filter a whole directory listing by the .gitignore rules.
+
+        The names are matched in bulk against each rule set in effect for the
+        directory, so the listing costs one call instead of one
+        ``is_ignored`` call per entry.
+
+        Args:
+            dir_rel: Directory relative to the base directory, ``/`` separated
+                (``""`` or ``"."`` for the base directory itself)
+            names: Entry names in the directory
+            directories: The names are directories, so directory-only patterns
+                such as ``build/`` apply to them
+
+        Returns:
+            List[str]: Names that are not ignored, in their original order
+
+        Raises:
+            GitignoreError: If the names cannot be matched
+        """
+        names = list(names)
+        rules = self._rules_for(dir_rel)
+        if not rules or not names:
+            return names
+
+        suffix = "/" if directories else ""
+        ignored = set()
+        try:
+            for prefix, rule in rules:
+                candidates = {
+                    prefix + name + suffix: name
+                    for name in names
+                    if name not in ignored
+                }
+                if not candidates:
+                    break
+                for matched in rule.patterns.match_files(candidates):
+                    ignored.add(candidates[matched])
+        except Exception as e:
+            raise GitignoreError(f"Error filtering entries of {dir_rel!r}: {e}")
+        if not ignored:
+            return names
+        return [name for name in names if name not in ignored]
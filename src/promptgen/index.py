@@ -0,0 +1,292 @@
+"""Persistent inverted index for query-focused file selection.
+
+The index is an SQLite database in the project cache directory. It stores the
+term frequencies of every indexed file together with the file's size and
+mtime, so updates only re-read files whose stat signature changed. Queries are
+ranked with Okapi BM25.
+"""
+
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from promptgen.cache import project_cache_dir
+
+# BM25のパラメータ
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_SCHEMA_VERSION = "1"
+_WORD = re.compile(r"\w+")
+_CAMEL_PART = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+ContentReader = Callable[[str], Optional[str]]
+
+
+class SearchResult(NamedTuple):
+    """A ranked file.
+
+    Attributes:
+        path: Path relative to the base directory (``/`` separated)
+        score: BM25 score
+        size: File size in bytes at indexing time
+    """
+
+    path: str
+    score: float
+    size: int
+
+
+def tokenize(text: str) -> Dict[str, int]:
+    """Split text into lower-cased terms with their frequencies.
+
+    Identifiers are indexed as a whole and, when they are compound, also by
+    their ``snake_case`` and ``camelCase`` parts (``retryBackoff`` yields
+    ``retrybackoff``, ``retry`` and ``backoff``).
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        Dict[str, int]: Term frequencies
+    """
+    terms: Counter = Counter()
+    for word, count in Counter(_WORD.findall(text)).items():
+        lower = word.lower()
+        if len(lower) > 1:
+            terms[lower] += count
+        parts = [
+            part.lower()
+            for chunk in word.split("_")
+            for part in _CAMEL_PART.findall(chunk)
+        ]
+        if len(parts) > 1:
+            for part in parts:
+                if len(part) > 1 and part != lower:
+                    terms[part] += count
+    return dict(terms)
+
+
+class SearchIndex:
+    """SQLite backed inverted index of the files of one project."""
+
+    def __init__(self, path: str):
+        """Open or create an index.
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._create_schema()
+
+    @classmethod
+    def for_project(cls, base_dir: str) -> "SearchIndex":
+        """Open the index stored in a project's cache directory.
+
+        Args:
+            base_dir: Project base directory
+
+        Returns:
+            SearchIndex: Opened index
+        """
+        return cls(os.path.join(project_cache_dir(base_dir), "index.sqlite3"))
+
+    def _create_schema(self) -> None:
+        """Create the tables, discarding an index with another schema."""
+        conn = self._conn
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is not None and row[0] != _SCHEMA_VERSION:
+            conn.executescript(
+                "DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS postings;"
+            )
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                file_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, file_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id);
+            """
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+            (_SCHEMA_VERSION,),
+        )
+        conn.commit()
+
+    def update(
+        self, base_dir: str, paths: Iterable[str], read: ContentReader
+    ) -> Tuple[int, int, int]:
+        """Bring the index in line with the given files.
+
+        Files whose size and mtime did not change are not read again. Indexed
+        files that are not in ``paths`` are removed.
+
+        Args:
+            base_dir: Project base directory
+            paths: Absolute paths of the files that should be indexed
+            read: Function returning a file's content, or None if unreadable
+
+        Returns:
+            Tuple[int, int, int]: Numbers of (re)indexed, unchanged and removed
+                files
+        """
+        conn = self._conn
+        known = {
+            path: (file_id, size, mtime_ns)
+            for file_id, path, size, mtime_ns in conn.execute(
+                "SELECT id, path, size, mtime_ns FROM files"
+            )
+        }
+        indexed = unchanged = 0
+        seen = set()
+        with conn:
+            for file_path in paths:
+                rel_path = os.path.relpath(file_path, base_dir).replace(os.sep, "/")
+                try:
+                    st = os.stat(file_path)
+                except OSError:
+                    continue
+                previous = known.get(rel_path)
+                if previous is not None and previous[1:] == (
+                    st.st_size,
+                    st.st_mtime_ns,
+                ):
+                    seen.add(rel_path)
+                    unchanged += 1
+                    continue
+
+                content = read(file_path)
+                if content is None:
+                    continue
+                seen.add(rel_path)
+                if previous is not None:
+                    self._delete(previous[0])
+                terms = tokenize(content)
+                cursor = conn.execute(
+                    "INSERT INTO files (path, size, mtime_ns, length) "
+                    "VALUES (?, ?, ?, ?)",
+                    (rel_path, st.st_size, st.st_mtime_ns, sum(terms.values())),
+                )
+                conn.executemany(
+                    "INSERT INTO postings (term, file_id, tf) VALUES (?, ?, ?)",
+                    [(term, cursor.lastrowid, tf) for term, tf in terms.items()],
+                )
+                indexed += 1
+
+            removed = [
+                file_id for path, (file_id, _, _) in known.items() if path not in seen
+            ]
+            for file_id in removed:
+                self._delete(file_id)
+        return indexed, unchanged, len(removed)
+
+    def _delete(self, file_id: int) -> None:
+        """Remove a file and its postings.
+
+        Args:
+            file_id: Row id of the file
+        """
+        self._conn.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+        self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[SearchResult]:
+        """Rank indexed files against a query with BM25.
+
+        Args:
+            query: Free text query
+            limit: Maximum number of results
+
+        Returns:
+            List[SearchResult]: Matching files, best first
+        """
+        conn = self._conn
+        total, total_length = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM files"
+        ).fetchone()
+        if not total:
+            return []
+        avg_length = total_length / total or 1.0
+
+        scores: Dict[int, float] = {}
+        info: Dict[int, Tuple[str, int]] = {}
+        for term in tokenize(query):
+            rows = conn.execute(
+                "SELECT p.file_id, p.tf, f.length, f.path, f.size "
+                "FROM postings p JOIN files f ON f.id = p.file_id WHERE p.term = ?",
+                (term,),
+            ).fetchall()
+            if not rows:
+                continue
+            df = len(rows)
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for file_id, tf, length, path, size in rows:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                scores[file_id] = scores.get(file_id, 0.0) + idf * tf * (
+                    BM25_K1 + 1
+                ) / (tf + norm)
+                info[file_id] = (path, size)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], info[item[0]][0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [
+            SearchResult(info[file_id][0], score, info[file_id][1])
+            for file_id, score in ranked
+        ]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+    def __enter__(self) -> "SearchIndex":
+        """Return the index for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the index."""
+        self.close()
+
+
+def select_within_budget(
+    results: List[SearchResult],
+    top_k: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> List[SearchResult]:
+    """Pick the best results within a file count and byte budget.
+
+    Results that do not fit into the remaining byte budget are skipped so that
+    smaller, lower ranked files can still be included.
+
+    Args:
+        results: Ranked results, best first
+        top_k: Maximum number of files
+        max_bytes: Maximum total size in bytes
+
+    Returns:
+        List[SearchResult]: Selected results in rank order
+    """
+    selected = []
+    used = 0
+    for result in results:
+        if top_k is not None and len(selected) >= top_k:
+            break
+        if max_bytes is not None and used + result.size > max_bytes:
+            continue
+        selected.append(result)
+        used += result.size
+    return selected
@@ -0,0 +1,124 @@
+"""Hard limits and deadline of a run.
+
+Limits are checked cooperatively between directories and between files, so a
+run stops at the next check after a limit is reached and returns what it has
+collected so far. The reason is recorded in ``RunStats.truncated`` and the
+prompt ends with a truncation notice.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from promptgen.stats import RunStats
+
+
+@dataclass(frozen=True)
+class Limits:
+    """Bounds of a run.
+
+    Attributes:
+        max_files: Maximum number of files selected
+        max_total_bytes: Maximum total number of bytes read; the file that
+            would exceed it is dropped
+        max_depth: Maximum directory depth walked below the base directory
+            (0 walks only the base directory itself)
+        deadline: Seconds after the start of the run at which traversal and
+            reading stop
+    """
+
+    max_files: Optional[int] = None
+    max_total_bytes: Optional[int] = None
+    max_depth: Optional[int] = None
+    deadline: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        """Validate the limits."""
+        for name in ("max_files", "max_total_bytes", "max_depth"):
+            value = getattr(self, name)
+            if value is not None and value < 0:
+                raise ValueError(f"{name} must be >= 0, got {value}")
+        if self.deadline is not None and self.deadline <= 0:
+            raise ValueError(f"deadline must be > 0, got {self.deadline}")
+
+
+class LimitTracker:
+    """Check the limits of one run against its statistics."""
+
+    def __init__(self, limits: Optional[Limits], stats: RunStats):
+        """Start tracking a run.
+
+        Args:
+            limits: Limits of the run (None for an unbounded run)
+            stats: Statistics of the run; the reason of the first limit
+                reached is stored in ``stats.truncated``
+        """
+        self.limits = limits or Limits()
+        self.stats = stats
+        self._expires: Optional[float] = None
+        if self.limits.deadline is not None:
+            self._expires = time.monotonic() + self.limits.deadline
+
+    def stop(self, reason: str) -> None:
+        """Record that the run was truncated.
+
+        Args:
+            reason: Name of the limit that was reached
+        """
+        if self.stats.truncated is None:
+            self.stats.truncated = reason
+
+    def expired(self) -> bool:
+        """Return True (and record it) if the deadline has passed.
+
+        Returns:
+            bool: Whether the run must stop
+        """
+        if self._expires is not None and time.monotonic() >= self._expires:
+            self.stop("deadline")
+            return True
+        return False
+
+    def files_full(self, count: Optional[int] = None) -> bool:
+        """Return True (and record it) if no more files may be selected.
+
+        Args:
+            count: Files taken so far (default: ``stats.files_matched``)
+
+        Returns:
+            bool: Whether the file limit was reached
+        """
+        max_files = self.limits.max_files
+        if count is None:
+            count = self.stats.files_matched
+        if max_files is not None and count >= max_files:
+            self.stop("max_files")
+            return True
+        return False
+
+    def over_bytes(self, total: int) -> bool:
+        """Return True (and record it) if a byte total exceeds the limit.
+
+        Args:
+            total: Bytes read, including the file just read
+
+        Returns:
+            bool: Whether the last file must be dropped and reading stop
+        """
+        max_total_bytes = self.limits.max_total_bytes
+        if max_total_bytes is not None and total > max_total_bytes:
+            self.stop("max_total_bytes")
+            return True
+        return False
+
+    def too_deep(self, depth: int) -> bool:
+        """Return True if the subdirectories of a directory are not walked.
+
+        Args:
+            depth: Depth of the directory below the base directory
+
+        Returns:
+            bool: Whether the depth limit was reached
+        """
+        max_depth = self.limits.max_depth
+        return max_depth is not None and depth >= max_depth
@@ -0,0 +1,70 @@
+"""Output file handling for the promptgen package."""
+
+import io
+from typing import Optional, TextIO
+
+# 拡張子と圧縮形式の対応
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".xz": "xz", ".bz2": "bz2"}
+
+
+def compression_for(path: str) -> Optional[str]:
+    """Return the compression format implied by a file name.
+
+    Args:
+        path: Output file path
+
+    Returns:
+        Optional[str]: ``"gzip"``, ``"xz"``, ``"bz2"`` or None
+    """
+    for suffix, compression in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+
+def open_output(path: str, compress_level: Optional[int] = None) -> TextIO:
+    """Open an output file for text, compressing on the fly by file suffix.
+
+    Files ending in ``.gz``, ``.xz`` or ``.bz2`` are written through the
+    corresponding standard library module, so the uncompressed text never
+    touches the disk. Newlines are written as they are on every platform.
+
+    Args:
+        path: Output file path
+        compress_level: Compression level (gzip/bz2: 1-9, xz preset: 0-9);
+            the module default is used if omitted
+
+    Returns:
+        TextIO: Writable UTF-8 text stream
+
+    Raises:
+        ValueError: If the compression level is out of range
+    """
+    compression = compression_for(path)
+    if compression is None:
+        # 改行を変換しない（目次のバイトオフセットを書き込んだ文字列と一致させる）
+        return open(path, "w", encoding="utf-8", newline="")
+
+    if compress_level is not None and not 0 <= compress_level <= 9:
+        raise ValueError(f"Invalid compression level: {compress_level}")
+
+    binary: io.IOBase
+    if compression == "gzip":
+        import gzip
+
+        binary = gzip.open(
+            path, "wb", compresslevel=9 if compress_level is None else compress_level
+        )
+    elif compression == "bz2":
+        import bz2
+
+        binary = bz2.open(
+            path,
+            "wb",
+            compresslevel=9 if compress_level is None else max(compress_level, 1),
+        )
+    else:
+        import lzma
+
+        binary = lzma.open(path, "wb", preset=compress_level)
+    return io.TextIOWrapper(binary, encoding="utf-8", newline="")
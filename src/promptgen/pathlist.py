@@ -0,0 +1,45 @@
+"""Precomputed path lists such as the output of ``git ls-files -z`` or ``fd``.
+
+A list holds one path per line, or NUL-terminated paths when it contains a NUL
+byte (``git ls-files -z``, ``fd -0``, ``find -print0``). Paths are decoded
+with the filesystem encoding, so undecodable names survive as surrogate
+escapes.
+"""
+
+import os
+import sys
+from typing import List
+
+
+def split_path_list(data: bytes) -> List[str]:
+    """Split a newline- or NUL-delimited path list.
+
+    Args:
+        data: Raw list; NUL-delimited if it contains a NUL byte
+
+    Returns:
+        List[str]: Paths in list order, without empty entries
+    """
+    if b"\0" in data:
+        entries = data.split(b"\0")
+    else:
+        entries = data.splitlines()
+    return [os.fsdecode(entry) for entry in entries if entry]
+
+
+def read_path_list(source: str) -> List[str]:
+    """Read a path list from a file or standard input.
+
+    Args:
+        source: File path, or ``-`` for standard input
+
+    Returns:
+        List[str]: Paths in list order
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    if source == "-":
+        return split_path_list(sys.stdin.buffer.read())
+    with open(source, "rb") as f:
+        return split_path_list(f.read())
@@ -0,0 +1,222 @@
+"""File pattern matching for the promptgen package.
+
+Plain patterns keep their original meaning: a file is included when its name
+equals the pattern or ends with it (``.py``, ``Dockerfile``). Patterns that
+contain a slash or a wildcard (``*``, ``?``, ``[``) are gitwildmatch-style
+globs matched against the path relative to the base directory:
+
+- ``*`` and ``?`` never match ``/``; ``**`` matches across directories
+- a pattern with a leading or inner slash is anchored to the base directory
+  (``src/**/*.py``, ``/setup.py``); otherwise it matches at any depth (``*.md``)
+- a trailing slash selects everything below a directory (``config/``)
+
+All globs of a matcher are compiled into one regular expression, and the
+literal directory prefixes of anchored globs are used to prune the walk.
+"""
+
+import re
+from typing import List, Optional, Pattern, Tuple
+
+from promptgen.exceptions import PatternError
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+def is_glob(pattern: str) -> bool:
+    """Return True if a pattern is a glob rather than a name or suffix.
+
+    Args:
+        pattern: File pattern
+
+    Returns:
+        bool: True for patterns containing a slash or a wildcard
+    """
+    return "/" in pattern or any(char in _GLOB_CHARS for char in pattern)
+
+
+def _translate_segment(segment: str) -> str:
+    """Translate a single path segment (no slashes) to a regex.
+
+    Args:
+        segment: Glob path segment
+
+    Returns:
+        str: Regular expression for the segment
+    """
+    result = []
+    index = 0
+    while index < len(segment):
+        char = segment[index]
+        if char == "*":
+            result.append("[^/]*")
+        elif char == "?":
+            result.append("[^/]")
+        elif char == "[":
+            end = segment.find("]", index + 2)
+            if end == -1:
+                result.append(re.escape(char))
+            else:
+                body = segment[index + 1 : end]
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                result.append(f"[{body}]")
+                index = end
+        elif char == "\\" and index + 1 < len(segment):
+            index += 1
+            result.append(re.escape(segment[index]))
+        else:
+            result.append(re.escape(char))
+        index += 1
+    return "".join(result)
+
+
+def glob_to_regex(pattern: str) -> Tuple[str, bool]:
+    """Translate a gitwildmatch-style glob to a regular expression.
+
+    The returned expression matches a complete relative path (``/``
+    separated) and has no anchors or groups, so several of them can be joined
+    into one alternation.
+
+    Args:
+        pattern: Glob pattern
+
+    Returns:
+        Tuple[str, bool]: Regular expression and whether the glob is anchored
+            to the base directory
+
+    Raises:
+        PatternError: If the pattern is empty
+    """
+    directory = pattern.endswith("/")
+    stripped = pattern.strip("/")
+    if not stripped:
+        raise PatternError(f"Invalid pattern: {pattern!r}")
+    anchored = "/" in pattern.rstrip("/")
+
+    segments = stripped.split("/")
+    parts = []
+    for position, segment in enumerate(segments):
+        last = position == len(segments) - 1
+        if segment == "**":
+            if last:
+                parts.append(".*")
+            else:
+                parts.append("(?:[^/]+/)*")
+            continue
+        parts.append(_translate_segment(segment) + ("" if last else "/"))
+
+    regex = "".join(parts)
+    if not anchored:
+        regex = "(?:[^/]+/)*" + regex
+    if directory:
+        regex += "/.*"
+    return regex, anchored
+
+
+def _literal_prefix(pattern: str) -> str:
+    """Return the leading directories of an anchored glob without wildcards.
+
+    Args:
+        pattern: Anchored glob pattern
+
+    Returns:
+        str: Literal directory prefix (empty if the first segment is a glob)
+    """
+    segments = pattern.strip("/").split("/")
+    if not pattern.endswith("/"):
+        segments = segments[:-1]
+    prefix = []
+    for segment in segments:
+        if any(char in _GLOB_CHARS or char == "\\" for char in segment):
+            break
+        prefix.append(segment)
+    return "/".join(prefix)
+
+
+def compile_globs(patterns: List[str], subtree: bool = False) -> Optional[Pattern]:
+    """Compile globs into a single regular expression.
+
+    Args:
+        patterns: Glob patterns
+        subtree: Also match every path below a matching path
+
+    Returns:
+        Optional[Pattern]: Combined expression, or None if there are no globs
+
+    Raises:
+        PatternError: If a pattern cannot be compiled
+    """
+    if not patterns:
+        return None
+    alternatives = "|".join(glob_to_regex(pattern)[0] for pattern in patterns)
+    regex = f"(?:{alternatives})" + ("(?:/.*)?" if subtree else "")
+    try:
+        return re.compile(regex, re.DOTALL)
+    except re.error as e:
+        raise PatternError(f"Invalid pattern in {patterns}: {e}")
+
+
+class FileMatcher:
+    """Match files against names, suffixes and globs in as few steps as possible."""
+
+    def __init__(self, patterns: List[str]):
+        """Compile the patterns.
+
+        Args:
+            patterns: File patterns (names, suffixes or globs)
+
+        Raises:
+            PatternError: If a glob cannot be compiled
+        """
+        self.patterns = list(patterns)
+        self.names = frozenset(p for p in patterns if not is_glob(p))
+        # str.endswithはタプルを一度に判定できる（完全一致も含まれる）
+        self.suffixes = tuple(self.names)
+        globs = [p for p in patterns if is_glob(p)]
+        self.regex = compile_globs(globs)
+        # スラッシュを含むグロブ（固定パターンや``config/``）は相対パス全体で照合する
+        self.needs_path = any("/" in p for p in globs)
+
+        # 走査の枝刈りに使うディレクトリプレフィックス
+        # （ルートに固定されないパターンがあれば全ディレクトリを走査する）
+        self.dir_prefixes: Optional[Tuple[str, ...]] = None
+        if globs and not self.names and all(glob_to_regex(p)[1] for p in globs):
+            prefixes = {_literal_prefix(p) for p in globs}
+            if "" not in prefixes:
+                self.dir_prefixes = tuple(sorted(prefixes))
+
+    def matches(self, rel_path: str, filename: Optional[str] = None) -> bool:
+        """Check whether a file is selected.
+
+        Args:
+            rel_path: Path relative to the base directory, ``/`` separated
+            filename: Base name of the file (derived from rel_path if omitted)
+
+        Returns:
+            bool: True if the file matches any pattern
+        """
+        if filename is None:
+            filename = rel_path.rsplit("/", 1)[-1]
+        if self.suffixes and filename.endswith(self.suffixes):
+            return True
+        return self.regex is not None and self.regex.fullmatch(rel_path) is not None
+
+    def could_match_below(self, rel_dir: str) -> bool:
+        """Check whether files below a directory can match any pattern.
+
+        Args:
+            rel_dir: Directory relative to the base directory, ``/`` separated
+
+        Returns:
+            bool: False if the directory can be skipped entirely
+        """
+        if self.dir_prefixes is None:
+            return True
+        for prefix in self.dir_prefixes:
+            if (
+                rel_dir == prefix
+                or rel_dir.startswith(prefix + "/")
+                or prefix.startswith(rel_dir + "/")
+            ):
+                return True
+        return False
@@ -0,0 +1,155 @@
+"""Progress reporting for long running scans."""
+
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, TextIO
+
+from promptgen.stats import RunStats
+
+
+@dataclass
+class ProgressEvent:
+    """Snapshot of scan progress.
+
+    Attributes:
+        dirs_entered: Number of directories entered so far
+        dirs_pending: Number of discovered directories not yet entered
+        files_matched: Number of files selected by the file patterns so far
+        bytes_read: Number of bytes read so far
+        elapsed: Seconds since the scan started
+        estimated_remaining: Rough estimate of the remaining seconds based on
+            the pending directories, or None if no estimate is available yet
+        done: True for the final event of a scan
+    """
+
+    dirs_entered: int
+    dirs_pending: int
+    files_matched: int
+    bytes_read: int
+    elapsed: float
+    estimated_remaining: Optional[float]
+    done: bool = False
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+class ProgressReporter:
+    """Throttle progress events emitted from the file collection loop.
+
+    The walk calls ``dir_entered`` once per directory and the reader calls
+    ``update`` after each file; file and byte counters are taken from the
+    shared ``RunStats``. Events are delivered at most once every ``interval``
+    seconds, and ``finish`` delivers the final event once the last file of the
+    run has been read.
+    """
+
+    def __init__(
+        self, callback: ProgressCallback, stats: RunStats, interval: float = 0.1
+    ):
+        """Initialize the reporter.
+
+        Args:
+            callback: Function receiving progress events
+            stats: Statistics object updated by the collection loop
+            interval: Minimum number of seconds between two events
+        """
+        self.callback = callback
+        self.stats = stats
+        self.interval = interval
+        self.dirs_entered = 0
+        self.dirs_discovered = 1  # ベースディレクトリ
+        self.finished = False
+        self._start = time.monotonic()
+        self._next_emit = self._start + interval
+
+    def dir_entered(self, subdirs: int) -> None:
+        """Record a directory visit and emit an event if the interval elapsed.
+
+        Args:
+            subdirs: Number of subdirectories that will be visited later
+        """
+        self.dirs_entered += 1
+        self.dirs_discovered += subdirs
+        self.update()
+
+    def update(self) -> None:
+        """Emit an event with the current counters if the interval elapsed."""
+        if self.finished:
+            return
+        now = time.monotonic()
+        if now >= self._next_emit:
+            self._next_emit = now + self.interval
+            self.callback(self._event(now, done=False))
+
+    def finish(self) -> None:
+        """Emit the final event; later calls and updates are ignored."""
+        if not self.finished:
+            self.finished = True
+            self.callback(self._event(time.monotonic(), done=True))
+
+    def _event(self, now: float, done: bool) -> ProgressEvent:
+        """Build an event from the current counters.
+
+        Args:
+            now: Current monotonic time
+            done: Whether the scan has finished
+
+        Returns:
+            ProgressEvent: Progress snapshot
+        """
+        elapsed = now - self._start
+        pending = 0 if done else max(self.dirs_discovered - self.dirs_entered, 0)
+        remaining: Optional[float] = None
+        if done:
+            remaining = 0.0
+        elif self.dirs_entered and elapsed > 0:
+            remaining = pending * elapsed / self.dirs_entered
+        return ProgressEvent(
+            dirs_entered=self.dirs_entered,
+            dirs_pending=pending,
+            files_matched=self.stats.files_matched,
+            bytes_read=self.stats.bytes_read,
+            elapsed=elapsed,
+            estimated_remaining=remaining,
+            done=done,
+        )
+
+
+class ProgressBar:
+    """Render progress events as a single updating line on a terminal."""
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        """Initialize the progress bar.
+
+        Args:
+            stream: Output stream (default: sys.stderr)
+        """
+        self.stream = stream or sys.stderr
+
+    def __call__(self, event: ProgressEvent) -> None:
+        """Render a progress event.
+
+        Args:
+            event: Progress event to render
+        """
+        total = event.dirs_entered + event.dirs_pending
+        ratio = event.dirs_entered / total if total else 1.0
+        width = 20
+        filled = int(ratio * width)
+        bar = "#" * filled + "-" * (width - filled)
+        eta = (
+            f"{event.estimated_remaining:.1f}s"
+            if event.estimated_remaining is not None
+            else "?"
+        )
+        line = (
+            f"\r[{bar}] dirs {event.dirs_entered}/{total}"
+            f" files {event.files_matched}"
+            f" {event.bytes_read / 1024 / 1024:.1f} MiB eta {eta}"
+        )
+        self.stream.write(line)
+        if event.done:
+            self.stream.write("\n")
+        self.stream.flush()
@@ -0,0 +1,274 @@
+"""Single-pass redaction of secrets in file contents.
+
+All secret patterns, the built-in ones and user-supplied ones, are compiled
+into one alternation so each file is scanned by one regular expression, no
+matter how many patterns there are. Built-in patterns carry literal needles;
+a fast substring search drops the patterns whose needles do not occur in a
+file, so files without secret-looking text skip the regex scan entirely.
+
+A match is replaced by ``[REDACTED:<name>]``. If a pattern has a group named
+``secret``, only that group is replaced and the rest of the match (such as the
+``password =`` part of an assignment) is kept.
+
+Patterns can be limited to certain files: unquoted ``NAME=value`` assignments
+are only redacted in env, shell and ini-style configuration files, so code
+such as ``token = request.token`` is left alone.
+
+Patterns are joined into one expression, so they must not use global inline
+flags such as ``(?i)``; use scoped flags like ``(?i:...)`` instead.
+"""
+
+import fnmatch
+import os
+import re
+from typing import (
+    Dict,
+    FrozenSet,
+    List,
+    Match,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Sequence,
+    Tuple,
+)
+
+from promptgen.exceptions import PatternError
+
+_SECRET_WORDS = (
+    "password",
+    "passwd",
+    "pwd",
+    "secret",
+    "token",
+    "api_key",
+    "apikey",
+    "access_key",
+    "accesskey",
+    "private_key",
+    "privatekey",
+    "auth",
+)
+_SECRET_NAMES = (
+    r"password|passwd|pwd|secret|token|api_?key|access_?key|private_?key|auth"
+)
+# 秘密を表す名前で終わるキー（``author``・``tokenizer``・``pwd_dir``などは含まない）
+_SECRET_KEY = rf"(?<![A-Za-z])(?i:(?:{_SECRET_NAMES})(?:[_-]?(?:key|id))?)\b"
+# 引用符なしの代入が設定値を表すファイル（コードでは変数の代入と区別できない）
+_ENV_FILES = (
+    ".env",
+    ".env.*",
+    "*.env",
+    ".envrc",
+    "*.sh",
+    "*.bash",
+    "*.zsh",
+    "*.ini",
+    "*.cfg",
+    "*.conf",
+    "*.properties",
+)
+
+
+class SecretPattern(NamedTuple):
+    """A named secret pattern.
+
+    Attributes:
+        name: Name used in the ``[REDACTED:<name>]`` marker
+        regex: Regular expression; a ``secret`` group limits the replacement
+        needles: Lower-case strings of which at least one occurs in every
+            match; the pattern is skipped for texts containing none of them
+            (an empty tuple means the pattern is always applied)
+        files: Glob patterns of the file names the pattern applies to (an
+            empty tuple means every file)
+    """
+
+    name: str
+    regex: str
+    needles: Tuple[str, ...] = ()
+    files: Tuple[str, ...] = ()
+
+
+DEFAULT_SECRET_PATTERNS: Tuple[SecretPattern, ...] = (
+    SecretPattern(
+        "private_key",
+        r"-----BEGIN[A-Z ]*PRIVATE KEY-----[\s\S]*?-----END[A-Z ]*PRIVATE KEY-----",
+        ("private key",),
+    ),
+    SecretPattern(
+        "aws_access_key_id", r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b", ("akia", "asia")
+    ),
+    SecretPattern(
+        "github_token",
+        r"\b(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{22,})",
+        ("ghp_", "gho_", "ghu_", "ghs_", "ghr_", "github_pat_"),
+    ),
+    SecretPattern("slack_token", r"\bxox[abposr]-[A-Za-z0-9-]{10,}", ("xox",)),
+    SecretPattern("google_api_key", r"\bAIza[0-9A-Za-z_-]{35}", ("aiza",)),
+    SecretPattern("stripe_key", r"\b[rs]k_live_[0-9A-Za-z]{20,}", ("k_live_",)),
+    SecretPattern(
+        "jwt",
+        r"\beyJ[A-Za-z0-9_-]{8,}\.eyJ[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]{8,}",
+        ("eyj",),
+    ),
+    SecretPattern("url_credentials", r"://[^/\s:@]+:(?P<secret>[^/\s@]+)@", ("://",)),
+    SecretPattern(
+        "quoted_assignment",
+        rf"{_SECRET_KEY}[\"']?[ \t]*[:=][ \t]*" r"[\"'](?P<secret>[^\"'\s]{4,})[\"']",
+        _SECRET_WORDS,
+    ),
+    SecretPattern(
+        "env_assignment",
+        rf"(?m:^[ \t]*(?:export[ \t]+)?[\w.-]*?){_SECRET_KEY}"
+        r"[ \t]*=[ \t]*(?P<secret>[^\s\"'#()]{4,})(?=[\s#]|$)",
+        _SECRET_WORDS,
+        _ENV_FILES,
+    ),
+)
+
+# 有効なパターンの組み合わせごとに結合した正規表現を保持する上限
+_MAX_COMBINED = 256
+
+
+class Redactor:
+    """Replace secrets matched by a set of patterns in one scan."""
+
+    def __init__(
+        self,
+        patterns: Optional[Sequence[Tuple[str, str]]] = None,
+        include_defaults: bool = True,
+    ):
+        """Validate the patterns.
+
+        Args:
+            patterns: Additional ``(name, regex)`` pairs, always applied
+            include_defaults: Also use ``DEFAULT_SECRET_PATTERNS``
+
+        Raises:
+            PatternError: If a pattern is invalid or no pattern is given
+        """
+        self.patterns: List[SecretPattern] = []
+        if include_defaults:
+            self.patterns.extend(DEFAULT_SECRET_PATTERNS)
+        self.patterns.extend(
+            SecretPattern(name, regex) for name, regex in patterns or []
+        )
+        if not self.patterns:
+            raise PatternError("At least one redaction pattern must be specified")
+
+        self._alternatives: List[str] = []
+        self._secret_groups: Dict[int, str] = {}
+        for index, (name, regex, _needles, _files) in enumerate(self.patterns):
+            try:
+                compiled = re.compile(regex)
+            except re.error as e:
+                raise PatternError(f"Invalid redaction pattern {name!r}: {e}")
+            if "secret" in compiled.groupindex:
+                # 結合後もグループ名が重複しないように番号を付ける
+                regex = regex.replace("(?P<secret>", f"(?P<s{index}>")
+                regex = regex.replace("(?P=secret)", f"(?P=s{index})")
+                self._secret_groups[index] = f"s{index}"
+            self._alternatives.append(f"(?P<p{index}>{regex})")
+        self._always = frozenset(
+            index for index, pattern in enumerate(self.patterns) if not pattern.needles
+        )
+        self._file_globs: Dict[int, Pattern] = {
+            index: re.compile(
+                "|".join(fnmatch.translate(glob) for glob in pattern.files)
+            )
+            for index, pattern in enumerate(self.patterns)
+            if pattern.files
+        }
+        self._combined: Dict[FrozenSet[int], Pattern] = {}
+        # 全パターンを結合した正規表現の検証を兼ねる
+        self.regex = self._combined_regex(frozenset(range(len(self.patterns))))
+
+    def _combined_regex(self, indexes: FrozenSet[int]) -> Pattern:
+        """Return the alternation of the given patterns.
+
+        Args:
+            indexes: Indexes of the patterns to combine
+
+        Returns:
+            Pattern: Compiled alternation
+
+        Raises:
+            PatternError: If the patterns cannot be combined
+        """
+        regex = self._combined.get(indexes)
+        if regex is None:
+            if len(self._combined) >= _MAX_COMBINED:
+                self._combined.clear()
+            try:
+                regex = re.compile(
+                    "|".join(self._alternatives[index] for index in sorted(indexes))
+                )
+            except re.error as e:
+                raise PatternError(f"Invalid redaction patterns: {e}")
+            self._combined[indexes] = regex
+        return regex
+
+    def _active(self, text: str, path: Optional[str]) -> FrozenSet[int]:
+        """Return the patterns that can match a text.
+
+        Args:
+            text: Text to scan
+            path: Path of the file the text was read from, if known
+
+        Returns:
+            FrozenSet[int]: Indexes of patterns with a needle in the text that
+                apply to the file
+        """
+        lowered = text.lower()
+        active = set(self._always)
+        for index, pattern in enumerate(self.patterns):
+            if pattern.needles and any(needle in lowered for needle in pattern.needles):
+                active.add(index)
+        if path is not None and self._file_globs:
+            filename = os.path.basename(path)
+            for index, globs in self._file_globs.items():
+                if index in active and not globs.match(filename):
+                    active.discard(index)
+        return frozenset(active)
+
+    def redact(
+        self, text: str, path: Optional[str] = None
+    ) -> Tuple[str, Dict[str, int]]:
+        """Replace all secrets in a text.
+
+        A substring search for the needles of each pattern comes first; the
+        regular expression scan only runs over the patterns that can match.
+
+        Args:
+            text: Text to scan
+            path: Path of the file the text was read from; patterns limited to
+                certain files are skipped for other files (all patterns are
+                applied if omitted)
+
+        Returns:
+            Tuple[str, Dict[str, int]]: Redacted text and the number of
+                replacements per pattern name
+        """
+        active = self._active(text, path)
+        if not active:
+            return text, {}
+
+        counts: Dict[str, int] = {}
+        patterns = self.patterns
+        secret_groups = self._secret_groups
+
+        def replace(match: Match) -> str:
+            # 外側のグループが最後に閉じるので、lastgroupはパターン番号を指す
+            index = int(match.lastgroup[1:])
+            name = patterns[index].name
+            counts[name] = counts.get(name, 0) + 1
+            marker = f"[REDACTED:{name}]"
+            group = secret_groups.get(index)
+            if group is None:
+                return marker
+            start, end = match.span(group)
+            offset = match.start()
+            matched = match.group()
+            return matched[: start - offset] + marker + matched[end - offset :]
+
+        return self._combined_regex(active).sub(replace, text), counts
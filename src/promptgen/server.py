@@ -0,0 +1,343 @@
+"""Resident prompt server over a Unix domain socket.
+
+The server keeps a warm ``GitignoreManager`` (the compiled .gitignore rules)
+per registered root, shared by the generators of all requests on that root,
+and answers JSON requests, one per connection. Changes are picked up with
+``GitignoreManager.refresh``, which only re-stats known files and directories.
+
+Protocol:
+    The client sends a single JSON object terminated by a newline::
+
+        {"dir": "/abs/path", "patterns": [".py"], "exclude_dirs": [],
+         "format": "text", "stream": false}
+
+    The server answers with a JSON line ``{"ok": true, "files": N,
+    "prompt": "..."}``. When ``stream`` is true the prompt is omitted from the
+    JSON line and sent as raw UTF-8 text after it, until the connection is
+    closed; the files are then read while the prompt is sent, so ``files``
+    counts the selected files. Errors are reported as
+    ``{"ok": false, "error": "..."}``.
+"""
+
+import codecs
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from promptgen.exceptions import ServerError
+from promptgen.generator import PromptGenerator
+from promptgen.gitignore import GitignoreManager
+from promptgen.logging import LOGGER
+
+# ストリーミング時の送信単位
+_CHUNK_SIZE = 64 * 1024
+
+
+class _RootState:
+    """Warm .gitignore rules and change tracking for one registered root."""
+
+    def __init__(self, manager: GitignoreManager):
+        self.manager = manager
+        self.checked_at = time.monotonic()
+        # 変更確認を1スレッドだけで行う
+        self.lock = threading.Lock()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handle a single JSON request."""
+
+    server: "PromptServer"
+    # 小さな断片をまとめて送信する（finishでフラッシュされる）
+    wbufsize = _CHUNK_SIZE
+
+    def handle(self) -> None:
+        """Read a request line and write the response."""
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            if request.get("stream"):
+                files, pieces = self.server.stream(request)
+            else:
+                files, prompt = self.server.generate(request)
+        except Exception as e:
+            self._send_json({"ok": False, "error": str(e)})
+            return
+
+        if request.get("stream"):
+            self._send_json({"ok": True, "files": files, "stream": True})
+            # ファイルを読みながら送信し、プロンプト全体を保持しない
+            for piece in pieces:
+                self.wfile.write(piece.encode("utf-8"))
+        else:
+            self._send_json({"ok": True, "files": files, "prompt": prompt})
+
+    def _send_json(self, payload: Dict[str, Any]) -> None:
+        """Write a JSON line to the client.
+
+        Args:
+            payload: Object to send
+        """
+        self.wfile.write(json.dumps(payload).encode("utf-8") + b"\n")
+
+
+class PromptServer(socketserver.UnixStreamServer):
+    """Unix socket server answering prompt requests from a worker pool."""
+
+    def __init__(
+        self,
+        socket_path: str,
+        max_workers: int = 4,
+        check_interval: float = 1.0,
+        default_patterns: Optional[List[str]] = None,
+    ):
+        """Initialize the server and bind the socket.
+
+        Args:
+            socket_path: Path of the Unix domain socket
+            max_workers: Number of worker threads handling requests
+            check_interval: Minimum seconds between two filesystem change
+                checks of the same root
+            default_patterns: Patterns used when a request does not specify any
+
+        Raises:
+            ServerError: If socket_path exists and is not a socket
+        """
+        try:
+            mode = os.lstat(socket_path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                raise ServerError(f"Not a socket: {socket_path}")
+            # 前回の異常終了で残ったソケットファイルを削除
+            os.unlink(socket_path)
+        self.socket_path = socket_path
+        self.check_interval = check_interval
+        self.default_patterns = default_patterns
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._roots: Dict[str, _RootState] = {}
+        self._roots_lock = threading.Lock()
+        super().__init__(socket_path, _RequestHandler)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        """Dispatch a connection to the worker pool."""
+        self._executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request: Any, client_address: Any) -> None:
+        """Handle a connection on a worker thread."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        """Close the socket, wait for workers and remove the socket file."""
+        super().server_close()
+        self._executor.shutdown(wait=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _root_state(self, base_dir: str) -> _RootState:
+        """Return the warm state for a root, refreshing it if the tree changed.
+
+        Args:
+            base_dir: Absolute root directory
+
+        Returns:
+            _RootState: Up to date state for the root
+        """
+        with self._roots_lock:
+            state = self._roots.get(base_dir)
+            if state is None:
+                state = self._roots[base_dir] = _RootState(GitignoreManager(base_dir))
+                return state
+
+        with state.lock:
+            now = time.monotonic()
+            if now - state.checked_at >= self.check_interval:
+                state.checked_at = now
+                changed = state.manager.refresh()
+                if changed:
+                    LOGGER.info("Reloaded .gitignore rules of %s", ", ".join(changed))
+        return state
+
+    def _generator(self, request: Dict[str, Any]) -> PromptGenerator:
+        """Create the generator of a request on the warm state of its root.
+
+        Args:
+            request: Decoded JSON request
+
+        Returns:
+            PromptGenerator: Generator with the request's patterns and excludes
+
+        Raises:
+            ValueError: If the request does not specify a directory
+        """
+        base_dir = request.get("dir")
+        if not base_dir:
+            raise ValueError("Request must specify 'dir'")
+        base_dir = os.path.abspath(base_dir)
+        if not os.path.isdir(base_dir):
+            raise NotADirectoryError(f"Directory not found: {base_dir}")
+        state = self._root_state(base_dir)
+        # パターン・除外はリクエストごと、.gitignoreルールはルートごとに共有する
+        return PromptGenerator(
+            base_dir=base_dir,
+            file_patterns=request.get("patterns") or self.default_patterns or [],
+            exclude_dirs=request.get("exclude_dirs") or [],
+            gitignore_manager=state.manager,
+        )
+
+    def generate(self, request: Dict[str, Any]) -> Tuple[int, str]:
+        """Generate a prompt for a request.
+
+        Args:
+            request: Decoded JSON request
+
+        Returns:
+            Tuple[int, str]: Number of collected files and the prompt text
+
+        Raises:
+            ValueError: If the request does not specify a directory
+        """
+        generator = self._generator(request)
+        files_content = generator.collect_files()
+        prompt = generator.generate_prompt(
+            files_content, request.get("format") or "text"
+        )
+        return len(files_content), prompt
+
+    def stream(self, request: Dict[str, Any]) -> Tuple[int, Iterator[str]]:
+        """Select the files of a request and prepare to stream its prompt.
+
+        The files are listed here and read one at a time while the returned
+        pieces are consumed.
+
+        Args:
+            request: Decoded JSON request
+
+        Returns:
+            Tuple[int, Iterator[str]]: Number of selected files and the
+                pieces of the prompt text
+
+        Raises:
+            ValueError: If the request does not specify a directory or the
+                output format is unknown
+        """
+        generator = self._generator(request)
+        paths = generator.list_files()
+        pieces = generator.iter_prompt(
+            output_format=request.get("format") or "text", paths=paths
+        )
+        return len(paths), pieces
+
+
+def _send_request(socket_path: str, request: Dict[str, Any]) -> socket.socket:
+    """Connect to the server and send a request.
+
+    Args:
+        socket_path: Path of the Unix domain socket
+        request: Request object
+
+    Returns:
+        socket.socket: Connected socket with the request sent
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socket_path)
+    sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+    return sock
+
+
+def request_prompt(
+    socket_path: str,
+    base_dir: str,
+    file_patterns: Optional[List[str]] = None,
+    exclude_dirs: Optional[List[str]] = None,
+    output_format: str = "text",
+) -> str:
+    """Request a prompt from a running server.
+
+    Args:
+        socket_path: Path of the Unix domain socket
+        base_dir: Base directory to search
+        file_patterns: File patterns to include (server defaults if omitted)
+        exclude_dirs: Directories to exclude
+        output_format: Output format (``text``, ``jsonl``, ``xml`` or
+            ``markdown``)
+
+    Returns:
+        str: Generated prompt
+
+    Raises:
+        ServerError: If the server reports an error
+    """
+    request = {
+        "dir": os.path.abspath(base_dir),
+        "patterns": file_patterns,
+        "exclude_dirs": exclude_dirs,
+        "format": output_format,
+    }
+    with _send_request(socket_path, request) as sock:
+        with sock.makefile("rb") as f:
+            response = json.loads(f.readline().decode("utf-8"))
+    if not response.get("ok"):
+        raise ServerError(response.get("error", "Unknown server error"))
+    return response["prompt"]
+
+
+def stream_prompt(
+    socket_path: str,
+    base_dir: str,
+    file_patterns: Optional[List[str]] = None,
+    exclude_dirs: Optional[List[str]] = None,
+    output_format: str = "text",
+) -> Iterator[str]:
+    """Request a prompt from a running server and yield it in chunks.
+
+    Args:
+        socket_path: Path of the Unix domain socket
+        base_dir: Base directory to search
+        file_patterns: File patterns to include (server defaults if omitted)
+        exclude_dirs: Directories to exclude
+        output_format: Output format (``text``, ``jsonl``, ``xml`` or
+            ``markdown``)
+
+    Yields:
+        str: Consecutive chunks of the prompt
+
+    Raises:
+        ServerError: If the server reports an error
+    """
+    request = {
+        "dir": os.path.abspath(base_dir),
+        "patterns": file_patterns,
+        "exclude_dirs": exclude_dirs,
+        "format": output_format,
+        "stream": True,
+    }
+    with _send_request(socket_path, request) as sock:
+        with sock.makefile("rb") as f:
+            response = json.loads(f.readline().decode("utf-8"))
+            if not response.get("ok"):
+                raise ServerError(response.get("error", "Unknown server error"))
+            # マルチバイト文字の途中で分割されてもよいように逐次デコードする
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            while True:
+                chunk = f.read1(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+            text = decoder.decode(b"", final=True)
+            if text:
+                yield text
@@ -0,0 +1,97 @@
+"""Run statistics for the promptgen package."""
+
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+# 計測対象のフェーズ
+PHASES = ("walk", "ignore", "read", "decode", "redact", "render")
+
+
+@dataclass
+class RunStats:
+    """Counters and timers collected during a single run.
+
+    Attributes:
+        entries_visited: Number of directory entries (files and directories) seen
+        dirs_pruned: Number of directories removed from the walk
+        ignore_checks: Number of .gitignore / exclude checks performed
+        files_matched: Number of files selected by the file patterns
+        files_read: Number of files successfully read and decoded
+        bytes_read: Total number of bytes read from disk
+        skipped: Number of skipped files keyed by reason
+        redactions: Number of redacted secrets keyed by pattern name
+        timings: Seconds spent in each phase (see ``PHASES``)
+        truncated: Name of the limit that stopped the run early, if any
+    """
+
+    entries_visited: int = 0
+    dirs_pruned: int = 0
+    ignore_checks: int = 0
+    files_matched: int = 0
+    files_read: int = 0
+    bytes_read: int = 0
+    skipped: Dict[str, int] = field(default_factory=dict)
+    redactions: Dict[str, int] = field(default_factory=dict)
+    timings: Dict[str, float] = field(
+        default_factory=lambda: {phase: 0.0 for phase in PHASES}
+    )
+    truncated: Optional[str] = None
+
+    def skip(self, reason: str, count: int = 1) -> None:
+        """Record skipped files.
+
+        Args:
+            reason: Short reason identifier (e.g. ``"ignored"``, ``"read_error"``)
+            count: Number of files skipped for this reason
+        """
+        self.skipped[reason] = self.skipped.get(reason, 0) + count
+
+    def redacted(self, counts: Dict[str, int]) -> None:
+        """Record redacted secrets.
+
+        Args:
+            counts: Number of replacements keyed by pattern name
+        """
+        for name, count in counts.items():
+            self.redactions[name] = self.redactions.get(name, 0) + count
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        """Add elapsed time to a phase.
+
+        Args:
+            phase: Phase name
+            seconds: Elapsed seconds
+        """
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block and add it to a phase.
+
+        Args:
+            name: Phase name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the statistics as a plain dictionary.
+
+        Returns:
+            Dict[str, Any]: JSON serialisable statistics
+        """
+        return asdict(self)
+
+    def to_json(self) -> str:
+        """Return the statistics as a JSON string.
+
+        Returns:
+            str: JSON encoded statistics
+        """
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
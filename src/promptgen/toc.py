@@ -0,0 +1,342 @@
+"""Byte-offset table of contents of a written prompt.
+
+While a prompt is written, the table of contents records where the content of
+each file starts in the output, how many bytes it takes and the SHA-256 of the
+original content. Saved next to the prompt as a sidecar file, it lets readers
+memory-map the prompt and slice one file's content out of it without scanning
+for section markers.
+
+Offsets and lengths count UTF-8 bytes of the uncompressed prompt as it was
+written. The range of a file covers its content as encoded by the output
+format: the raw text for ``text`` and ``markdown``, the escaped text for
+``xml`` (base64 for ``encoding="base64"`` elements) and the JSON string
+literal for ``jsonl``; ``PromptReader.read`` decodes it back.
+
+The sidecar is written as JSON when its name ends in ``.json`` and in a
+compact binary layout otherwise::
+
+    magic "PGTOC1" + newline, <QI total size and entry count, <B + format name,
+    then per file <QQ32sH offset, length, raw SHA-256 and path length + path
+"""
+
+import base64
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+_MAGIC = b"PGTOC1\n"
+_HEADER = struct.Struct("<QI")
+_FORMAT_LENGTH = struct.Struct("<B")
+_ENTRY = struct.Struct("<QQ32sH")
+_XML_UNESCAPES = {"&amp;": "&", "&lt;": "<", "&gt;": ">", "&quot;": '"'}
+_XML_ENTITY = re.compile(r"&(?:amp|lt|gt|quot);")
+# base64で埋め込まれた内容の直前に置かれる開始タグの末尾
+_XML_BASE64_TAG = b' encoding="base64">'
+
+
+class TocEntry(NamedTuple):
+    """Location of one file's content in a prompt.
+
+    Attributes:
+        path: Relative path of the file, ``/`` separated
+        offset: Byte offset of the encoded content in the prompt
+        length: Byte length of the encoded content
+        sha256: Hex SHA-256 of the original UTF-8 content
+    """
+
+    path: str
+    offset: int
+    length: int
+    sha256: str
+
+
+class TableOfContents:
+    """Byte offsets of the files in a prompt, filled while it is written."""
+
+    def __init__(self, output_format: str = "text"):
+        """Initialize an empty table of contents.
+
+        Args:
+            output_format: Output format of the prompt
+        """
+        self.output_format = output_format
+        self.size = 0
+        self.entries: Dict[str, TocEntry] = {}
+        self._pending: Optional[Tuple[str, str]] = None
+
+    def mark(self, path: str, content: str) -> None:
+        """Announce that the next written piece is the content of a file.
+
+        Args:
+            path: Relative path of the file
+            content: Original content of the file
+        """
+        self._pending = (path, hashlib.sha256(content.encode("utf-8")).hexdigest())
+
+    def advance(self, piece: str) -> None:
+        """Account for a piece written to the prompt.
+
+        Args:
+            piece: Text written to the output
+        """
+        size = len(piece.encode("utf-8"))
+        if self._pending is not None:
+            path, sha256 = self._pending
+            self.entries[path] = TocEntry(path, self.size, size, sha256)
+            self._pending = None
+        self.size += size
+
+    def __iter__(self) -> Iterator[TocEntry]:
+        """Iterate over the entries in output order."""
+        return iter(self.entries.values())
+
+    def __len__(self) -> int:
+        """Return the number of files."""
+        return len(self.entries)
+
+    def to_dict(self) -> Dict[str, object]:
+        """Return the table of contents as a plain dictionary.
+
+        Returns:
+            Dict[str, object]: JSON serialisable table of contents
+        """
+        return {
+            "version": 1,
+            "format": self.output_format,
+            "size": self.size,
+            "files": [entry._asdict() for entry in self],
+        }
+
+    def to_bytes(self) -> bytes:
+        """Return the table of contents in the compact binary layout.
+
+        Returns:
+            bytes: Encoded table of contents
+        """
+        format_name = self.output_format.encode("utf-8")
+        chunks = [
+            _MAGIC,
+            _HEADER.pack(self.size, len(self.entries)),
+            _FORMAT_LENGTH.pack(len(format_name)),
+            format_name,
+        ]
+        for entry in self:
+            path = entry.path.encode("utf-8")
+            chunks.append(
+                _ENTRY.pack(
+                    entry.offset, entry.length, bytes.fromhex(entry.sha256), len(path)
+                )
+            )
+            chunks.append(path)
+        return b"".join(chunks)
+
+    def save(self, path: str) -> None:
+        """Write the table of contents to a sidecar file.
+
+        Args:
+            path: Sidecar path; JSON if it ends in ``.json``, binary otherwise
+        """
+        if path.endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False)
+        else:
+            with open(path, "wb") as f:
+                f.write(self.to_bytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TableOfContents":
+        """Decode a table of contents in the binary layout.
+
+        Args:
+            data: Encoded table of contents
+
+        Returns:
+            TableOfContents: Decoded table of contents
+
+        Raises:
+            ValueError: If the data is not a valid table of contents
+        """
+        if not data.startswith(_MAGIC):
+            raise ValueError("Not a promptgen table of contents")
+        try:
+            position = len(_MAGIC)
+            size, count = _HEADER.unpack_from(data, position)
+            position += _HEADER.size
+            (format_length,) = _FORMAT_LENGTH.unpack_from(data, position)
+            position += _FORMAT_LENGTH.size
+            toc = cls(data[position : position + format_length].decode("utf-8"))
+            position += format_length
+            for _ in range(count):
+                offset, length, digest, path_length = _ENTRY.unpack_from(data, position)
+                position += _ENTRY.size
+                path = data[position : position + path_length].decode("utf-8")
+                position += path_length
+                if position > len(data):
+                    raise ValueError("Corrupt table of contents: truncated data")
+                toc.entries[path] = TocEntry(path, offset, length, digest.hex())
+        except (struct.error, UnicodeDecodeError) as e:
+            raise ValueError(f"Corrupt table of contents: {e}")
+        toc.size = size
+        return toc
+
+    @classmethod
+    def load(cls, path: str) -> "TableOfContents":
+        """Read a sidecar file written by ``save``.
+
+        Args:
+            path: Sidecar path (JSON or binary, detected from the content)
+
+        Returns:
+            TableOfContents: Loaded table of contents
+
+        Raises:
+            ValueError: If the file is not a valid table of contents
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if data.startswith(_MAGIC):
+            return cls.from_bytes(data)
+        try:
+            raw = json.loads(data.decode("utf-8"))
+            toc = cls(raw["format"])
+            toc.size = raw["size"]
+            for item in raw["files"]:
+                entry = TocEntry(
+                    item["path"], item["offset"], item["length"], item["sha256"]
+                )
+                toc.entries[entry.path] = entry
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid table of contents {path}: {e}")
+        return toc
+
+
+class PromptReader:
+    """Random access to the files of a prompt through its table of contents.
+
+    The prompt is memory-mapped, so reading one file touches only its bytes.
+    Close the reader (or use it as a context manager) to release the map.
+    """
+
+    def __init__(self, prompt_path: str, toc: Union[str, TableOfContents]):
+        """Open a prompt.
+
+        Args:
+            prompt_path: Path of the uncompressed prompt file
+            toc: Table of contents or the path of its sidecar file
+
+        Raises:
+            ValueError: If the prompt is shorter than the table of contents
+                says
+        """
+        self.toc = (
+            toc if isinstance(toc, TableOfContents) else TableOfContents.load(toc)
+        )
+        self._file = open(prompt_path, "rb")
+        try:
+            self._mmap: Optional[mmap.mmap] = None
+            size = os.fstat(self._file.fileno()).st_size
+            if size < self.toc.size:
+                raise ValueError(
+                    f"{prompt_path} is shorter than its table of contents "
+                    f"({self.toc.size} bytes)"
+                )
+            if size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self.close()
+            raise
+
+    def paths(self) -> List[str]:
+        """Return the relative paths of the files in output order.
+
+        Returns:
+            List[str]: Relative paths
+        """
+        return list(self.toc.entries)
+
+    def __contains__(self, path: object) -> bool:
+        """Return True if the prompt contains a file."""
+        return path in self.toc.entries
+
+    def raw(self, path: str) -> memoryview:
+        """Return the encoded content of a file without copying it.
+
+        Args:
+            path: Relative path of the file
+
+        Returns:
+            memoryview: Slice of the mapped prompt
+
+        Raises:
+            KeyError: If the prompt does not contain the file
+        """
+        entry = self.toc.entries[path]
+        if self._mmap is None:
+            return memoryview(b"")
+        return memoryview(self._mmap)[entry.offset : entry.offset + entry.length]
+
+    def read(self, path: str, verify: bool = False) -> str:
+        """Return the original content of a file.
+
+        Args:
+            path: Relative path of the file
+            verify: Check the content against its recorded SHA-256
+
+        Returns:
+            str: File content
+
+        Raises:
+            KeyError: If the prompt does not contain the file
+            ValueError: If ``verify`` is set and the content does not match
+        """
+        with self.raw(path) as data:
+            text = str(data, "utf-8")
+        output_format = self.toc.output_format
+        if output_format == "jsonl":
+            text = json.loads(text)
+        elif output_format == "xml":
+            if self._tag_end(path) == _XML_BASE64_TAG:
+                text = base64.b64decode(text).decode("utf-8")
+            else:
+                text = _XML_ENTITY.sub(lambda m: _XML_UNESCAPES[m.group()], text)
+        if verify:
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            if digest != self.toc.entries[path].sha256:
+                raise ValueError(f"Content of {path} does not match its SHA-256")
+        return text
+
+    def _tag_end(self, path: str) -> bytes:
+        """Return the bytes right before the content of an XML element.
+
+        Args:
+            path: Relative path of the file
+
+        Returns:
+            bytes: End of the opening tag, as long as ``_XML_BASE64_TAG``
+        """
+        offset = self.toc.entries[path].offset
+        if self._mmap is None or offset < len(_XML_BASE64_TAG):
+            return b""
+        return self._mmap[offset - len(_XML_BASE64_TAG) : offset]
+
+    def close(self) -> None:
+        """Release the memory map and the prompt file.
+
+        Views returned by ``raw()`` must be released first.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> "PromptReader":
+        """Return the reader for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Release the prompt file."""
+        self.close()
@@ -0,0 +1,156 @@
+"""Compact directory tree of the selected files.
+
+The tree is built from the relative paths the walker already produced (and,
+when contents are known, their sizes), so rendering it needs no filesystem
+access. Directories whose only entry is another directory are collapsed into
+one line (``src/promptgen/``), and the depth and the number of entries per
+directory can be capped.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional
+
+
+@dataclass
+class TreeOptions:
+    """Options of the directory tree overview.
+
+    Attributes:
+        max_depth: Maximum number of directory levels shown (collapsed chains
+            count as one level); deeper directories are summarised
+        max_width: Maximum number of entries shown per directory; the rest are
+            summarised in one line
+        stats: Show per-directory file counts and, when known, sizes
+    """
+
+    max_depth: Optional[int] = None
+    max_width: Optional[int] = None
+    stats: bool = False
+
+    def __post_init__(self) -> None:
+        """Validate the limits."""
+        for name in ("max_depth", "max_width"):
+            value = getattr(self, name)
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be >= 1, got {value}")
+
+
+class _Dir:
+    """Directory node with aggregated file counts and sizes."""
+
+    __slots__ = ("dirs", "files", "count", "size")
+
+    def __init__(self) -> None:
+        self.dirs: Dict[str, "_Dir"] = {}
+        self.files: Dict[str, Optional[int]] = {}
+        self.count = 0
+        self.size = 0
+
+
+def format_size(size: int) -> str:
+    """Format a byte count for humans.
+
+    Args:
+        size: Size in bytes
+
+    Returns:
+        str: Size such as ``512 B`` or ``1.5 KiB``
+    """
+    if size < 1024:
+        return f"{size} B"
+    value = float(size)
+    for unit in ("KiB", "MiB", "GiB"):
+        value /= 1024
+        if value < 1024 or unit == "GiB":
+            break
+    return f"{value:.1f} {unit}"
+
+
+class _TreeRenderer:
+    """Render a ``_Dir`` hierarchy into tree lines."""
+
+    def __init__(self, options: TreeOptions, has_sizes: bool):
+        self.options = options
+        self.has_sizes = has_sizes
+        self.lines: List[str] = []
+
+    def dir_label(self, name: str, node: _Dir, truncated: bool) -> str:
+        if not (self.options.stats or truncated):
+            return name
+        unit = "file" if node.count == 1 else "files"
+        details = f"{node.count} {unit}"
+        if self.has_sizes:
+            details += f", {format_size(node.size)}"
+        return f"{name} ({details})"
+
+    def file_label(self, name: str, size: Optional[int]) -> str:
+        if self.options.stats and size is not None:
+            return f"{name} ({format_size(size)})"
+        return name
+
+    def render(self, node: _Dir, indent: str, depth: int) -> None:
+        options = self.options
+        entries = [(name, child) for name, child in sorted(node.dirs.items())]
+        entries += [(name, None) for name in sorted(node.files)]
+        if options.max_width is not None and len(entries) > options.max_width:
+            shown, hidden = entries[: options.max_width], entries[options.max_width :]
+        else:
+            shown, hidden = entries, []
+
+        for position, (name, child) in enumerate(shown):
+            last = position == len(shown) - 1 and not hidden
+            branch = indent + ("└── " if last else "├── ")
+            if child is None:
+                self.lines.append(branch + self.file_label(name, node.files[name]))
+                continue
+            # 単一のサブディレクトリだけを持つ連鎖を1行にまとめる
+            while len(child.dirs) == 1 and not child.files:
+                ((sub_name, child),) = child.dirs.items()
+                name += "/" + sub_name
+            truncated = options.max_depth is not None and depth >= options.max_depth
+            self.lines.append(branch + self.dir_label(name + "/", child, truncated))
+            if not truncated:
+                self.render(child, indent + ("    " if last else "│   "), depth + 1)
+
+        if hidden:
+            count = sum(1 if child is None else child.count for _, child in hidden)
+            entries_unit = "entry" if len(hidden) == 1 else "entries"
+            unit = "file" if count == 1 else "files"
+            self.lines.append(
+                f"{indent}└── … {len(hidden)} more {entries_unit} ({count} {unit})"
+            )
+
+
+def render_tree(
+    paths: Iterable[str],
+    sizes: Optional[Mapping[str, int]] = None,
+    options: Optional[TreeOptions] = None,
+) -> str:
+    """Render a directory tree of files.
+
+    Args:
+        paths: Relative file paths, ``/`` separated
+        sizes: File sizes in bytes by relative path, if known
+        options: Depth, width and statistics options
+
+    Returns:
+        str: Tree text, one entry per line, ending with a newline
+    """
+    options = options or TreeOptions()
+    root = _Dir()
+    for path in paths:
+        size = sizes.get(path, 0) if sizes is not None else None
+        parts = path.split("/")
+        node = root
+        node.count += 1
+        node.size += size or 0
+        for part in parts[:-1]:
+            node = node.dirs.setdefault(part, _Dir())
+            node.count += 1
+            node.size += size or 0
+        node.files[parts[-1]] = size
+
+    renderer = _TreeRenderer(options, sizes is not None)
+    renderer.lines.append(renderer.dir_label("./", root, False))
+    renderer.render(root, "", 1)
+    return "\n".join(renderer.lines) + "\n"
@@ -0,0 +1,29 @@
+"""Shared fixtures for the test suite."""
+
+from pathlib import Path
+from typing import Callable, Mapping
+
+import pytest
+
+TreeFactory = Callable[[Path, Mapping[str, str]], Path]
+
+
+@pytest.fixture
+def make_tree() -> TreeFactory:
+    """Return a function writing files below a directory.
+
+    The function takes the base directory and a mapping of ``/`` separated
+    relative paths to contents, creates missing parent directories, writes
+    each content as UTF-8 without newline translation and returns the base
+    directory.
+    """
+
+    def make(base_dir: Path, files: Mapping[str, str]) -> Path:
+        base_dir = Path(base_dir)
+        for path, content in files.items():
+            file_path = base_dir / path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_bytes(content.encode("utf-8"))
+        return base_dir
+
+    return make
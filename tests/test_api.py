@@ -110,3 +110,13 @@ def test_api_error_handling():
             base_dir=".",
             file_patterns=[],
         )
+
+
+def test_api_lazy_attributes():
+    """Test lazily resolved package attributes."""
+    import promptgen
+
+    assert promptgen.PromptGenerator is PromptGenerator
+    assert "RunStats" in dir(promptgen)
+    with pytest.raises(AttributeError):
+        promptgen.NoSuchAttribute
@@ -0,0 +1,129 @@
+"""Test cases for batch generation."""
+
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from promptgen.batch import BatchJob, BatchRunner, load_batch_config
+from promptgen.cli import main
+from promptgen.exceptions import ConfigError
+
+
+def create_repos(base_dir):
+    """Create two small repositories for batch jobs."""
+    for name in ("repo_a", "repo_b"):
+        repo = base_dir / name
+        repo.mkdir()
+        (repo / "main.py").write_text(f"print('{name}')")
+        (repo / "README.md").write_text(f"# {name}")
+        (repo / ".gitignore").write_text("*.log\n")
+        (repo / "debug.log").write_text("log")
+
+
+def test_load_batch_config():
+    """Test job resolution with defaults and relative paths."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        config = base_dir / "batch.toml"
+        config.write_text(
+            "workers = 3\n"
+            "[defaults]\n"
+            'patterns = [".py"]\n'
+            "[[jobs]]\n"
+            'dir = "repo_a"\n'
+            'output = "out/a.txt"\n'
+            "[[jobs]]\n"
+            'name = "b"\n'
+            'dir = "repo_b"\n'
+            'patterns = [".md"]\n'
+            'exclude_dirs = ["docs"]\n'
+            'output = "out/b.txt"\n'
+        )
+
+        loaded = load_batch_config(str(config))
+        assert loaded["workers"] == 3
+        job_a, job_b = loaded["jobs"]
+        assert job_a.name == "repo_a"
+        assert job_a.base_dir == str(base_dir / "repo_a")
+        assert job_a.file_patterns == [".py"]
+        assert job_a.output == str(base_dir / "out" / "a.txt")
+        assert job_b.file_patterns == [".md"]
+        assert job_b.exclude_dirs == ["docs"]
+
+
+def test_load_batch_config_errors():
+    """Test invalid batch configurations."""
+    with TemporaryDirectory() as temp_dir:
+        config = Path(temp_dir) / "batch.json"
+
+        config.write_text('{"jobs": []}')
+        with pytest.raises(ConfigError) as excinfo:
+            load_batch_config(str(config))
+        assert "No jobs defined" in str(excinfo.value)
+
+        config.write_text('{"jobs": [{"dir": "repo"}]}')
+        with pytest.raises(ConfigError) as excinfo:
+            load_batch_config(str(config))
+        assert "missing 'output'" in str(excinfo.value)
+
+
+def test_batch_runner_shares_gitignore_managers():
+    """Test that jobs on the same directory share loaded .gitignore rules."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        create_repos(base_dir)
+        repo = str(base_dir / "repo_a")
+        jobs = [
+            BatchJob("py", repo, [".py"], str(base_dir / "py.txt")),
+            BatchJob("md", repo, [".md", ".log"], str(base_dir / "md.txt")),
+            BatchJob("missing", str(base_dir / "nope"), [".py"], "unused.txt"),
+        ]
+
+        runner = BatchRunner(max_workers=2)
+        results = runner.run(jobs)
+
+        assert [result.files for result in results] == [1, 1, 0]
+        assert results[1].stats.skipped["ignored"] == 1
+        assert "Directory not found" in results[2].error
+        assert len(runner._managers) == 1
+        assert "print('repo_a')" in (base_dir / "py.txt").read_text()
+
+
+def test_cli_batch(capsys):
+    """Test the batch subcommand."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        create_repos(base_dir)
+        config = base_dir / "batch.json"
+        config.write_text(
+            json.dumps(
+                {
+                    "defaults": {"patterns": [".py"]},
+                    "jobs": [
+                        {"dir": "repo_a", "output": "out/a.txt"},
+                        {"dir": "repo_b", "output": "out/b.txt"},
+                    ],
+                }
+            )
+        )
+
+        assert main(["batch", str(config), "--workers", "2"]) == 0
+
+        lines = capsys.readouterr().out.strip().splitlines()
+        reports = [json.loads(line) for line in lines]
+        assert [report["name"] for report in reports] == ["repo_a", "repo_b"]
+        assert all(report["files"] == 1 for report in reports)
+        assert reports[0]["stats"]["files_read"] == 1
+        assert "print('repo_b')" in (base_dir / "out" / "b.txt").read_text()
+
+
+def test_cli_batch_failure(capsys):
+    """Test the batch subcommand exit code when a job fails."""
+    with TemporaryDirectory() as temp_dir:
+        config = Path(temp_dir) / "batch.json"
+        config.write_text('{"jobs": [{"dir": "missing", "output": "out.txt"}]}')
+
+        assert main(["batch", str(config)]) == 1
+        assert "Error in job missing" in capsys.readouterr().err
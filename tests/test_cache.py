@@ -0,0 +1,28 @@
+"""Test cases for cache locations."""
+
+import os
+from tempfile import TemporaryDirectory
+
+from promptgen.cache import CACHE_DIR_ENV, cache_root, project_cache_dir
+
+
+def test_cache_root(monkeypatch):
+    """Test cache root resolution from the environment."""
+    monkeypatch.setenv(CACHE_DIR_ENV, "/tmp/promptgen-cache")
+    assert cache_root() == "/tmp/promptgen-cache"
+
+    monkeypatch.delenv(CACHE_DIR_ENV)
+    monkeypatch.setenv("XDG_CACHE_HOME", "/tmp/xdg")
+    assert cache_root() == os.path.join("/tmp/xdg", "promptgen")
+
+
+def test_project_cache_dir():
+    """Test that each project gets its own cache directory."""
+    with TemporaryDirectory() as temp_dir:
+        first = project_cache_dir("/projects/app", root=temp_dir)
+        second = project_cache_dir("/other/app", root=temp_dir)
+
+        assert os.path.isdir(first)
+        assert first != second
+        assert os.path.basename(first).startswith("app-")
+        assert project_cache_dir("/projects/app", root=temp_dir) == first
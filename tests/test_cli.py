@@ -1,5 +1,11 @@
 """Test cases for command line interface."""
 
+import gzip
+import io
+import json
+import pstats
+import subprocess
+import sys
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
@@ -150,3 +156,218 @@ def test_cli_unexpected_error(capsys, monkeypatch):
 
     captured = capsys.readouterr()
     assert "Error: Mock error" in captured.err
+
+
+def test_cli_stats_json(capsys):
+    """Test CLI run statistics output."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        test_py = base_dir / "test.py"
+        test_py.write_text("print('test')")
+
+        args = ["--dir", str(base_dir), "--stats", "json"]
+        assert main(args) == 0
+
+        captured = capsys.readouterr()
+        stats = json.loads(captured.err)
+        assert stats["files_read"] == 1
+        assert "walk" in stats["timings"]
+
+
+def test_cli_profile():
+    """Test CLI cProfile output."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        test_py = base_dir / "test.py"
+        test_py.write_text("print('test')")
+        profile_file = base_dir / "out.pstats"
+
+        args = ["--dir", str(base_dir), "--profile", str(profile_file)]
+        assert main(args) == 0
+
+        stats = pstats.Stats(str(profile_file))
+        assert stats.total_calls > 0
+
+
+# promptgen.cliのインポートに許容する累積時間（マイクロ秒）
+# 遅延インポート導入前は約120ms（うちpathspecが約70ms）だった
+IMPORT_TIME_BUDGET_US = 60000
+
+
+def test_cli_import_time_budget():
+    """Test that importing the CLI stays lazy and within the time budget."""
+    code = (
+        "import sys, promptgen.cli; "
+        "print(','.join(m for m in ('pathspec', 'dataclasses', 'promptgen.generator')"
+        " if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # 重い依存関係は読み込まれていないこと
+    assert result.stdout.strip() == ""
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[0].startswith("import time:"):
+            try:
+                cumulative[parts[2].strip()] = int(parts[1])
+            except ValueError:
+                continue
+    assert cumulative["promptgen.cli"] < IMPORT_TIME_BUDGET_US
+
+
+def test_cli_compressed_output():
+    """Test compressed output selected by the file suffix."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        test_py = base_dir / "test.py"
+        test_py.write_text("print('test')")
+        output_file = base_dir / "prompt.txt.gz"
+
+        args = [
+            "--dir",
+            str(base_dir),
+            "--output",
+            str(output_file),
+            "--compress-level",
+            "6",
+        ]
+        assert main(args) == 0
+
+        with gzip.open(str(output_file), "rt", encoding="utf-8") as f:
+            content = f.read()
+        assert "=== test.py ===" in content
+        assert "print('test')" in content
+
+
+def test_cli_format_xml(capsys):
+    """Test CLI structured output format."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        test_py = base_dir / "test.py"
+        test_py.write_text("if a < b:\n    pass\n")
+
+        args = ["--dir", str(base_dir), "--format", "xml"]
+        assert main(args) == 0
+
+        captured = capsys.readouterr()
+        assert '<file path="test.py"' in captured.out
+        assert "if a &lt; b:" in captured.out
+        assert captured.out.endswith("</files>\n")
+
+
+def test_cli_read_errors_stay_off_stdout(capsys, caplog):
+    """Test that unreadable files do not corrupt a prompt written to stdout."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "a.py").write_text("a = 1\n")
+        (base_dir / "b.py").write_bytes(b"\xff\xfe invalid utf-8\n")
+        (base_dir / "c.py").write_text("c = 3\n")
+
+        args = ["--dir", str(base_dir), "--format", "jsonl"]
+        assert main(args) == 0
+
+        captured = capsys.readouterr()
+        records = [json.loads(line) for line in captured.out.splitlines()]
+        assert [record["path"] for record in records] == ["a.py", "c.py"]
+        assert "Error reading file" in caplog.text
+        assert str(base_dir / "b.py") in caplog.text
+
+
+def test_cli_tree(capsys):
+    """Test CLI directory tree overview."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "pkg" / "sub").mkdir(parents=True)
+        (base_dir / "pkg" / "sub" / "mod.py").write_text("x = 1")
+
+        args = ["--dir", str(base_dir), "--tree", "--tree-depth", "1"]
+        assert main(args) == 0
+
+        captured = capsys.readouterr()
+        assert "./\n└── pkg/sub/ (1 file)\n" in captured.out
+
+
+def test_cli_redact(capsys):
+    """Test CLI secret redaction with a custom pattern."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "settings.py").write_text("PASSWORD = 'hunter22'\nID = 'X-1234'\n")
+
+        args = ["--dir", str(base_dir), "--redact-pattern", r"X-\d+"]
+        assert main(args) == 0
+
+        captured = capsys.readouterr()
+        assert "PASSWORD = '[REDACTED:quoted_assignment]'" in captured.out
+        assert "ID = '[REDACTED:custom1]'" in captured.out
+
+
+def test_cli_dry_run(capsys):
+    """Test CLI dry run report."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "test.py").write_text("print('test')")
+
+        assert main(["--dir", str(base_dir), "--dry-run"]) == 0
+        captured = capsys.readouterr()
+        assert captured.out.startswith("Files: 1\n")
+        assert "print('test')" not in captured.out
+
+        assert main(["--dir", str(base_dir), "--dry-run", "json"]) == 0
+        report = json.loads(capsys.readouterr().out)
+        assert report["bytes"] == len("print('test')")
+
+
+def test_cli_toc(capsys):
+    """Test CLI table of contents sidecar."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        (base_dir / "test.py").write_text("print('test')")
+        output_file = Path(temp_dir) / "prompt.txt"
+        toc_file = Path(temp_dir) / "prompt.toc.json"
+
+        args = ["--dir", str(base_dir), "--output", str(output_file)]
+        assert main(args + ["--toc", str(toc_file)]) == 0
+        toc = json.loads(toc_file.read_text())
+        (entry,) = toc["files"]
+        data = output_file.read_bytes()
+        assert data[entry["offset"] : entry["offset"] + entry["length"]] == (
+            b"print('test')"
+        )
+
+        # 圧縮出力や標準出力ではオフセットを記録できない
+        assert main(["--dir", str(base_dir), "--toc", str(toc_file)]) == 1
+        assert "--toc requires" in capsys.readouterr().err
+
+
+def test_cli_files_from(capsys, monkeypatch):
+    """Test reading the file list from stdin."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "a.py").write_text("print('a')")
+        (base_dir / "b.py").write_text("print('b')")
+        (base_dir / "notes.txt").write_text("notes")
+
+        stdin = io.TextIOWrapper(io.BytesIO(b"b.py\0notes.txt\0"))
+        monkeypatch.setattr(sys, "stdin", stdin)
+        assert main(["--dir", temp_dir, "--files-from", "-"]) == 0
+        output = capsys.readouterr().out
+        assert "=== b.py ===" in output
+        assert "a.py" not in output
+        assert "notes.txt" not in output
+
+        list_file = base_dir / "files.txt"
+        list_file.write_text("notes.txt\n")
+        args = ["--dir", temp_dir, "--files-from", str(list_file), "--no-filters"]
+        assert main(args) == 0
+        assert "=== notes.txt ===" in capsys.readouterr().out
+
+        assert main(args + ["--query", "x"]) == 1
+        assert "cannot be combined" in capsys.readouterr().err
@@ -0,0 +1,53 @@
+"""Test cases for configuration loading."""
+
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from promptgen.config import load_config, resolve_path
+from promptgen.exceptions import ConfigError
+
+
+def test_load_config_toml_and_json():
+    """Test loading TOML and JSON configuration files."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        toml_file = base_dir / "config.toml"
+        toml_file.write_text('workers = 2\n[[jobs]]\ndir = "a"\n')
+        json_file = base_dir / "config.json"
+        json_file.write_text('{"workers": 2, "jobs": [{"dir": "a"}]}')
+
+        assert load_config(str(toml_file)) == load_config(str(json_file))
+
+
+def test_load_config_errors():
+    """Test configuration error handling."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+
+        with pytest.raises(ConfigError) as excinfo:
+            load_config(str(base_dir / "missing.toml"))
+        assert "Error reading" in str(excinfo.value)
+
+        invalid_toml = base_dir / "invalid.toml"
+        invalid_toml.write_text("jobs = [")
+        with pytest.raises(ConfigError) as excinfo:
+            load_config(str(invalid_toml))
+        assert "Invalid TOML" in str(excinfo.value)
+
+        invalid_json = base_dir / "invalid.json"
+        invalid_json.write_text("[1, 2]")
+        with pytest.raises(ConfigError) as excinfo:
+            load_config(str(invalid_json))
+        assert "must be a table/object" in str(excinfo.value)
+
+
+def test_resolve_path():
+    """Test resolving paths relative to the configuration file."""
+    config_path = os.path.join("/etc", "promptgen", "batch.toml")
+    assert resolve_path("repo", config_path) == os.path.join(
+        "/etc", "promptgen", "repo"
+    )
+    assert resolve_path("/abs/repo", config_path) == "/abs/repo"
@@ -0,0 +1,138 @@
+"""Test cases for memory-bounded content mappings."""
+
+import os
+
+import pytest
+
+from promptgen.contents import (
+    CompactContents,
+    FileRecord,
+    FileStat,
+    LazyContents,
+    SpilledContents,
+)
+
+
+def test_lazy_contents_reads_on_access():
+    """Test that contents are read on access only."""
+    reads = []
+    data = {"a.py": "print('a')", "b.py": None}
+
+    def read(path):
+        reads.append(path)
+        return data[path]
+
+    contents = LazyContents(read)
+    contents.add("a.py", FileStat(10, 1))
+    contents.add("b.py", FileStat(0, 2))
+
+    assert len(contents) == 2
+    assert "b.py" in contents
+    assert contents.stat("a.py") == FileStat(10, 1)
+    assert reads == []
+
+    assert contents["a.py"] == "print('a')"
+    assert reads == ["a.py"]
+    # 読み込めないファイルはitems()では除外され、直接参照ではKeyError
+    assert dict(contents.items()) == {"a.py": "print('a')"}
+    assert list(contents.values()) == ["print('a')"]
+    with pytest.raises(KeyError):
+        contents["b.py"]
+    assert contents.get("missing.py") is None
+
+
+def test_spilled_contents_budget():
+    """Test that contents beyond the budget are spilled to disk."""
+    with SpilledContents(memory_budget=10) as contents:
+        contents.add("small.py", "x = 1")
+        contents.add("large.py", "こんにちは" * 100)
+        contents.add("tiny.py", "y")
+        contents.finish()
+
+        assert not contents.is_spilled("small.py")
+        assert contents.is_spilled("large.py")
+        assert not contents.is_spilled("tiny.py")
+        assert contents.memory_used == 6
+        assert contents.spilled_bytes == len(("こんにちは" * 100).encode("utf-8"))
+
+        assert list(contents) == ["small.py", "large.py", "tiny.py"]
+        assert contents["large.py"] == "こんにちは" * 100
+        with contents.view("large.py") as view:
+            assert bytes(view[:3]).decode("utf-8") == "こ"
+        assert dict(contents)["small.py"] == "x = 1"
+
+
+def test_spilled_contents_invalid_budget():
+    """Test validation of the memory budget."""
+    with pytest.raises(ValueError):
+        SpilledContents(memory_budget=-1)
+
+
+def test_compact_contents_records():
+    """Test the sorted record mapping and its shared path components."""
+    base_dir = os.path.abspath(os.sep + "project")
+    contents = CompactContents(base_dir)
+    files = {
+        os.path.join(base_dir, "src", "pkg", "__init__.py"): "",
+        os.path.join(base_dir, "src", "a.py"): "a",
+        os.path.join(base_dir, "main.py"): "main",
+        os.path.join(base_dir, "src", "__init__.py"): "init",
+        os.path.join(base_dir, "src.py"): "src",
+    }
+    for path, content in files.items():
+        contents.add(path, content, len(content))
+    contents.finish()
+
+    assert list(contents) == sorted(files)
+    assert contents == files
+    assert dict(contents.items()) == files
+    assert list(contents.values()) == [files[path] for path in sorted(files)]
+    assert contents[os.path.join(base_dir, "src", "a.py")] == "a"
+    assert os.path.join(base_dir, "src", "b.py") not in contents
+    assert "relative.py" not in contents
+    with pytest.raises(KeyError):
+        contents[os.path.join(base_dir, "missing.py")]
+
+    # ディレクトリは一度だけ保持し、同じファイル名は同じ文字列を共有する
+    assert sorted(contents.directories) == ["", "src", "src/pkg"]
+    init_files = [r for r in contents.records if r.name == "__init__.py"]
+    assert init_files[0].name is init_files[1].name
+    assert not hasattr(contents.records[0], "__dict__")
+    assert isinstance(contents.record(os.path.join(base_dir, "main.py")), FileRecord)
+    assert list(contents.sections())[0] == ("main.py", "main")
+
+    with pytest.raises(ValueError):
+        contents.add(os.path.abspath(os.sep + "elsewhere.py"), "", 0)
+
+
+def test_compact_contents_mutable_mapping():
+    """Test that the default collect_files result can be updated like a dict."""
+    base_dir = os.path.abspath(os.sep + "project")
+    contents = CompactContents(base_dir)
+    for name in ("b.py", "d.py"):
+        contents.add(os.path.join(base_dir, name), name, len(name))
+    contents.finish()
+
+    contents.update(
+        {
+            os.path.join(base_dir, "b.py"): "changed",
+            os.path.join(base_dir, "pkg", "c.py"): "c",
+            os.path.join(base_dir, "a.py"): "a",
+        }
+    )
+    assert contents.pop(os.path.join(base_dir, "d.py")) == "d.py"
+    del contents[os.path.join(base_dir, "a.py")]
+
+    expected = {
+        os.path.join(base_dir, "b.py"): "changed",
+        os.path.join(base_dir, "pkg", "c.py"): "c",
+    }
+    assert contents == expected
+    assert list(contents) == sorted(expected)
+    assert contents.record(os.path.join(base_dir, "b.py")).size == len("changed")
+    assert list(contents.sections())[1] == (os.path.join("pkg", "c.py"), "c")
+    assert dict(contents) == expected
+    with pytest.raises(KeyError):
+        del contents[os.path.join(base_dir, "missing.py")]
+    with pytest.raises(ValueError):
+        contents[os.path.abspath(os.sep + "elsewhere.py")] = ""
@@ -0,0 +1,195 @@
+"""Test cases for dependency-closure selection."""
+
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from promptgen.cache import CACHE_DIR_ENV
+from promptgen.cli import main
+from promptgen.deps import (
+    ImportCache,
+    dependency_closure,
+    js_imports,
+    python_imports,
+    resolve_js,
+    resolve_python,
+)
+from promptgen.generator import PromptGenerator
+
+PROJECT = {
+    "service/main.py": "import os\nfrom service import handlers\nfrom .util import x\n",
+    "service/__init__.py": "",
+    "service/util.py": "from . import constants\n",
+    "service/constants.py": "X = 1\n",
+    "service/handlers/__init__.py": "from .users import *\n",
+    "service/handlers/users.py": "import service.db.models\n",
+    "service/db/__init__.py": "",
+    "service/db/models.py": "import requests\n",
+    "service/unused.py": "import service.constants\n",
+    "web/app.ts": (
+        "import { api } from './api';\n"
+        "import './styles.css';\n"
+        "export * from './types.js';\n"
+        "const lazy = import('./lazy');\n"
+        "import React from 'react';\n"
+    ),
+    "web/api/index.ts": "const cfg = require('../config.json');\n",
+    "web/types.ts": "export type T = string;\n",
+    "web/lazy.tsx": "",
+    "web/styles.css": "body {}\n",
+    "web/config.json": "{}\n",
+    "web/other.ts": "",
+}
+
+
+def _relative(base_dir: Path, paths):
+    return sorted(
+        os.path.relpath(path, str(base_dir)).replace(os.sep, "/") for path in paths
+    )
+
+
+def test_python_imports():
+    """Test extracting Python imports with ast."""
+    source = (
+        "import os, a.b\n"
+        "from . import sibling\n"
+        "from ..pkg import name as alias\n"
+        "from mod import *\n"
+        "def f():\n"
+        "    import lazy\n"
+    )
+    assert python_imports(source) == [
+        "os",
+        "a.b",
+        ".",
+        ".sibling",
+        "..pkg",
+        "..pkg.name",
+        "mod",
+        "lazy",
+    ]
+    assert python_imports("def broken(:\n") == []
+
+
+def test_js_imports():
+    """Test scanning relative JavaScript/TypeScript imports."""
+    source = (
+        "import a from './a';\n"
+        'import { b } from "../b";\n'
+        "import './side-effect';\n"
+        "export { c } from './c';\n"
+        "const d = require('./d');\n"
+        "const e = await import('./e');\n"
+        "import f from 'package';\n"
+    )
+    assert js_imports(source) == [
+        "./a",
+        "../b",
+        "./side-effect",
+        "./c",
+        "./d",
+        "./e",
+    ]
+
+
+def test_resolve_imports(make_tree):
+    """Test resolving imports against the project tree."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        make_tree(base_dir, PROJECT)
+        main_py = str(base_dir / "service" / "main.py")
+
+        assert _relative(
+            base_dir, resolve_python("service.db.models", main_py, [temp_dir])
+        ) == ["service/__init__.py", "service/db/__init__.py", "service/db/models.py"]
+        assert _relative(base_dir, resolve_python(".util", main_py, [temp_dir])) == [
+            "service/util.py"
+        ]
+        assert resolve_python("os", main_py, [temp_dir]) == []
+
+        app_ts = str(base_dir / "web" / "app.ts")
+        assert _relative(base_dir, resolve_js("./api", app_ts)) == ["web/api/index.ts"]
+        assert _relative(base_dir, resolve_js("./types.js", app_ts)) == ["web/types.ts"]
+        assert resolve_js("./missing", app_ts) == []
+
+
+def test_dependency_closure_and_cache(make_tree):
+    """Test the closure and reuse of cached import lists."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        make_tree(base_dir, PROJECT)
+        cache_path = os.path.join(temp_dir, "imports.sqlite3")
+        entries = [str(base_dir / "service" / "main.py"), str(base_dir / "web/app.ts")]
+
+        with ImportCache(cache_path) as cache:
+            closure = dependency_closure(entries, str(base_dir), cache)
+            assert cache.parsed == 11
+        assert _relative(base_dir, closure) == [
+            "service/__init__.py",
+            "service/constants.py",
+            "service/db/__init__.py",
+            "service/db/models.py",
+            "service/handlers/__init__.py",
+            "service/handlers/users.py",
+            "service/main.py",
+            "service/util.py",
+            "web/api/index.ts",
+            "web/app.ts",
+            "web/config.json",
+            "web/lazy.tsx",
+            "web/styles.css",
+            "web/types.ts",
+        ]
+
+        # 変更のないツリーではファイルを読み込まない
+        with ImportCache(cache_path) as cache:
+            assert dependency_closure(entries, str(base_dir), cache) == closure
+            assert (cache.parsed, cache.files_read) == (0, 0)
+
+        # 内容が同じファイルは解析済みの結果を再利用する
+        (base_dir / "service" / "copy.py").write_text(PROJECT["service/util.py"])
+        (base_dir / "service" / "main.py").write_text("from . import copy\n")
+        with ImportCache(cache_path) as cache:
+            closure = dependency_closure(entries[:1], str(base_dir), cache)
+            assert (cache.parsed, cache.files_read) == (1, 2)
+        assert _relative(base_dir, closure) == [
+            "service/__init__.py",
+            "service/constants.py",
+            "service/copy.py",
+            "service/main.py",
+        ]
+
+
+def test_generator_dependency_closure(monkeypatch, make_tree):
+    """Test the generator API and the CLI option."""
+    with TemporaryDirectory() as temp_dir:
+        monkeypatch.setenv(CACHE_DIR_ENV, os.path.join(temp_dir, "cache"))
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        make_tree(base_dir, PROJECT)
+        (base_dir / ".gitignore").write_text("service/db/\n")
+        (base_dir / "pyproject.toml").write_text("[project]\n")
+
+        generator = PromptGenerator(str(base_dir), [".py"])
+        paths = generator.dependency_closure(["service/handlers/users.py"])
+        # .gitignoreで除外されたファイルは辿らない
+        assert _relative(base_dir, paths) == [
+            "service/__init__.py",
+            "service/handlers/users.py",
+        ]
+
+        with pytest.raises(FileNotFoundError):
+            generator.dependency_closure(["missing.py"])
+
+        output_file = Path(temp_dir) / "prompt.txt"
+        args = ["--dir", str(base_dir), "--output", str(output_file)]
+        args += ["--entry", "service/util.py", "--entry", "pyproject.toml"]
+        assert main(args) == 0
+        prompt = output_file.read_text()
+        assert "=== service/util.py ===" in prompt
+        assert "=== service/constants.py ===" in prompt
+        assert "=== pyproject.toml ===" in prompt
+        assert "=== service/main.py ===" not in prompt
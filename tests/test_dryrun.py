@@ -0,0 +1,43 @@
+"""Test cases for the stat-only dry run report."""
+
+import json
+
+from promptgen.dryrun import DryRunReport, estimate_tokens
+
+
+def test_estimate_tokens():
+    """Test token estimates from byte sizes."""
+    assert estimate_tokens(0) == 0
+    assert estimate_tokens(1) == 1
+    assert estimate_tokens(4000) == 1000
+
+
+def test_dry_run_report():
+    """Test aggregation per directory, file and pattern."""
+    report = DryRunReport.from_sizes(
+        [
+            ("a/b/one.py", 1000, ".py"),
+            ("a/two.py", 3000, ".py"),
+            ("c/three.md", 2000, ".md"),
+            ("top.txt", 10, None),
+        ],
+        top=2,
+    )
+
+    assert report.files == 4
+    assert report.bytes == 6010
+    assert [(d.name, d.files, d.bytes) for d in report.directories] == [
+        ("a/", 2, 4000),
+        ("c/", 1, 2000),
+    ]
+    assert [f.name for f in report.largest_files] == ["a/two.py", "c/three.md"]
+    assert [(p.name, p.bytes) for p in report.patterns] == [
+        (".py", 4000),
+        (".md", 2000),
+    ]
+
+    data = json.loads(report.to_json())
+    assert data["tokens"] == 1503
+    text = report.format()
+    assert text.startswith("Files: 4\nSize: 5.9 KiB (6,010 bytes)")
+    assert "Heaviest directories:" in text
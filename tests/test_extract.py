@@ -0,0 +1,84 @@
+"""Test cases for windowed extraction."""
+
+import tempfile
+
+import pytest
+
+from promptgen.exceptions import PatternError
+from promptgen.extract import (
+    ExtractionRules,
+    ExtractPolicy,
+    parse_extract_spec,
+    read_window,
+)
+
+LINES = "".join(f"line {number}\n" for number in range(1, 1001)).encode("utf-8")
+
+
+def window(data, policy, block_size=64):
+    """Read a window from bytes through a temporary file."""
+    with tempfile.TemporaryFile() as f:
+        f.write(data)
+        f.seek(0)
+        return read_window(f, policy, block_size)
+
+
+def test_parse_extract_spec():
+    """Test parsing extraction policies."""
+    assert parse_extract_spec("*.log: head=200,tail=50") == (
+        "*.log",
+        ExtractPolicy(head=200, tail=50),
+    )
+    assert parse_extract_spec("fixtures/*.json:tail=5") == (
+        "fixtures/*.json",
+        ExtractPolicy(tail=5),
+    )
+    for spec in ["*.log", "*.log: head=x", "*.log: middle=3", "*.log: head=0"]:
+        with pytest.raises(PatternError):
+            parse_extract_spec(spec)
+
+
+def test_extraction_rules_first_match():
+    """Test that the first matching policy wins."""
+    rules = ExtractionRules(
+        [("logs/*.log", ExtractPolicy(head=1)), (".log", ExtractPolicy(tail=2))]
+    )
+    assert rules.policy_for("logs/app.log") == ExtractPolicy(head=1)
+    assert rules.policy_for("other/app.log") == ExtractPolicy(tail=2)
+    assert rules.policy_for("main.py") is None
+
+
+def test_read_window_head_and_tail():
+    """Test head/tail windows with an elision marker."""
+    data, bytes_read = window(LINES, ExtractPolicy(head=2, tail=3))
+    text = data.decode("utf-8")
+    lines = text.splitlines()
+
+    assert lines[:2] == ["line 1", "line 2"]
+    assert lines[-3:] == ["line 998", "line 999", "line 1000"]
+    omitted = (
+        len(LINES) - len(b"line 1\nline 2\n") - len(b"line 998\nline 999\nline 1000\n")
+    )
+    assert f"（{omitted:,}バイト）省略" in lines[2]
+    assert lines[2].startswith("[... 約")
+    # 読み込み量はファイルサイズではなく窓の大きさに比例する
+    assert bytes_read <= 4 * 64
+
+
+def test_read_window_small_file():
+    """Test that files within the window are returned unchanged."""
+    data = b"a\nb\nc"
+    assert window(data, ExtractPolicy(head=2, tail=2))[0] == data
+    assert window(data, ExtractPolicy(tail=3))[0] == data
+    assert window(data, ExtractPolicy(head=5))[0] == data
+    assert window(b"", ExtractPolicy(head=1, tail=1))[0] == b""
+
+
+def test_read_window_head_or_tail_only():
+    """Test windows with only a head or only a tail."""
+    head = window(LINES, ExtractPolicy(head=1))[0].decode("utf-8")
+    assert head.startswith("line 1\n[... ")
+    assert head.endswith("省略 ...]\n")
+
+    tail = window(b"x\ny\nz", ExtractPolicy(tail=1))[0].decode("utf-8")
+    assert tail.endswith("...]\nz")
@@ -0,0 +1,150 @@
+"""Test cases for fan-out generation."""
+
+import io
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from promptgen.cli import main
+from promptgen.exceptions import ConfigError
+from promptgen.fanout import FanOut, FanOutput, load_fanout_config
+from promptgen.generator import PromptGenerator
+
+# backend・frontend・無視されるファイルを含むプロジェクト
+PROJECT = {
+    "api/app.py": "print('api')",
+    "api/models.py": "class Model: ...",
+    "web/main.ts": "console.log('web')",
+    "web/style.css": "body {}",
+    "web/node_modules/lib/index.ts": "export {}",
+    "Dockerfile": "FROM python",
+    "shared/config.py": "DEBUG = False",
+    "build/out.py": "generated",
+    ".gitignore": "build/\n",
+}
+
+
+def test_load_fanout_config():
+    """Test output resolution with defaults and relative paths."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        config = base_dir / "fanout.toml"
+        config.write_text(
+            'dir = "repo"\n'
+            "[defaults]\n"
+            'exclude_dirs = ["node_modules"]\n'
+            "[[outputs]]\n"
+            'name = "backend"\n'
+            'patterns = [".py"]\n'
+            'output = "out/backend.txt"\n'
+            "[[outputs]]\n"
+            'patterns = [".ts"]\n'
+            "exclude_dirs = []\n"
+            'format = "jsonl"\n'
+            'output = "out/web.jsonl"\n'
+        )
+
+        loaded = load_fanout_config(str(config))
+        assert loaded["dir"] == str(base_dir / "repo")
+        backend, web = loaded["outputs"]
+        assert backend.name == "backend"
+        assert backend.exclude_dirs == ["node_modules"]
+        assert backend.output == str(base_dir / "out" / "backend.txt")
+        assert web.name == "out/web.jsonl"
+        assert web.exclude_dirs == []
+        assert web.output_format == "jsonl"
+
+        config = base_dir / "fanout.json"
+        config.write_text('{"outputs": [{"patterns": [".py"]}]}')
+        with pytest.raises(ConfigError) as excinfo:
+            load_fanout_config(str(config))
+        assert "missing 'output'" in str(excinfo.value)
+
+
+def test_fanout_matches_separate_generators(monkeypatch, make_tree):
+    """Test that one walk and one read per file give the separate prompts."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        make_tree(base_dir, PROJECT)
+        specs = [
+            FanOutput("backend", [".py"], "backend.txt", ["web/node_modules"]),
+            FanOutput(
+                "frontend", [".ts", ".css"], "web.xml", ["web/node_modules"], "xml"
+            ),
+            FanOutput("infra", ["Dockerfile", "config.py"], "infra.md", [], "markdown"),
+            FanOutput("all", [".py", ".ts"], "all.jsonl", ["web"], "jsonl"),
+        ]
+        expected = {}
+        for spec in specs:
+            generator = PromptGenerator(temp_dir, spec.file_patterns, spec.exclude_dirs)
+            stream = io.StringIO()
+            generator.write_prompt(stream, output_format=spec.output_format)
+            expected[spec.name] = stream.getvalue()
+
+        opened = []
+        real_open = open
+
+        def counting_open(file, *args, **kwargs):
+            opened.append(str(file))
+            return real_open(file, *args, **kwargs)
+
+        monkeypatch.setattr("builtins.open", counting_open)
+        fan_out = FanOut(temp_dir, specs)
+        streams = {spec.name: io.StringIO() for spec in specs}
+        counts = fan_out.write(streams)
+        monkeypatch.undo()
+
+        for spec in specs:
+            assert streams[spec.name].getvalue() == expected[spec.name]
+        assert counts == {"backend": 3, "frontend": 2, "infra": 2, "all": 3}
+        # 複数の出力に含まれるファイルも一度だけ読み込む
+        assert len(opened) == len(set(opened)) == 6
+        assert fan_out.stats.files_read == 6
+        assert sorted(fan_out.route()["frontend"]) == [
+            str(base_dir / "web" / "main.ts"),
+            str(base_dir / "web" / "style.css"),
+        ]
+
+
+def test_fanout_errors():
+    """Test invalid fan-out outputs."""
+    with TemporaryDirectory() as temp_dir:
+        with pytest.raises(ValueError):
+            FanOut(temp_dir, [])
+        with pytest.raises(ValueError):
+            FanOut(
+                temp_dir, [FanOutput("a", [".py"], "a"), FanOutput("a", [".md"], "b")]
+            )
+        with pytest.raises(ValueError):
+            FanOut(temp_dir, [FanOutput("a", [".py"], "a", output_format="yaml")])
+
+
+def test_cli_fanout(capsys, make_tree):
+    """Test the fanout subcommand."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        make_tree(base_dir / "repo", PROJECT)
+        config = base_dir / "fanout.json"
+        config.write_text(
+            json.dumps(
+                {
+                    "dir": "repo",
+                    "defaults": {"exclude_dirs": ["web/node_modules"]},
+                    "outputs": [
+                        {"name": "py", "patterns": [".py"], "output": "out/py.txt"},
+                        {"name": "ts", "patterns": [".ts"], "output": "out/ts.txt.gz"},
+                    ],
+                }
+            )
+        )
+
+        assert main(["fanout", str(config)]) == 0
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [(line["name"], line["files"]) for line in lines] == [
+            ("py", 3),
+            ("ts", 1),
+        ]
+        assert "=== api/app.py ===" in (base_dir / "out" / "py.txt").read_text()
+        assert (base_dir / "out" / "ts.txt.gz").exists()
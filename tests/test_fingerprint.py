@@ -0,0 +1,122 @@
+"""Test cases for Merkle tree fingerprints."""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from promptgen.cli import main
+from promptgen.fingerprint import Fingerprint, HashCache
+from promptgen.generator import PromptGenerator
+
+PROJECT = {
+    "README.md": "# project",
+    "src/app.py": "print('app')",
+    "src/util/strings.py": "def upper(s): ...",
+    "tests/test_app.py": "def test(): ...",
+}
+
+
+def test_fingerprint_is_location_independent(make_tree):
+    """Test that equal trees in different directories hash the same."""
+    with TemporaryDirectory() as temp_dir:
+        first = Path(temp_dir) / "first"
+        second = Path(temp_dir) / "second"
+        make_tree(first, PROJECT)
+        make_tree(second, PROJECT)
+        cache = str(Path(temp_dir) / "hashes.sqlite3")
+        a = PromptGenerator(str(first), [".py", ".md"]).fingerprint(cache_path=cache)
+        b = PromptGenerator(str(second), [".py", ".md"]).fingerprint(cache_path=cache)
+        assert a.root == b.root
+        assert a.directories[""] == a.root
+        assert set(a.directories) == {"", "src", "src/util", "tests"}
+        assert a.subtree("src/app.py") == a.files["src/app.py"]
+        assert a.diff(b) == []
+
+        # パターンが変われば別の指紋になる
+        c = PromptGenerator(str(second), [".py"]).fingerprint(cache_path=cache)
+        assert c.root != a.root
+        assert a.diff(c) == ["README.md"]
+        assert c.subtree("src") == a.subtree("src")
+
+
+def test_fingerprint_pinpoints_changes(make_tree):
+    """Test that subtree hashes locate changed files."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        make_tree(base_dir, PROJECT)
+        cache = str(Path(temp_dir) / "hashes.sqlite3")
+        generator = PromptGenerator(str(base_dir), [".py", ".md"])
+        before = generator.fingerprint(cache_path=cache)
+
+        (base_dir / "src" / "util" / "strings.py").write_text("changed")
+        os.chmod(base_dir / "tests" / "test_app.py", 0o755)
+        (base_dir / "src" / "new.py").write_text("new")
+        after = generator.fingerprint(cache_path=cache)
+
+        assert after.root != before.root
+        assert after.diff(before) == [
+            "src/new.py",
+            "src/util/strings.py",
+            "tests/test_app.py",
+        ]
+        assert after.modes["tests/test_app.py"] == "100755"
+        assert after.files["tests/test_app.py"] == before.files["tests/test_app.py"]
+
+
+def test_fingerprint_is_stat_only_when_unchanged(monkeypatch, make_tree):
+    """Test that cached hashes are reused without reading files."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        make_tree(base_dir, PROJECT)
+        cache_path = str(Path(temp_dir) / "hashes.sqlite3")
+        generator = PromptGenerator(str(base_dir), [".py", ".md"])
+        first = generator.fingerprint(cache_path=cache_path)
+
+        def no_open(*args, **kwargs):
+            raise AssertionError("no file must be read")
+
+        monkeypatch.setattr("builtins.open", no_open)
+        assert generator.fingerprint(cache_path=cache_path) == first
+        monkeypatch.undo()
+
+        with HashCache(cache_path) as cache:
+            st = os.stat(base_dir / "README.md")
+            assert cache.sha256(str(base_dir / "README.md"), st)
+            assert cache.hashed == 0
+
+
+def test_fingerprint_from_files():
+    """Test tree hashes built from file hashes alone."""
+    digest = "00" * 32
+    empty = Fingerprint.from_files([])
+    one = Fingerprint.from_files([("a/b.py", "100644", digest)])
+    assert empty.root != one.root
+    assert one.directories.keys() == {"", "a"}
+    assert Fingerprint.from_files([("a/b.py", "100755", digest)]).root != one.root
+    # ファイルがディレクトリに置き換わった場合も差分に含める
+    moved = Fingerprint.from_files([("a", "100644", digest)])
+    assert moved.diff(one) == ["a", "a/b.py"]
+
+
+def test_cli_fingerprint(capsys, monkeypatch, make_tree):
+    """Test the --fingerprint option."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        make_tree(base_dir, PROJECT)
+        monkeypatch.setenv("PROMPTGEN_CACHE_DIR", str(Path(temp_dir) / "cache"))
+        args = ["--dir", str(base_dir), "--patterns", ".py"]
+
+        assert main(args + ["--fingerprint"]) == 0
+        root = capsys.readouterr().out.strip()
+        assert len(root) == 64
+
+        assert main(args + ["--fingerprint", "json"]) == 0
+        data = json.loads(capsys.readouterr().out)
+        assert data["root"] == root
+        assert "src/util/strings.py" in data["files"]
+
+        shutil.rmtree(base_dir / "tests")
+        assert main(args + ["--fingerprint"]) == 0
+        assert capsys.readouterr().out.strip() != root
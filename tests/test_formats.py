@@ -0,0 +1,81 @@
+"""Test cases for prompt output formats."""
+
+import base64
+import hashlib
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from promptgen.formats import (
+    EMPTY_MESSAGE,
+    format_jsonl,
+    format_markdown,
+    format_text,
+    format_xml,
+    get_formatter,
+)
+
+SECTIONS = [
+    ("main.py", "print('こんにちは')\n=== fake.py ===\n"),
+    ("doc.md", 'Use <b> & "quotes"\n```python\nx = 1\n```'),
+]
+
+
+def test_format_text():
+    """Test the plain text format."""
+    text = "".join(format_text(SECTIONS))
+    assert text.startswith("以下のプロジェクトファイルを確認してください：\n\n")
+    assert "=== main.py ===\nprint('こんにちは')" in text
+    assert "".join(format_text([])) == EMPTY_MESSAGE
+
+
+def test_format_jsonl():
+    """Test JSON lines records."""
+    lines = "".join(format_jsonl(SECTIONS)).splitlines()
+    records = [json.loads(line) for line in lines]
+
+    assert [record["path"] for record in records] == ["main.py", "doc.md"]
+    content = SECTIONS[0][1]
+    assert records[0]["content"] == content
+    assert records[0]["size"] == len(content.encode("utf-8"))
+    assert records[0]["sha256"] == hashlib.sha256(content.encode("utf-8")).hexdigest()
+    assert "".join(format_jsonl([])) == ""
+
+
+def test_format_xml():
+    """Test XML escaping."""
+    root = ET.fromstring("".join(format_xml(SECTIONS)).encode("utf-8"))
+    files = root.findall("file")
+
+    assert [f.get("path") for f in files] == ["main.py", "doc.md"]
+    assert files[1].text == SECTIONS[1][1]
+    assert files[1].get("size") == str(len(SECTIONS[1][1].encode("utf-8")))
+    assert ET.fromstring("".join(format_xml([]))).findall("file") == []
+
+
+def test_format_xml_control_characters():
+    """Test that content with control characters stays well-formed XML."""
+    content = "\x1b[31mred\x1b[0m\x0c<b>"
+    text = "".join(format_xml([("term\x07.log", content), ("ok.txt", "a\tb\r\n")]))
+    files = ET.fromstring(text).findall("file")
+
+    assert files[0].get("encoding") == "base64"
+    assert files[0].get("path") == "term\ufffd.log"
+    assert base64.b64decode(files[0].text).decode("utf-8") == content
+    assert files[1].get("encoding") is None
+
+
+def test_format_markdown_fence():
+    """Test that fences are longer than backtick runs in the content."""
+    text = "".join(format_markdown(SECTIONS))
+    assert "## main.py\n\n```py\nprint('こんにちは')\n=== fake.py ===\n```\n" in text
+    assert "## doc.md\n\n````md\n" in text
+    assert "x = 1\n```\n````\n" in text
+
+
+def test_get_formatter_unknown():
+    """Test error on an unknown format."""
+    assert get_formatter("jsonl") is format_jsonl
+    with pytest.raises(ValueError):
+        get_formatter("yaml")
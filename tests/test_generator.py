@@ -1,8 +1,14 @@
 """Test cases for generator module."""
 
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
+import pytest
+
 from promptgen.generator import PromptGenerator
 
 
@@ -181,7 +187,7 @@ def test_prompt_generator_exact_filename_match():
         assert str(dockerfile) in files
 
 
-def test_prompt_generator_file_read_error(capsys):
+def test_prompt_generator_file_read_error(caplog):
     """Test PromptGenerator file reading error handling."""
     with TemporaryDirectory() as temp_dir:
         base_dir = Path(temp_dir)
@@ -197,9 +203,446 @@ def test_prompt_generator_file_read_error(capsys):
         assert len(files) == 0
 
         # エラーメッセージを確認
-        captured = capsys.readouterr()
-        assert "Error reading file" in captured.out
-        assert str(test_py) in captured.out
+        assert "Error reading file" in caplog.text
+        assert str(test_py) in caplog.text
 
         # 後処理：ファイルの権限を戻す
         test_py.chmod(0o644)
+
+
+def test_prompt_generator_shared_gitignore_manager():
+    """Test sharing a GitignoreManager between generators."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / ".gitignore").write_text("*.log\n")
+
+        first = PromptGenerator(base_dir=str(base_dir), file_patterns=[".py"])
+        second = PromptGenerator(
+            base_dir=str(base_dir),
+            file_patterns=[".log"],
+            gitignore_manager=first.gitignore_manager,
+        )
+        assert second.gitignore_manager is first.gitignore_manager
+
+        other_dir = base_dir / "other"
+        other_dir.mkdir()
+        with pytest.raises(ValueError):
+            PromptGenerator(
+                base_dir=str(other_dir),
+                file_patterns=[".py"],
+                gitignore_manager=first.gitignore_manager,
+            )
+
+
+def test_prompt_generator_glob_patterns():
+    """Test glob include and exclude patterns with directory pruning."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        files = {
+            "src/app/main.py": "main",
+            "src/app/generated/models.py": "models",
+            "src/tools/tool.py": "tool",
+            "config/app.yaml": "app: 1",
+            "config/env/prod.yaml": "prod: 1",
+            "node_modules/pkg/index.py": "index",
+        }
+        for path, content in files.items():
+            file_path = base_dir / path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(content)
+
+        generator = PromptGenerator(
+            base_dir=str(base_dir),
+            file_patterns=["src/**/*.py", "config/*.yaml"],
+            exclude_dirs=["**/generated"],
+        )
+        collected = generator.collect_files()
+
+        relative = sorted(
+            os.path.relpath(path, str(base_dir)).replace(os.sep, "/")
+            for path in collected
+        )
+        assert relative == ["config/app.yaml", "src/app/main.py", "src/tools/tool.py"]
+        # node_modulesは一度も走査されない
+        assert generator.stats.dirs_pruned == 2
+        assert generator.stats.skipped.get("pattern", 0) == 1
+
+
+def test_prompt_generator_directory_glob_patterns():
+    """Test that unanchored directory globs are matched against the whole path."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        for path in ("config/a.yaml", "pkg/config/b.yaml", "other/c.yaml"):
+            file_path = base_dir / path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(path)
+
+        generator = PromptGenerator(base_dir=str(base_dir), file_patterns=["config/"])
+        collected = generator.collect_files()
+
+        relative = sorted(
+            os.path.relpath(path, str(base_dir)).replace(os.sep, "/")
+            for path in collected
+        )
+        assert relative == ["config/a.yaml", "pkg/config/b.yaml"]
+
+
+def test_prompt_generator_prunes_gitignored_directories():
+    """Test that directory-only .gitignore patterns prune whole directories."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        for path in ("main.py", "build/out.py", "pkg/build/gen.py", "pkg/mod.py"):
+            file_path = base_dir / path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(path)
+        (base_dir / ".gitignore").write_text("build/\n")
+
+        generator = PromptGenerator(base_dir=str(base_dir), file_patterns=[".py"])
+        collected = generator.collect_files()
+
+        relative = sorted(
+            os.path.relpath(path, str(base_dir)).replace(os.sep, "/")
+            for path in collected
+        )
+        assert relative == ["main.py", "pkg/mod.py"]
+        assert generator.stats.dirs_pruned == 2
+
+
+def test_prompt_generator_follow_symlinks():
+    """Test symlinked directories, alias deduplication and cycle protection."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        lib_dir = base_dir / "packages" / "lib"
+        lib_dir.mkdir(parents=True)
+        (lib_dir / "lib.py").write_text("LIB = 1")
+        app_dir = base_dir / "app"
+        app_dir.mkdir()
+        (app_dir / "main.py").write_text("import lib")
+        (app_dir / "lib").symlink_to(lib_dir, target_is_directory=True)
+        (app_dir / "loop").symlink_to(base_dir, target_is_directory=True)
+        (app_dir / "broken").symlink_to(base_dir / "missing")
+
+        # デフォルトではシンボリックリンクのディレクトリは辿らない
+        generator = PromptGenerator(base_dir=str(base_dir), file_patterns=[".py"])
+        assert len(generator.collect_files()) == 2
+
+        generator = PromptGenerator(
+            base_dir=str(base_dir), file_patterns=[".py"], follow_symlinks=True
+        )
+        files = generator.collect_files()
+
+        relative = sorted(os.path.relpath(path, str(base_dir)) for path in files)
+        assert relative == [
+            os.path.join("app", "lib", "lib.py"),
+            os.path.join("app", "main.py"),
+        ]
+        # packages/libはapp/libと同じ物理ディレクトリなので走査しない
+        assert generator.aliases == {
+            str(base_dir): [str(app_dir / "loop")],
+            str(app_dir / "lib"): [str(lib_dir)],
+        }
+        assert generator.stats.files_read == 2
+
+        # ファイルへのハードリンクは一度だけ読み込む
+        os.link(app_dir / "main.py", app_dir / "main_link.py")
+        files = generator.collect_files()
+        assert str(app_dir / "main_link.py") not in files
+        assert generator.aliases[str(app_dir / "main.py")] == [
+            str(app_dir / "main_link.py")
+        ]
+        assert generator.stats.skipped["alias"] == 1
+
+
+def test_prompt_generator_write_prompt_streaming():
+    """Test that streamed output matches generate_prompt."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "src").mkdir()
+        (base_dir / "main.py").write_text("print('main')")
+        (base_dir / "src" / "utils.py").write_text("def helper():\n    pass\n")
+
+        generator = PromptGenerator(base_dir=str(base_dir), file_patterns=[".py"])
+        expected = generator.generate_prompt(generator.collect_files())
+
+        stream = io.StringIO()
+        assert generator.write_prompt(stream) == 2
+        assert stream.getvalue() == expected
+        assert generator.stats.files_read == 2
+        assert generator.stats.timings["render"] > 0.0
+
+        stream = io.StringIO()
+        assert generator.write_prompt(stream, generator.collect_files()) == 2
+        assert stream.getvalue() == expected
+
+
+def test_prompt_generator_write_prompt_empty():
+    """Test streamed output without matching files."""
+    with TemporaryDirectory() as temp_dir:
+        generator = PromptGenerator(base_dir=temp_dir, file_patterns=[".py"])
+        stream = io.StringIO()
+        assert generator.write_prompt(stream) == 0
+        assert stream.getvalue() == "対象となるファイルが見つかりませんでした。"
+
+
+def test_prompt_generator_write_prompt_jsonl():
+    """Test streamed JSON lines output."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "src").mkdir()
+        (base_dir / "main.py").write_text("print('main')")
+        (base_dir / "src" / "utils.py").write_text("def helper():\n    pass\n")
+
+        generator = PromptGenerator(base_dir=str(base_dir), file_patterns=[".py"])
+        stream = io.StringIO()
+        assert generator.write_prompt(stream, output_format="jsonl") == 2
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [record["path"] for record in records] == [
+            "main.py",
+            os.path.join("src", "utils.py"),
+        ]
+        assert records[1]["content"] == "def helper():\n    pass\n"
+
+        with pytest.raises(ValueError):
+            generator.write_prompt(io.StringIO(), output_format="yaml")
+
+
+def test_prompt_generator_collect_files_lazy():
+    """Test lazy collection that reads contents on access."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "main.py").write_text("print('main')")
+        (base_dir / "utils.py").write_text("def helper():\n    pass\n")
+
+        generator = PromptGenerator(base_dir=str(base_dir), file_patterns=[".py"])
+        expected = generator.generate_prompt(generator.collect_files())
+
+        files = generator.collect_files(lazy=True)
+        assert generator.stats.files_read == 0
+        assert len(files) == 2
+        main_py = str(base_dir / "main.py")
+        assert files.stat(main_py).size == len("print('main')")
+
+        assert generator.generate_prompt(files) == expected
+        assert generator.stats.files_read == 2
+
+
+def test_prompt_generator_collect_files_memory_budget():
+    """Test collection with contents spilled beyond a memory budget."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "main.py").write_text("print('main')")
+        (base_dir / "utils.py").write_text("def helper():\n    pass\n" * 100)
+
+        generator = PromptGenerator(base_dir=str(base_dir), file_patterns=[".py"])
+        expected = generator.generate_prompt(generator.collect_files())
+
+        with generator.collect_files(memory_budget=100) as files:
+            assert not files.is_spilled(str(base_dir / "main.py"))
+            assert files.is_spilled(str(base_dir / "utils.py"))
+            assert generator.generate_prompt(files) == expected
+
+        with pytest.raises(ValueError):
+            generator.collect_files(lazy=True, memory_budget=100)
+
+
+def test_prompt_generator_tree_overview():
+    """Test the directory tree overview at the top of the prompt."""
+    from promptgen.tree import TreeOptions
+
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "src").mkdir()
+        (base_dir / "main.py").write_text("print('main')")
+        (base_dir / "src" / "utils.py").write_text("def helper():\n    pass\n")
+
+        generator = PromptGenerator(base_dir=str(base_dir), file_patterns=[".py"])
+        stream = io.StringIO()
+        generator.write_prompt(stream, tree=TreeOptions(stats=True))
+        prompt = stream.getvalue()
+        assert "=== ディレクトリ構成 ===\n./ (2 files)\n├── src/ (1 file)\n" in prompt
+        assert prompt.index("ディレクトリ構成") < prompt.index("=== main.py ===")
+
+        prompt = generator.generate_prompt(
+            generator.collect_files(lazy=True), tree=TreeOptions(stats=True)
+        )
+        assert "./ (2 files, 36 B)" in prompt
+
+
+def test_prompt_generator_extract_policy():
+    """Test reading only a line window of matching files."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        lines = "".join(f"entry {number}\n" for number in range(10000))
+        (base_dir / "app.log").write_text(lines)
+        (base_dir / "main.py").write_text(lines)
+
+        generator = PromptGenerator(
+            base_dir=str(base_dir),
+            file_patterns=[".log", ".py"],
+            extract=["*.log: head=2,tail=1"],
+        )
+        files = generator.collect_files()
+
+        log = files[str(base_dir / "app.log")].splitlines()
+        assert log[:2] == ["entry 0", "entry 1"]
+        assert "省略" in log[2]
+        assert log[3:] == ["entry 9999"]
+        assert files[str(base_dir / "main.py")] == lines
+        assert generator.stats.bytes_read < 2 * len(lines)
+
+
+def test_prompt_generator_redaction():
+    """Test that secrets are redacted while files are read."""
+    from promptgen.redact import Redactor
+
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / ".env").write_text("SECRET_KEY=abcdef123456\nDEBUG=1\n")
+
+        generator = PromptGenerator(
+            base_dir=str(base_dir), file_patterns=[".env"], redactor=Redactor()
+        )
+        files = generator.collect_files()
+
+        assert files[str(base_dir / ".env")] == (
+            "SECRET_KEY=[REDACTED:env_assignment]\nDEBUG=1\n"
+        )
+        assert generator.stats.redactions == {"env_assignment": 1}
+        assert generator.stats.timings["redact"] > 0.0
+
+
+def test_prompt_generator_dry_run(monkeypatch):
+    """Test the stat-only report without reading files."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "src" / "pkg").mkdir(parents=True)
+        (base_dir / "main.py").write_text("x" * 100)
+        (base_dir / "src" / "pkg" / "big.py").write_text("y" * 4000)
+        (base_dir / "src" / "README.md").write_text("z" * 400)
+
+        generator = PromptGenerator(
+            base_dir=str(base_dir), file_patterns=[".py", "*.md"]
+        )
+
+        def fail(*args, **kwargs):
+            raise AssertionError("dry run must not read files")
+
+        monkeypatch.setattr(generator, "_read_file", fail)
+        report = generator.dry_run(top=2)
+
+        assert (report.files, report.bytes, report.tokens) == (3, 4500, 1125)
+        assert [d.name for d in report.directories] == ["src/", "src/pkg/"]
+        assert report.directories[0].files == 2
+        assert [f.name for f in report.largest_files] == [
+            "src/pkg/big.py",
+            "src/README.md",
+        ]
+        assert [(p.name, p.files) for p in report.patterns] == [
+            (".py", 2),
+            ("*.md", 1),
+        ]
+        assert generator.stats.files_read == 0
+        assert "Estimated tokens: ~1,125" in report.format()
+
+
+def test_prompt_generator_shared_between_threads():
+    """Test concurrent runs, per-thread statistics and derived options."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        for index in range(20):
+            (base_dir / f"module{index}.py").write_text(f"value = {index}")
+            (base_dir / f"page{index}.md").write_text(f"# {index}")
+        generator = PromptGenerator(str(base_dir), [".py"])
+        markdown = generator.with_options(file_patterns=[".md"])
+        assert markdown.gitignore_manager is generator.gitignore_manager
+
+        def run(target):
+            files = target.collect_files()
+            return len(files), target.stats.files_read
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(run, [generator, markdown] * 8))
+        assert results == [(20, 20)] * 16
+
+        # 統計は呼び出したスレッドごとに保持される
+        assert generator.stats.files_read == 0
+
+
+def test_prompt_generator_refresh():
+    """Test picking up a new .gitignore on a reused generator."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "keep.py").write_text("keep")
+        (base_dir / "drop.py").write_text("drop")
+        generator = PromptGenerator(str(base_dir), [".py"])
+        assert len(generator.collect_files()) == 2
+
+        (base_dir / ".gitignore").write_text("drop.py\n")
+        assert generator.refresh() == [str(base_dir)]
+        assert list(generator.collect_files()) == [str(base_dir / "keep.py")]
+
+
+def test_prompt_generator_files_from(monkeypatch):
+    """Test selecting files from a path list without walking."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        for path in ("a.py", "b.md", "build/out.py", "vendor/lib.py", "src/c.py"):
+            (base_dir / path).parent.mkdir(parents=True, exist_ok=True)
+            (base_dir / path).write_text(path)
+        (base_dir / ".gitignore").write_text("build/\n")
+        generator = PromptGenerator(str(base_dir), [".py"], exclude_dirs=["vendor"])
+
+        def no_walk(*args, **kwargs):
+            raise AssertionError("the directory must not be walked")
+
+        monkeypatch.setattr(os, "walk", no_walk)
+        listed = [
+            "src/c.py",
+            "a.py",
+            "./a.py",
+            "b.md",
+            "build/out.py",
+            "vendor/lib.py",
+            str(base_dir / "src" / "c.py"),
+            "../outside.py",
+        ]
+        paths = generator.files_from(listed)
+        assert paths == [str(base_dir / "a.py"), str(base_dir / "src" / "c.py")]
+        assert generator.stats.skipped == {
+            "outside": 1,
+            "pattern": 1,
+            "ignored": 1,
+            "excluded": 1,
+        }
+
+        stream = io.StringIO()
+        assert generator.write_prompt(stream, paths=paths) == 2
+        assert "=== src/c.py ===\nsrc/c.py" in stream.getvalue()
+        assert generator.dry_run(paths=paths).files == 2
+
+        # フィルタを適用しなければ一覧をそのまま使う
+        unfiltered = generator.files_from(["b.md", "build/out.py"], filters=False)
+        assert unfiltered == [str(base_dir / "b.md"), str(base_dir / "build/out.py")]
+
+
+def test_prompt_generator_compact_contents():
+    """Test that collected records render like a plain dictionary."""
+    from promptgen.contents import CompactContents
+    from promptgen.tree import TreeOptions
+
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        for path in ("b.py", "a/z.py", "a/b/c.py", "a.py"):
+            (base_dir / path).parent.mkdir(parents=True, exist_ok=True)
+            (base_dir / path).write_text(f"# {path}\n")
+        generator = PromptGenerator(str(base_dir), [".py"])
+        files = generator.collect_files()
+        assert isinstance(files, CompactContents)
+        assert list(files) == sorted(files)
+        for output_format in ("text", "jsonl", "xml", "markdown"):
+            assert generator.generate_prompt(
+                files, output_format, TreeOptions(stats=True)
+            ) == generator.generate_prompt(
+                dict(files), output_format, TreeOptions(stats=True)
+            )
@@ -8,7 +8,12 @@ import pathspec
 import pytest
 
 from promptgen.exceptions import GitignoreError
-from promptgen.gitignore import GitignoreManager, GitignoreRule
+from promptgen.gitignore import (
+    SPEC_CACHE,
+    GitignoreManager,
+    GitignoreRule,
+    GitignoreSpecCache,
+)
 
 
 def test_gitignore_rule():
@@ -112,3 +117,160 @@ def test_gitignore_manager_invalid_base_dir():
     with pytest.raises(GitignoreError) as excinfo:
         GitignoreManager("/nonexistent/directory")
     assert "Base directory not found" in str(excinfo.value)
+
+
+def test_gitignore_spec_cache_lru():
+    """Test LRU eviction and counters of GitignoreSpecCache."""
+    cache = GitignoreSpecCache(maxsize=2)
+    spec = pathspec.PathSpec.from_lines("gitwildmatch", ["*.pyc"])
+    keys = [(f"/repo{i}/.gitignore", 1, 1, 1, i) for i in range(3)]
+
+    cache.put(keys[0], spec)
+    cache.put(keys[1], spec)
+    assert cache.get(keys[0]) is spec  # keys[0]を最近使用したものにする
+    cache.put(keys[2], spec)
+
+    assert len(cache) == 2
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is spec
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    cache.clear()
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_gitignore_spec_cache_shared_between_managers():
+    """Test that compiled specs are reused until the file changes."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        gitignore = base_dir / ".gitignore"
+        gitignore.write_text("*.log\n")
+        SPEC_CACHE.clear()
+
+        first = GitignoreManager(str(base_dir))
+        second = GitignoreManager(str(base_dir))
+        root = str(base_dir)
+        assert second.rules_cache[root].patterns is first.rules_cache[root].patterns
+        assert SPEC_CACHE.hits == 1
+
+        # 内容が変わればキャッシュは使われない
+        gitignore.write_text("*.tmp\n*.bak\n")
+        third = GitignoreManager(str(base_dir))
+        assert third.rules_cache[root].patterns is not first.rules_cache[root].patterns
+        assert third.is_ignored(str(base_dir / "test.tmp"))
+        assert not third.is_ignored(str(base_dir / "test.log"))
+
+
+def test_gitignore_manager_follow_symlinks():
+    """Test loading .gitignore files through symlinked directories."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        shared_dir = Path(temp_dir) / "shared"
+        shared_dir.mkdir()
+        (shared_dir / ".gitignore").write_text("*.tmp\n")
+        (base_dir / "shared").symlink_to(shared_dir, target_is_directory=True)
+        (base_dir / "loop").symlink_to(base_dir, target_is_directory=True)
+
+        manager = GitignoreManager(str(base_dir))
+        assert not manager.is_ignored(str(base_dir / "shared" / "a.tmp"))
+
+        manager = GitignoreManager(str(base_dir), follow_symlinks=True)
+        assert manager.is_ignored(str(base_dir / "shared" / "a.tmp"))
+        assert list(manager.rules_cache) == [str(base_dir / "shared")]
+
+
+def test_gitignore_manager_filter():
+    """Test filtering whole directory listings in one call."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        sub_dir = base_dir / "pkg" / "sub"
+        sub_dir.mkdir(parents=True)
+        (base_dir / ".gitignore").write_text("*.pyc\nbuild/\n/top.txt\n")
+        (sub_dir / ".gitignore").write_text("*.log\n!keep.log\n")
+
+        manager = GitignoreManager(str(base_dir))
+        names = ["a.py", "a.pyc", "top.txt", "x.log", "keep.log"]
+
+        assert manager.filter("", names) == ["a.py", "x.log", "keep.log"]
+        assert manager.filter(".", names) == manager.filter("", names)
+        # ルートに固定したパターンは下位ディレクトリに適用されない
+        assert manager.filter("pkg", names) == ["a.py", "top.txt", "x.log", "keep.log"]
+        assert manager.filter("pkg/sub", names) == ["a.py", "top.txt", "keep.log"]
+
+        # ディレクトリ専用のパターンはディレクトリとして渡したときだけ適用される
+        assert manager.filter("pkg", ["build", "src"], directories=True) == ["src"]
+        assert manager.filter("pkg", ["build"]) == ["build"]
+
+        # 1件ずつのis_ignoredと結果が一致する
+        for name in names:
+            path = os.path.join(str(sub_dir), name)
+            assert manager.is_ignored(path) == (
+                name not in manager.filter("pkg/sub", [name])
+            )
+
+
+def test_gitignore_manager_filter_without_rules():
+    """Test that listings pass through unchanged without .gitignore files."""
+    with TemporaryDirectory() as temp_dir:
+        manager = GitignoreManager(temp_dir)
+        assert manager.filter("any/dir", iter(["a", "b"])) == ["a", "b"]
+        assert manager.filter("", []) == []
+
+
+def test_gitignore_manager_refresh(monkeypatch):
+    """Test picking up .gitignore changes without a full walk."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "pkg").mkdir()
+        (base_dir / ".gitignore").write_text("*.log\n")
+        manager = GitignoreManager(str(base_dir))
+        root = str(base_dir)
+
+        # 変更がなければstatだけで済み、ディレクトリを列挙しない
+        def fail(*args, **kwargs):
+            raise AssertionError("unchanged tree must not be listed")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(os, "walk", fail)
+            patch.setattr(os, "scandir", fail)
+            assert manager.refresh() == []
+
+        # 既存の.gitignoreの編集
+        (base_dir / ".gitignore").write_text("*.log\n*.tmp\n")
+        assert manager.refresh() == [root]
+        assert manager.is_ignored(str(base_dir / "a.tmp"))
+
+        # 新しいサブディレクトリと.gitignoreの追加
+        (base_dir / "pkg" / ".gitignore").write_text("*.bak\n")
+        (base_dir / "new" / "deep").mkdir(parents=True)
+        (base_dir / "new" / "deep" / ".gitignore").write_text("*.out\n")
+        pkg_dir = str(base_dir / "pkg")
+        deep_dir = str(base_dir / "new" / "deep")
+        assert manager.refresh() == sorted([pkg_dir, deep_dir])
+        assert manager.filter("pkg", ["a.bak", "a.py"]) == ["a.py"]
+        assert manager.filter("new/deep", ["a.out", "a.py"]) == ["a.py"]
+
+        # 削除
+        (base_dir / "pkg" / ".gitignore").unlink()
+        (base_dir / "new" / "deep" / ".gitignore").unlink()
+        (base_dir / "new" / "deep").rmdir()
+        assert manager.refresh() == sorted([pkg_dir, deep_dir])
+        assert list(manager.rules_cache) == [root]
+
+
+def test_gitignore_manager_refresh_paths():
+    """Test reloading only the given files and subtrees."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "a").mkdir()
+        (base_dir / "b").mkdir()
+        manager = GitignoreManager(str(base_dir))
+
+        (base_dir / "a" / ".gitignore").write_text("*.log\n")
+        (base_dir / "b" / ".gitignore").write_text("*.log\n")
+        # 指定されたパス以外は再確認しない
+        assert manager.refresh(["a/.gitignore"]) == [str(base_dir / "a")]
+        assert manager.refresh([str(base_dir / "b")]) == [str(base_dir / "b")]
+        assert manager.refresh() == []
@@ -0,0 +1,121 @@
+"""Test cases for the search index."""
+
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from promptgen.cache import CACHE_DIR_ENV
+from promptgen.cli import main
+from promptgen.generator import PromptGenerator
+from promptgen.index import SearchIndex, SearchResult, select_within_budget, tokenize
+
+PROJECT = {
+    "retry.py": "def retry_with_backoff(retries):\n    backoff = 2 ** retries\n",
+    "http/client.py": "class HttpClient:\n    def send(self, retryBackoff):\n",
+    "README.md": "# Project\nGeneral documentation only.\n",
+    "util.py": "def add(a, b):\n    return a + b\n",
+}
+
+
+def test_tokenize_splits_identifiers():
+    """Test identifier splitting on camelCase and snake_case."""
+    terms = tokenize("retryBackoff retry_with_backoff HTTPServer x")
+    assert terms["retrybackoff"] == 1
+    assert terms["retry"] == 2
+    assert terms["backoff"] == 2
+    assert terms["http"] == 1
+    assert terms["server"] == 1
+    assert "x" not in terms
+
+
+def test_search_index_incremental_update(make_tree):
+    """Test that unchanged files are not re-read."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        make_tree(base_dir, PROJECT)
+        paths = [str(p) for p in base_dir.rglob("*") if p.is_file()]
+        reads = []
+
+        def read(path):
+            reads.append(path)
+            return Path(path).read_text()
+
+        index_path = os.path.join(temp_dir, "index.sqlite3")
+        with SearchIndex(index_path) as index:
+            assert index.update(str(base_dir), paths, read) == (4, 0, 0)
+
+        with SearchIndex(index_path) as index:
+            reads.clear()
+            (base_dir / "util.py").write_text("def retry():\n    pass\n" * 3)
+            os.remove(base_dir / "README.md")
+            paths = [str(p) for p in base_dir.rglob("*") if p.is_file()]
+            assert index.update(str(base_dir), paths, read) == (1, 2, 1)
+            assert reads == [str(base_dir / "util.py")]
+
+            results = index.search("retry backoff")
+            assert results[0].path == "retry.py"
+            assert {result.path for result in results} == {
+                "retry.py",
+                "http/client.py",
+                "util.py",
+            }
+            assert index.search("nonexistentterm") == []
+
+
+def test_select_within_budget():
+    """Test top-K and byte budget selection."""
+    results = [
+        SearchResult("a", 3.0, 100),
+        SearchResult("b", 2.0, 500),
+        SearchResult("c", 1.0, 50),
+    ]
+    assert [r.path for r in select_within_budget(results, top_k=2)] == ["a", "b"]
+    assert [r.path for r in select_within_budget(results, max_bytes=200)] == [
+        "a",
+        "c",
+    ]
+
+
+def test_generator_search_files(monkeypatch, make_tree):
+    """Test query-focused selection through PromptGenerator."""
+    with TemporaryDirectory() as temp_dir:
+        monkeypatch.setenv(CACHE_DIR_ENV, os.path.join(temp_dir, "cache"))
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        make_tree(base_dir, PROJECT)
+
+        generator = PromptGenerator(base_dir=str(base_dir), file_patterns=[".py"])
+        paths = generator.search_files("retry backoff", top_k=1)
+        assert paths == [str(base_dir / "retry.py")]
+        assert os.listdir(os.path.join(temp_dir, "cache"))
+
+
+def test_cli_query(monkeypatch, make_tree):
+    """Test the --query CLI option."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        make_tree(base_dir, PROJECT)
+        output_file = Path(temp_dir) / "output.txt"
+        index_path = os.path.join(temp_dir, "index.sqlite3")
+
+        args = [
+            "--dir",
+            str(base_dir),
+            "--query",
+            "retry backoff",
+            "--top-k",
+            "2",
+            "--index",
+            index_path,
+            "--output",
+            str(output_file),
+        ]
+        assert main(args) == 0
+
+        prompt = output_file.read_text()
+        assert "=== retry.py ===" in prompt
+        assert "=== http/client.py ===" in prompt
+        assert "util.py" not in prompt
+        assert os.path.exists(index_path)
@@ -0,0 +1,142 @@
+"""Test cases for run limits."""
+
+import io
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from promptgen.cache import CACHE_DIR_ENV
+from promptgen.cli import main
+from promptgen.generator import PromptGenerator
+from promptgen.limits import Limits
+
+TREE = {path: "x" * 10 for path in ("a.py", "b.py", "c.py", "pkg/d.py", "pkg/sub/e.py")}
+
+
+def test_limits_validation():
+    """Test rejecting invalid limits."""
+    with pytest.raises(ValueError):
+        Limits(max_files=-1)
+    with pytest.raises(ValueError):
+        Limits(deadline=0)
+
+
+def test_max_files(make_tree):
+    """Test stopping after a number of files."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        make_tree(base_dir, TREE)
+        generator = PromptGenerator(temp_dir, [".py"], limits=Limits(max_files=2))
+        files = generator.collect_files()
+        assert len(files) == 2
+        assert generator.stats.truncated == "max_files"
+
+        prompt = generator.generate_prompt(files)
+        assert prompt.endswith("[出力は上限（max_files）に達したため途中で打ち切られています]\n")
+
+        # 上限ちょうどのファイル数では打ち切りにならない
+        generator = PromptGenerator(temp_dir, [".py"], limits=Limits(max_files=5))
+        assert len(generator.collect_files()) == 5
+        assert generator.stats.truncated is None
+
+
+def test_max_total_bytes(make_tree):
+    """Test dropping the file that would exceed the byte limit."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        make_tree(base_dir, TREE)
+        limits = Limits(max_total_bytes=25)
+        generator = PromptGenerator(temp_dir, [".py"], limits=limits)
+        assert len(generator.collect_files()) == 2
+        assert generator.stats.truncated == "max_total_bytes"
+        assert len(generator.collect_files(lazy=True)) == 2
+        with generator.collect_files(memory_budget=0) as files:
+            assert len(files) == 2
+
+        # ストリーミング出力でも整形式のまま打ち切られる
+        stream = io.StringIO()
+        assert generator.write_prompt(stream, output_format="jsonl") == 2
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert len(records) == 3
+        assert records[-1] == {"truncated": "max_total_bytes"}
+
+        stream = io.StringIO()
+        generator.write_prompt(stream, output_format="xml")
+        assert stream.getvalue().endswith(
+            '<truncated reason="max_total_bytes"/>\n</files>\n'
+        )
+
+
+def test_max_depth(make_tree):
+    """Test limiting the walked directory levels."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        make_tree(base_dir, TREE)
+        for depth, expected in ((0, 3), (1, 4), (2, 5)):
+            generator = PromptGenerator(
+                temp_dir, [".py"], limits=Limits(max_depth=depth)
+            )
+            assert len(generator.list_files()) == expected
+            assert generator.stats.truncated == ("max_depth" if depth < 2 else None)
+
+
+def test_deadline(make_tree):
+    """Test returning a well-formed partial prompt at the deadline."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        make_tree(base_dir, TREE)
+        generator = PromptGenerator(temp_dir, [".py"], limits=Limits(deadline=1e-9))
+        files = generator.collect_files()
+        assert files == {}
+        assert generator.stats.truncated == "deadline"
+        assert "deadline" in generator.generate_prompt(files)
+
+
+def test_cli_limits(capsys, make_tree):
+    """Test the CLI limit options."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        make_tree(base_dir, TREE)
+        assert main(["--dir", temp_dir, "--patterns", ".py", "--max-files", "1"]) == 0
+        captured = capsys.readouterr()
+        assert captured.out.count("=== ") == 1
+        assert "max_files" in captured.out
+        assert "Warning: output truncated (max_files reached)" in captured.err
+
+
+def test_limits_apply_to_search_and_entry_reads(capsys, monkeypatch, make_tree):
+    """Test the limits of reads following a query or a dependency closure."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        make_tree(
+            base_dir,
+            {
+                "target.py": "import helper\ndef retry_backoff(): ...\n",
+                "helper.py": "import other\n",
+                "other.py": "x = 1\n",
+                "big.py": "y = 2\n" * 2000,
+            },
+        )
+        monkeypatch.setenv(CACHE_DIR_ENV, str(Path(temp_dir) / "cache"))
+
+        # 索引の構築で読んだバイト数は上限に数えない（冷えた索引でも結果が同じ）
+        for _ in range(2):
+            generator = PromptGenerator(
+                str(base_dir), [".py"], limits=Limits(max_total_bytes=100)
+            )
+            files = generator.read_files(generator.search_files("retry backoff"))
+            assert list(files) == [str(base_dir / "target.py")]
+            assert generator.stats.truncated is None
+
+        generator = PromptGenerator(str(base_dir), [".py"], limits=Limits(max_files=2))
+        files = generator.read_files(generator.dependency_closure(["target.py"]))
+        assert len(files) == 2
+        assert generator.stats.truncated == "max_files"
+
+        args = ["--dir", str(base_dir), "--entry", "target.py", "--max-files", "1"]
+        assert main(args) == 0
+        captured = capsys.readouterr()
+        assert captured.out.count("=== ") == 1
+        assert "max_files reached" in captured.err
@@ -0,0 +1,61 @@
+"""Test cases for output file handling."""
+
+import bz2
+import gzip
+import lzma
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from promptgen.output import compression_for, open_output
+
+
+def test_compression_for():
+    """Test compression detection from file suffixes."""
+    assert compression_for("prompt.txt") is None
+    assert compression_for("prompt.txt.gz") == "gzip"
+    assert compression_for("prompt.txt.xz") == "xz"
+    assert compression_for("prompt.txt.bz2") == "bz2"
+
+
+@pytest.mark.parametrize(
+    "suffix, module",
+    [(".gz", gzip), (".xz", lzma), (".bz2", bz2), ("", None)],
+)
+def test_open_output_round_trip(suffix, module):
+    """Test writing plain and compressed text."""
+    with TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / f"prompt.txt{suffix}"
+        text = "=== main.py ===\nprint('こんにちは')\n" * 100
+
+        with open_output(str(path), compress_level=1) as f:
+            f.write(text)
+
+        if module is None:
+            assert path.read_text(encoding="utf-8") == text
+        else:
+            with module.open(str(path), "rt", encoding="utf-8") as f:
+                assert f.read() == text
+            assert path.stat().st_size < len(text.encode("utf-8"))
+
+
+def test_open_output_invalid_level():
+    """Test validation of the compression level."""
+    with TemporaryDirectory() as temp_dir:
+        with pytest.raises(ValueError):
+            open_output(str(Path(temp_dir) / "prompt.txt.gz"), compress_level=10)
+
+
+@pytest.mark.parametrize("suffix", [".gz", ""])
+def test_open_output_keeps_newlines(suffix):
+    """Test that newlines are not translated, so byte offsets stay exact."""
+    with TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / f"prompt.txt{suffix}"
+        with open_output(str(path)) as f:
+            f.write("a\nb\r\nc\n")
+
+        data = path.read_bytes()
+        if suffix:
+            data = gzip.decompress(data)
+        assert data == b"a\nb\r\nc\n"
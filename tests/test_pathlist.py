@@ -0,0 +1,26 @@
+"""Test cases for path list reading."""
+
+import io
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from promptgen.pathlist import read_path_list, split_path_list
+
+
+def test_split_path_list():
+    """Test newline and NUL delimited lists."""
+    assert split_path_list(b"a.py\r\nsrc/b.py\n\n") == ["a.py", "src/b.py"]
+    assert split_path_list(b"a b.py\0line\nbreak.py\0") == ["a b.py", "line\nbreak.py"]
+    assert split_path_list(b"") == []
+
+
+def test_read_path_list(monkeypatch):
+    """Test reading a list from a file and from stdin."""
+    with TemporaryDirectory() as temp_dir:
+        list_file = Path(temp_dir) / "files.txt"
+        list_file.write_bytes(b"a.py\nb.py\n")
+        assert read_path_list(str(list_file)) == ["a.py", "b.py"]
+
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(b"c.py\0")))
+    assert read_path_list("-") == ["c.py"]
@@ -0,0 +1,95 @@
+"""Test cases for file pattern matching."""
+
+import pytest
+
+from promptgen.exceptions import PatternError
+from promptgen.patterns import FileMatcher, compile_globs, glob_to_regex, is_glob
+
+
+def test_is_glob():
+    """Test classification of plain patterns and globs."""
+    assert not is_glob(".py")
+    assert not is_glob("Dockerfile")
+    assert is_glob("*.py")
+    assert is_glob("config/app.yaml")
+    assert is_glob("file?.txt")
+
+
+def test_glob_to_regex_anchoring():
+    """Test anchored and unanchored globs."""
+    assert glob_to_regex("src/**/*.py")[1]
+    assert glob_to_regex("/setup.py")[1]
+    assert not glob_to_regex("*.md")[1]
+    assert not glob_to_regex("build/")[1]
+
+    with pytest.raises(PatternError):
+        glob_to_regex("/")
+
+
+@pytest.mark.parametrize(
+    "pattern, path, expected",
+    [
+        ("src/**/*.py", "src/main.py", True),
+        ("src/**/*.py", "src/pkg/sub/mod.py", True),
+        ("src/**/*.py", "tests/src/main.py", False),
+        ("config/*.yaml", "config/app.yaml", True),
+        ("config/*.yaml", "config/env/app.yaml", False),
+        ("*.md", "README.md", True),
+        ("*.md", "docs/guide/index.md", True),
+        ("/setup.py", "setup.py", True),
+        ("/setup.py", "pkg/setup.py", False),
+        ("docs/", "docs/a/b.txt", True),
+        ("test_?.py", "tests/test_a.py", True),
+        ("[!a]*.py", "b.py", True),
+        ("[!a]*.py", "a.py", False),
+        ("data/**", "data/x/y.csv", True),
+    ],
+)
+def test_glob_matching(pattern, path, expected):
+    """Test gitwildmatch-style glob semantics."""
+    regex = compile_globs([pattern])
+    assert (regex.fullmatch(path) is not None) == expected
+
+
+def test_compile_globs_subtree():
+    """Test subtree matching used for excluded directories."""
+    regex = compile_globs(["**/node_modules", "build*"], subtree=True)
+    assert regex.fullmatch("web/node_modules")
+    assert regex.fullmatch("web/node_modules/pkg/index.js")
+    assert regex.fullmatch("build-output/app.js")
+    assert regex.fullmatch("src/build.py")
+    assert not regex.fullmatch("src/rebuild.py")
+    assert compile_globs([]) is None
+
+
+def test_file_matcher_plain_and_glob():
+    """Test combined matching of suffixes, names and globs."""
+    matcher = FileMatcher([".py", "Dockerfile", "config/*.yaml"])
+    assert matcher.needs_path
+    assert matcher.matches("pkg/main.py")
+    assert matcher.matches("deploy/Dockerfile")
+    assert matcher.matches("config/app.yaml")
+    assert not matcher.matches("other/app.yaml")
+    assert matcher.dir_prefixes is None
+    assert matcher.could_match_below("anything")
+
+    # スラッシュを含むグロブはルートに固定されなくてもパス全体で照合する
+    assert FileMatcher(["config/"]).needs_path
+    assert FileMatcher(["docs/*.md"]).needs_path
+    assert not FileMatcher(["*.md"]).needs_path
+
+
+def test_file_matcher_dir_prefixes():
+    """Test directory pruning for anchored globs."""
+    matcher = FileMatcher(["src/app/**/*.py", "config/*.yaml"])
+    assert matcher.dir_prefixes == ("config", "src/app")
+    assert matcher.could_match_below("src")
+    assert matcher.could_match_below("src/app")
+    assert matcher.could_match_below("src/app/models")
+    assert matcher.could_match_below("config")
+    assert not matcher.could_match_below("src/other")
+    assert not matcher.could_match_below("node_modules")
+
+    # ルートに固定されないglobがあれば枝刈りしない
+    assert FileMatcher(["src/*.py", "*.md"]).dir_prefixes is None
+    assert FileMatcher(["**/*.py"]).dir_prefixes is None
@@ -0,0 +1,101 @@
+"""Test cases for progress reporting."""
+
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from promptgen.generator import PromptGenerator
+from promptgen.progress import ProgressBar, ProgressEvent, ProgressReporter
+from promptgen.stats import RunStats
+
+
+def test_progress_reporter_throttles_events():
+    """Test that events are throttled by the interval."""
+    events = []
+    reporter = ProgressReporter(events.append, RunStats(), interval=3600)
+
+    for _ in range(100):
+        reporter.dir_entered(1)
+    assert events == []
+
+    reporter.finish()
+    assert len(events) == 1
+    assert events[0].done
+    assert events[0].dirs_entered == 100
+    assert events[0].estimated_remaining == 0.0
+
+
+def test_progress_reporter_estimates_remaining():
+    """Test that intermediate events include pending directories."""
+    events = []
+    stats = RunStats(files_matched=3, bytes_read=10)
+    reporter = ProgressReporter(events.append, stats, interval=0)
+
+    reporter.dir_entered(4)
+    event = events[-1]
+    assert not event.done
+    assert event.dirs_pending == 4
+    assert event.files_matched == 3
+    assert event.bytes_read == 10
+    assert event.estimated_remaining is not None
+
+
+def test_generator_progress_callback():
+    """Test that PromptGenerator delivers a final progress event."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "sub").mkdir()
+        (base_dir / "sub" / "test.py").write_text("print('test')")
+
+        events = []
+        generator = PromptGenerator(
+            base_dir=str(base_dir), file_patterns=[".py"], progress=events.append
+        )
+        generator.collect_files()
+
+        assert events[-1].done
+        assert events[-1].dirs_entered == 2
+        assert events[-1].files_matched == 1
+        assert events[-1].bytes_read == len("print('test')")
+
+
+def test_generator_progress_continues_while_reading(monkeypatch):
+    """Test that events follow the reads after the walk and end with the last file."""
+    # 間引きなしで全イベントを受け取る
+    monkeypatch.setattr(ProgressReporter.__init__, "__defaults__", (0,))
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        for index in range(3):
+            (base_dir / f"file{index}.py").write_text("x" * 100)
+
+        events = []
+
+        def record(event):
+            events.append((event, generator.stats.files_read))
+
+        generator = PromptGenerator(
+            base_dir=str(base_dir), file_patterns=[".py"], progress=record
+        )
+        assert generator.write_prompt(StringIO()) == 3
+
+        # 走査後（読み込み中）にもイベントが届き、最終イベントは全ファイルの後
+        read_counts = [files_read for _event, files_read in events[:-1]]
+        assert {1, 2, 3} <= set(read_counts)
+        assert read_counts == sorted(read_counts)
+        final, files_read = events[-1]
+        assert final.done and files_read == 3
+        assert final.bytes_read == 300
+        assert [event.done for event, _ in events].count(True) == 1
+
+
+def test_progress_bar_render():
+    """Test progress bar rendering."""
+    stream = StringIO()
+    bar = ProgressBar(stream)
+    bar(ProgressEvent(1, 1, 2, 2048, 0.5, 0.5))
+    bar(ProgressEvent(2, 0, 3, 4096, 1.0, 0.0, done=True))
+
+    output = stream.getvalue()
+    assert "dirs 1/2" in output
+    assert "files 3" in output
+    assert output.endswith("\n")
@@ -0,0 +1,271 @@
+"""Test cases for the prompt server."""
+
+import json
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from promptgen.cli import main
+from promptgen.exceptions import ServerError
+from promptgen.generator import PromptGenerator
+from promptgen.server import PromptServer, request_prompt, stream_prompt
+
+
+@contextmanager
+def running_server(socket_path, **kwargs):
+    """Run a PromptServer on a background thread."""
+    server = PromptServer(socket_path, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_server_request_prompt():
+    """Test a basic request against a running server."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        (base_dir / "test.py").write_text("print('test')")
+        socket_path = os.path.join(temp_dir, "promptgen.sock")
+
+        with running_server(socket_path):
+            prompt = request_prompt(socket_path, str(base_dir), [".py"])
+            assert "=== test.py ===" in prompt
+            assert "print('test')" in prompt
+
+            # 同じルートへの2回目のリクエストは既存の状態を再利用する
+            assert request_prompt(socket_path, str(base_dir), [".py"]) == prompt
+
+        assert not os.path.exists(socket_path)
+
+
+def test_server_stream_prompt():
+    """Test streaming a prompt."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        (base_dir / "test.py").write_text("print('こんにちは')\n" * 20000)
+        socket_path = os.path.join(temp_dir, "promptgen.sock")
+
+        with running_server(socket_path):
+            chunks = list(stream_prompt(socket_path, str(base_dir), [".py"]))
+            expected = request_prompt(socket_path, str(base_dir), [".py"])
+
+        assert len(chunks) > 1
+        assert "".join(chunks) == expected
+
+
+def test_server_stream_reads_while_sending(monkeypatch):
+    """Test that streamed prompts are rendered without building the whole text."""
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the whole prompt must not be built")
+
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        (base_dir / "a.py").write_text("A = 1")
+        (base_dir / "b.py").write_text("B = 2")
+        socket_path = os.path.join(temp_dir, "promptgen.sock")
+
+        with running_server(socket_path) as server:
+            expected = request_prompt(socket_path, str(base_dir), [".py"])
+            monkeypatch.setattr(PromptGenerator, "collect_files", fail)
+            monkeypatch.setattr(PromptGenerator, "generate_prompt", fail)
+            chunks = list(stream_prompt(socket_path, str(base_dir), [".py"]))
+            files, _pieces = server.stream({"dir": str(base_dir), "patterns": [".py"]})
+
+            # 不明な形式はヘッダの送信前にエラーになる
+            with pytest.raises(ServerError) as excinfo:
+                list(stream_prompt(socket_path, str(base_dir), [".py"], None, "html"))
+            assert "html" in str(excinfo.value)
+
+        assert "".join(chunks) == expected
+        assert files == 2
+
+
+def test_server_refuses_to_replace_other_files():
+    """Test that an existing path is only replaced if it is a socket."""
+    with TemporaryDirectory() as temp_dir:
+        socket_path = os.path.join(temp_dir, "promptgen.sock")
+        Path(socket_path).write_text("important")
+
+        with pytest.raises(ServerError):
+            PromptServer(socket_path)
+        assert Path(socket_path).read_text() == "important"
+
+        # 異常終了で残ったソケットは置き換える
+        os.unlink(socket_path)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+            stale.bind(socket_path)
+        with running_server(socket_path):
+            assert os.path.exists(socket_path)
+
+
+def test_server_output_format():
+    """Test requesting a structured output format."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        (base_dir / "test.py").write_text("print('test')")
+        socket_path = os.path.join(temp_dir, "promptgen.sock")
+
+        with running_server(socket_path):
+            prompt = request_prompt(
+                socket_path, str(base_dir), [".py"], output_format="jsonl"
+            )
+
+        assert json.loads(prompt)["path"] == "test.py"
+
+
+def test_server_invalidates_changed_root():
+    """Test that a changed .gitignore rebuilds the root state."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        (base_dir / "keep.py").write_text("keep")
+        (base_dir / "drop.py").write_text("drop")
+        socket_path = os.path.join(temp_dir, "promptgen.sock")
+
+        with running_server(socket_path, check_interval=0):
+            assert "drop.py" in request_prompt(socket_path, str(base_dir), [".py"])
+
+            (base_dir / ".gitignore").write_text("drop.py\n")
+            prompt = request_prompt(socket_path, str(base_dir), [".py"])
+            assert "drop.py" not in prompt
+            assert "keep.py" in prompt
+
+
+def test_server_concurrent_requests():
+    """Test concurrent requests against several roots."""
+    with TemporaryDirectory() as temp_dir:
+        roots = []
+        for index in range(3):
+            root = Path(temp_dir) / f"project{index}"
+            root.mkdir()
+            (root / f"file{index}.py").write_text(f"value = {index}")
+            roots.append(str(root))
+        socket_path = os.path.join(temp_dir, "promptgen.sock")
+
+        with running_server(socket_path, max_workers=4):
+            with ThreadPoolExecutor(max_workers=6) as pool:
+                prompts = list(
+                    pool.map(
+                        lambda root: request_prompt(socket_path, root, [".py"]),
+                        roots * 4,
+                    )
+                )
+
+        for index, prompt in enumerate(prompts):
+            assert f"value = {index % 3}" in prompt
+
+
+def test_server_error_response():
+    """Test error reporting for invalid requests."""
+    with TemporaryDirectory() as temp_dir:
+        socket_path = os.path.join(temp_dir, "promptgen.sock")
+
+        with running_server(socket_path):
+            with pytest.raises(ServerError) as excinfo:
+                request_prompt(socket_path, "/nonexistent/directory", [".py"])
+            assert "Directory not found" in str(excinfo.value)
+
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(socket_path)
+                sock.sendall(b"[]\n")
+                response = json.loads(sock.makefile("rb").readline())
+            assert response == {
+                "ok": False,
+                "error": "Request must be a JSON object",
+            }
+
+
+def test_cli_via_socket():
+    """Test the --via-socket client option."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        (base_dir / "test.py").write_text("print('test')")
+        socket_path = os.path.join(temp_dir, "promptgen.sock")
+        output_file = Path(temp_dir) / "output.txt"
+
+        with running_server(socket_path):
+            args = [
+                "--dir",
+                str(base_dir),
+                "--via-socket",
+                socket_path,
+                "--output",
+                str(output_file),
+            ]
+            assert main(args) == 0
+
+        assert "=== test.py ===" in output_file.read_text()
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        ["--entry", "a.py"],
+        ["--query", "retry"],
+        ["--top-k", "5"],
+        ["--max-bytes", "100"],
+        ["--index", "index.db"],
+        ["--files-from", "-"],
+        ["--no-filters"],
+        ["--extract", "*.log: head=10"],
+        ["--toc", "prompt.toc"],
+        ["--tree"],
+        ["--tree-depth", "2"],
+        ["--tree-width", "5"],
+        ["--tree-stats"],
+        ["--follow-symlinks"],
+        ["--dry-run"],
+        ["--fingerprint"],
+        ["--stats", "json"],
+        ["--profile", "run.prof"],
+        ["--redact"],
+        ["--redact-pattern", "x+"],
+        ["--max-files", "1"],
+        ["--max-total-bytes", "100"],
+        ["--max-depth", "0"],
+        ["--deadline", "1"],
+    ],
+)
+def test_cli_via_socket_rejects_local_options(capsys, options):
+    """Test that options the server does not apply are rejected."""
+    with TemporaryDirectory() as temp_dir:
+        socket_path = os.path.join(temp_dir, "promptgen.sock")
+        args = ["--dir", temp_dir, "--via-socket", socket_path] + options
+
+        assert main(args) == 1
+        err = capsys.readouterr().err
+        assert f"--via-socket cannot be combined with {options[0]}" in err
+
+
+def test_cli_serve(monkeypatch):
+    """Test the serve subcommand."""
+    calls = []
+
+    def mock_serve_forever(self):
+        calls.append(self.socket_path)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(PromptServer, "serve_forever", mock_serve_forever)
+
+    with TemporaryDirectory() as temp_dir:
+        socket_path = os.path.join(temp_dir, "promptgen.sock")
+        assert main(["serve", "--socket", socket_path]) == 0
+        assert calls == [socket_path]
+        assert not os.path.exists(socket_path)
@@ -0,0 +1,72 @@
+"""Test cases for run statistics."""
+
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from promptgen.generator import PromptGenerator
+from promptgen.stats import PHASES, RunStats
+
+
+def test_run_stats_defaults():
+    """Test RunStats default values and serialisation."""
+    stats = RunStats()
+    assert stats.entries_visited == 0
+    assert set(stats.timings) == set(PHASES)
+
+    stats.skip("ignored")
+    stats.skip("ignored")
+    with stats.phase("read"):
+        pass
+
+    data = json.loads(stats.to_json())
+    assert data["skipped"] == {"ignored": 2}
+    assert data["timings"]["read"] >= 0.0
+
+
+def test_generator_collects_stats():
+    """Test that collect_files records counters for each phase."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "exclude").mkdir()
+        (base_dir / "exclude" / "skip.py").write_text("skip")
+        (base_dir / "main.py").write_text("print('main')")
+        (base_dir / "notes.txt").write_text("notes")
+        (base_dir / "debug.py").write_text("log")
+        (base_dir / "binary.py").write_bytes(b"\xff\xfe\x00")
+        (base_dir / ".gitignore").write_text("debug.py\n")
+
+        generator = PromptGenerator(
+            base_dir=str(base_dir),
+            file_patterns=[".py"],
+            exclude_dirs=["exclude"],
+        )
+        files = generator.collect_files()
+        generator.generate_prompt(files)
+
+        stats = generator.stats
+        assert len(files) == 1
+        assert stats.entries_visited == 6
+        assert stats.dirs_pruned == 1
+        assert stats.ignore_checks == 4
+        assert stats.files_matched == 2
+        assert stats.files_read == 1
+        assert stats.bytes_read == len("print('main')") + 3
+        assert stats.skipped == {
+            "ignored": 1,
+            "pattern": 2,
+            "decode_error": 1,
+        }
+        assert stats.timings["render"] > 0.0
+
+
+def test_generator_normalizes_newlines():
+    """Test that CRLF line endings are normalised like text mode reads."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        test_py = base_dir / "test.py"
+        test_py.write_bytes(b"a = 1\r\nb = 2\r")
+
+        generator = PromptGenerator(base_dir=str(base_dir), file_patterns=[".py"])
+        files = generator.collect_files()
+        assert files[str(test_py)] == "a = 1\nb = 2\n"
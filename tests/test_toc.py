@@ -0,0 +1,98 @@
+"""Test cases for the prompt table of contents."""
+
+import io
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from promptgen.generator import PromptGenerator
+from promptgen.toc import PromptReader, TableOfContents, TocEntry
+
+FILES = {
+    "main.py": "print('main')\n",
+    "pkg/markup.html": '<a href="x">&amp; ```code``` ünïcødé</a>',
+    "notes.md": "line 1\r\nline 2",
+    "term.log": "\x1b[31mred\x1b[0m\x0c & <done>\n",
+}
+
+
+@pytest.mark.parametrize("output_format", ["text", "jsonl", "xml", "markdown"])
+@pytest.mark.parametrize("toc_name", ["prompt.toc", "prompt.toc.json"])
+def test_toc_round_trip(output_format, toc_name, make_tree):
+    """Test reading each file back through the table of contents."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir) / "project"
+        base_dir.mkdir()
+        make_tree(base_dir, FILES)
+        generator = PromptGenerator(str(base_dir), [".py", ".html", ".md", ".log"])
+        prompt_path = Path(temp_dir) / "prompt"
+        toc = TableOfContents()
+        with open(prompt_path, "w", encoding="utf-8") as f:
+            generator.write_prompt(f, output_format=output_format, tree=None, toc=toc)
+        toc.save(str(Path(temp_dir) / toc_name))
+
+        assert toc.output_format == output_format
+        assert toc.size == prompt_path.stat().st_size
+        with PromptReader(str(prompt_path), str(Path(temp_dir) / toc_name)) as reader:
+            assert reader.paths() == sorted(FILES)
+            assert reader.toc.output_format == output_format
+            for path, content in FILES.items():
+                # 改行コードは読み込み時に統一される
+                expected = content.replace("\r\n", "\n")
+                assert reader.read(path, verify=True) == expected
+            assert "missing.py" not in reader
+            with pytest.raises(KeyError):
+                reader.read("missing.py")
+
+
+def test_toc_raw_slices_text_prompt():
+    """Test that text prompts expose the unmodified content bytes."""
+    with TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "a.py").write_text("a = 1\n")
+        generator = PromptGenerator(str(base_dir), [".py"])
+        stream = io.StringIO()
+        toc = TableOfContents()
+        generator.write_prompt(stream, toc=toc)
+
+        (entry,) = toc
+        assert entry.path == "a.py"
+        data = stream.getvalue().encode("utf-8")
+        assert data[entry.offset : entry.offset + entry.length] == b"a = 1\n"
+        assert toc.size == len(data)
+
+
+def test_toc_binary_encoding():
+    """Test the compact binary layout."""
+    toc = TableOfContents("jsonl")
+    toc.size = 100
+    toc.entries["dir/ファイル.py"] = TocEntry("dir/ファイル.py", 10, 20, "ab" * 32)
+    loaded = TableOfContents.from_bytes(toc.to_bytes())
+    assert loaded.output_format == "jsonl"
+    assert loaded.size == 100
+    assert list(loaded) == list(toc)
+
+    with pytest.raises(ValueError):
+        TableOfContents.from_bytes(b"not a toc")
+    with pytest.raises(ValueError):
+        TableOfContents.from_bytes(toc.to_bytes()[:-3])
+
+
+def test_prompt_reader_errors():
+    """Test verification and truncated prompts."""
+    with TemporaryDirectory() as temp_dir:
+        prompt_path = Path(temp_dir) / "prompt.txt"
+        prompt_path.write_text("hello")
+        toc = TableOfContents()
+        toc.entries["a.py"] = TocEntry("a.py", 0, 5, "00" * 32)
+        toc.size = 5
+        with PromptReader(str(prompt_path), toc) as reader:
+            assert bytes(reader.raw("a.py")) == b"hello"
+            assert reader.read("a.py") == "hello"
+            with pytest.raises(ValueError):
+                reader.read("a.py", verify=True)
+
+        toc.size = 6
+        with pytest.raises(ValueError):
+            PromptReader(str(prompt_path), toc)
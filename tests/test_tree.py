@@ -0,0 +1,64 @@
+"""Test cases for the directory tree overview."""
+
+import pytest
+
+from promptgen.tree import TreeOptions, format_size, render_tree
+
+PATHS = [
+    "README.md",
+    "src/promptgen/cli.py",
+    "src/promptgen/generator.py",
+    "tests/test_cli.py",
+]
+
+
+def test_render_tree():
+    """Test rendering with collapsed single-child chains."""
+    assert render_tree(PATHS) == (
+        "./\n"
+        "├── src/promptgen/\n"
+        "│   ├── cli.py\n"
+        "│   └── generator.py\n"
+        "├── tests/\n"
+        "│   └── test_cli.py\n"
+        "└── README.md\n"
+    )
+
+
+def test_render_tree_stats():
+    """Test per-directory file counts and sizes."""
+    sizes = dict(zip(PATHS, [100, 1024, 2048, 512]))
+    tree = render_tree(PATHS, sizes, TreeOptions(stats=True))
+    assert tree.splitlines()[0] == "./ (4 files, 3.6 KiB)"
+    assert "├── src/promptgen/ (2 files, 3.0 KiB)" in tree
+    assert "│   └── generator.py (2.0 KiB)" in tree
+    assert "└── README.md (100 B)" in tree
+
+    # サイズが不明な場合はファイル数だけを表示する
+    assert render_tree(PATHS, None, TreeOptions(stats=True)).startswith(
+        "./ (4 files)\n"
+    )
+
+
+def test_render_tree_limits():
+    """Test depth and width caps."""
+    tree = render_tree(PATHS, options=TreeOptions(max_depth=1))
+    assert "├── src/promptgen/ (2 files)\n├── tests/ (1 file)\n" in tree
+    assert "cli.py" not in tree
+
+    tree = render_tree(PATHS, options=TreeOptions(max_width=1))
+    assert tree.splitlines()[1:3] == [
+        "├── src/promptgen/",
+        "│   ├── cli.py",
+    ]
+    assert "└── … 2 more entries (2 files)" in tree
+
+    with pytest.raises(ValueError):
+        TreeOptions(max_depth=0)
+
+
+def test_format_size():
+    """Test human readable sizes."""
+    assert format_size(512) == "512 B"
+    assert format_size(1536) == "1.5 KiB"
+    assert format_size(5 * 1024 * 1024) == "5.0 MiB"